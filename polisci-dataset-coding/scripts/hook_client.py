@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Hook Client for Claude Code — Forward a Hook Payload to the Hook Daemon
+
+Passes stdin to scripts/hook_daemon.py over its Unix socket and relays the
+reply to stdout. It only imports os/sys/stat/zlib/socket and parses
+nothing, so together with `python3 -S` (no site import) the per-call cost
+is little more than bare interpreter startup. If no daemon is listening,
+the hooks run in-process through scripts/hook_dispatch.py, exactly as
+without a daemon.
+
+The socket lives in $XDG_RUNTIME_DIR/claude-hooks, or else in the
+predictable /tmp/claude-hooks-<uid>. That directory is only trusted if it
+is a real directory (not a symlink) owned by this user with mode 0700;
+otherwise the hooks run in-process, and the daemon refuses to start.
+
+Fail open: if the daemon accepts the payload but the exchange then fails,
+nothing is printed and the exit status is 0. The hooks are not re-run
+in-process, because they may already have updated their state.
+
+Usage (in .claude/settings.json):
+    "Stop": [{ "hooks": [{ "type": "command", "command": "python3 -S scripts/hook_client.py" }] }],
+    "PostToolUse": [{ "matcher": "Write|Edit|Read|Bash",
+                      "hooks": [{ "type": "command", "command": "python3 -S scripts/hook_client.py" }] }]
+"""
+
+import os
+import sys
+import stat
+import zlib
+import socket
+
+SOCKET_ENV = "CLAUDE_HOOK_SOCKET"
+CLIENT_TIMEOUT = 30
+
+
+def runtime_dir() -> str:
+    """Per-user directory for the daemon socket and the hook state."""
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        return os.path.join(os.environ["XDG_RUNTIME_DIR"], "claude-hooks")
+    return os.path.join("/tmp", f"claude-hooks-{os.getuid()}")
+
+
+def private_dir(path: str, create: bool = False) -> bool:
+    """True if path is a directory (not a symlink) owned by this user with mode 0700.
+
+    With create, a missing directory is made first.
+    """
+    try:
+        if create:
+            os.makedirs(path, mode=0o700, exist_ok=True)
+        info = os.lstat(path)
+    except OSError:
+        return False
+    return (stat.S_ISDIR(info.st_mode) and info.st_uid == os.getuid()
+            and stat.S_IMODE(info.st_mode) == 0o700)
+
+
+def socket_path() -> str:
+    """Daemon socket for this user and scripts directory ($CLAUDE_HOOK_SOCKET overrides)."""
+    if os.environ.get(SOCKET_ENV):
+        return os.environ[SOCKET_ENV]
+    scripts_dir = os.path.dirname(os.path.abspath(__file__))
+    # crc32, not hashlib: it is the slowest import here, and the name only has to be stable
+    name = "%08x" % (zlib.crc32(scripts_dir.encode()) & 0xffffffff)
+    return os.path.join(runtime_dir(), f"{name}.sock")
+
+
+def ask_daemon(message: bytes):
+    """The daemon's reply to message, or None if no daemon is listening.
+
+    Raises OSError if the daemon accepted the connection but the exchange failed.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    path = socket_path()
+    # Anyone could have created the default directory first and planted a socket in it
+    if not os.environ.get(SOCKET_ENV) and not private_dir(os.path.dirname(path)):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CLIENT_TIMEOUT)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    with sock:
+        sock.sendall(message)
+        sock.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def main():
+    event = sys.argv[1] if len(sys.argv) > 1 else ""
+    payload = sys.stdin.buffer.read()
+    try:
+        # Message: the event override on the first line, then the payload as received
+        reply = ask_daemon(event.encode() + b"\n" + payload)
+    except OSError:
+        reply = b""
+    if reply is None:
+        import hook_dispatch
+        reply = hook_dispatch.respond(payload, event or None)
+    sys.stdout.buffer.write(reply)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception:
+        # Fail open — never block Claude due to a hook bug
+        sys.exit(0)
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Hook Daemon for Claude Code — Long-Running Server for the Hook Scripts
+
+Keeps scripts/hook_dispatch.py and the hook scripts loaded in one process
+and answers hook payloads sent by scripts/hook_client.py over a Unix socket
+(one daemon per user and scripts directory). A hook call then skips the
+imports, module setup and opening of the hook state database
+(scripts/hook_state.py), which in-process runs (no daemon) share.
+
+The socket's directory must be private to the user (see
+scripts/hook_client.py); otherwise the daemon does not start.
+
+Requests are handled one at a time, in arrival order, so hooks of
+concurrent calls never interleave their state updates. Protocol: the
+client sends the event override (may be empty) and a newline, then the
+raw payload, and closes its sending side. The daemon replies with the
+merged response (nothing if there is none) and closes the connection.
+
+Edited hook scripts are reloaded on the next call. After an edit of the
+daemon, the dispatcher or a helper module of the hooks (hook_state.py,
+r_review_index.py), the daemon restarts itself once the current request
+has been answered. A client gets REQUEST_TIMEOUT seconds to send its
+payload before the connection is dropped without a reply. It exits after --idle-timeout seconds without
+requests.
+
+Usage:
+    python3 scripts/hook_daemon.py --detach      # start in the background (no-op if running)
+    python3 scripts/hook_daemon.py --status
+    python3 scripts/hook_daemon.py --stop
+    python3 scripts/hook_daemon.py               # run in the foreground
+
+Start it from a SessionStart hook, for example:
+    "SessionStart": [{ "hooks": [{ "type": "command", "command": "python3 scripts/hook_daemon.py --detach" }] }]
+"""
+
+import os
+import sys
+import time
+import signal
+import socket
+import argparse
+import subprocess
+import socketserver
+from pathlib import Path
+from typing import Dict, Optional
+
+import hook_dispatch
+from hook_client import private_dir, runtime_dir, socket_path
+
+DEFAULT_IDLE_TIMEOUT = 4 * 60 * 60
+STARTUP_WAIT = 5
+# Seconds a client gets to send its payload; requests are served one at a time
+REQUEST_TIMEOUT = 5
+UNSAFE_DIR = "Not using {}: not a directory owned by this user with mode 0700"
+# Files whose edits need a restart (hook scripts are just reloaded; the helper
+# modules they import stay cached in sys.modules)
+SELF_SOURCES = (Path(__file__).resolve(), hook_dispatch.SCRIPTS_DIR / "hook_dispatch.py",
+                hook_dispatch.SCRIPTS_DIR / "hook_client.py", hook_dispatch.SCRIPTS_DIR / "hook_state.py",
+                hook_dispatch.SCRIPTS_DIR / "r_review_index.py")
+
+
+def pid_path(sock: Path) -> Path:
+    return sock.with_suffix(".pid")
+
+
+def socket_dir_ok(sock: Path, create: bool = False) -> bool:
+    """False if sock is in the default runtime directory and that is not private to this user.
+
+    Directories chosen explicitly ($CLAUDE_HOOK_SOCKET, --socket) are not checked.
+    """
+    if sock.parent != Path(runtime_dir()):
+        if create:
+            sock.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        return True
+    return private_dir(str(sock.parent), create=create)
+
+
+def is_running(sock: Path) -> bool:
+    """True if a daemon accepts connections on sock."""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    probe.settimeout(1)
+    try:
+        probe.connect(str(sock))
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+def source_stamps(paths) -> Dict[Path, Optional[int]]:
+    stamps = {}
+    for path in paths:
+        try:
+            stamps[path] = path.stat().st_mtime_ns
+        except OSError:
+            stamps[path] = None
+    return stamps
+
+
+def hook_scripts():
+    return [hook_dispatch.SCRIPTS_DIR / script
+            for hooks in hook_dispatch.HOOKS.values() for script, _ in hooks]
+
+
+class HookRequestHandler(socketserver.StreamRequestHandler):
+    timeout = REQUEST_TIMEOUT   # applied to the connection in setup()
+
+    def handle(self):
+        try:
+            message = self.rfile.read()
+        except socket.timeout:
+            # Fail open — a client that never finishes sending must not hold up the others
+            return
+        event, _, payload = message.partition(b"\n")
+        self.server.refresh_hooks()
+        try:
+            reply = hook_dispatch.respond(payload, event.decode() or None)
+        except Exception:
+            # Fail open — a bad payload must not take the daemon down
+            reply = b""
+        self.wfile.write(reply)
+
+
+class HookServer(socketserver.UnixStreamServer):
+    """Serves hook requests sequentially; tracks idle time and source edits."""
+
+    timeout = 1.0  # handle_request() wakes up this often to check for idling / SIGTERM
+
+    def __init__(self, sock: Path, idle_timeout: float):
+        self.idle_timeout = idle_timeout
+        self.last_request = time.monotonic()
+        self.stopping = False
+        self.restart = False
+        self.hook_stamps = source_stamps(hook_scripts())
+        self.self_stamps = source_stamps(SELF_SOURCES)
+        super().__init__(str(sock), HookRequestHandler)
+
+    def refresh_hooks(self):
+        """Reload the hook scripts if any of them changed on disk."""
+        stamps = source_stamps(hook_scripts())
+        if stamps != self.hook_stamps:
+            hook_dispatch.load_handler.cache_clear()
+            self.hook_stamps = stamps
+
+    def handle_timeout(self):
+        if time.monotonic() - self.last_request > self.idle_timeout:
+            self.stopping = True
+
+    def process_request(self, request, client_address):
+        super().process_request(request, client_address)
+        self.last_request = time.monotonic()
+        if source_stamps(SELF_SOURCES) != self.self_stamps:
+            self.restart = self.stopping = True
+
+    def handle_error(self, request, client_address):
+        # A client that went away mid-reply is not worth a traceback
+        pass
+
+
+def serve(sock: Path, idle_timeout: float) -> bool:
+    """Run the server until idle, stopped or edited; True if it should restart.
+
+    The socket directory must have passed socket_dir_ok().
+    """
+    if is_running(sock):
+        print(f"Hook daemon already running on {sock}", file=sys.stderr)
+        return False
+    try:
+        sock.unlink()  # stale socket of a daemon that died
+    except FileNotFoundError:
+        pass
+
+    os.umask(0o077)
+    server = HookServer(sock, idle_timeout)
+    pid_path(sock).write_text(str(os.getpid()))
+    signal.signal(signal.SIGTERM, lambda *_: setattr(server, "stopping", True))
+    # Preload the hooks so the first call is as fast as the rest
+    for script in hook_scripts():
+        try:
+            hook_dispatch.load_handler(script.name)
+        except Exception:
+            pass
+    try:
+        while not server.stopping:
+            server.handle_request()
+    finally:
+        server.server_close()
+        for path in (sock, pid_path(sock)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+    return server.restart
+
+
+def detach(sock: Path, idle_timeout: float) -> int:
+    """Start the daemon in its own session and wait until it accepts connections."""
+    if not socket_dir_ok(sock, create=True):
+        print(UNSAFE_DIR.format(sock.parent), file=sys.stderr)
+        return 1
+    if is_running(sock):
+        return 0
+    subprocess.Popen([sys.executable, str(Path(__file__).resolve()), "--socket", str(sock),
+                      "--idle-timeout", str(idle_timeout)],
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                     start_new_session=True)
+    deadline = time.monotonic() + STARTUP_WAIT
+    while time.monotonic() < deadline:
+        if is_running(sock):
+            return 0
+        time.sleep(0.05)
+    print(f"Hook daemon did not start on {sock}", file=sys.stderr)
+    return 1
+
+
+def stop(sock: Path) -> int:
+    if not socket_dir_ok(sock):
+        print(UNSAFE_DIR.format(sock.parent), file=sys.stderr)
+        return 1
+    try:
+        pid = int(pid_path(sock).read_text())
+        os.kill(pid, signal.SIGTERM)
+    except (FileNotFoundError, ValueError, ProcessLookupError):
+        print(f"No hook daemon running on {sock}", file=sys.stderr)
+        return 1
+    deadline = time.monotonic() + STARTUP_WAIT
+    while time.monotonic() < deadline and sock.exists():
+        time.sleep(0.05)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Long-running server for the Claude Code hook scripts')
+    parser.add_argument('--socket', type=Path, default=Path(socket_path()),
+                        help='Unix socket path (default: $CLAUDE_HOOK_SOCKET, else <hash>.sock in '
+                             '$XDG_RUNTIME_DIR/claude-hooks or /tmp/claude-hooks-<uid>)')
+    parser.add_argument('--idle-timeout', type=float, default=DEFAULT_IDLE_TIMEOUT,
+                        help=f'Exit after this many seconds without requests (default: {DEFAULT_IDLE_TIMEOUT})')
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument('--detach', action='store_true', help='Start in the background unless already running')
+    action.add_argument('--stop', action='store_true', help='Stop the running daemon')
+    action.add_argument('--status', action='store_true', help='Exit 0 if a daemon is running, 1 otherwise')
+    args = parser.parse_args()
+
+    if args.status:
+        running = is_running(args.socket)
+        print(f"Hook daemon {'running' if running else 'not running'} on {args.socket}")
+        sys.exit(0 if running else 1)
+    if args.stop:
+        sys.exit(stop(args.socket))
+    if args.detach:
+        sys.exit(detach(args.socket, args.idle_timeout))
+
+    if not socket_dir_ok(args.socket, create=True):
+        print(UNSAFE_DIR.format(args.socket.parent), file=sys.stderr)
+        sys.exit(1)
+    if serve(args.socket, args.idle_timeout):
+        os.execv(sys.executable, [sys.executable, str(Path(__file__).resolve())] + sys.argv[1:])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Hook Dispatcher for Claude Code — One Process for All Hooks of an Event
+
+Reads the hook payload from stdin once, runs every hook registered for its
+event in-process and prints a single merged response. This replaces one
+cold `python3` start (imports, payload parse) per hook script on every Stop
+and on every Write/Edit/Read/Bash.
+
+Merged response:
+    decision              "block" if any hook blocks; reasons joined in hook order
+    additionalContext     joined in hook order (hookSpecificOutput)
+    systemMessage         joined in hook order
+    continue              false if any hook says so (first stopReason kept)
+
+Hooks are the handle(hook_input) functions of the hook scripts, which still
+run standalone. A hook that raises is skipped and the others still run
+(fail open, like the scripts themselves).
+
+Usage (in .claude/settings.json):
+    "Stop": [{ "hooks": [{ "type": "command", "command": "python3 scripts/hook_dispatch.py" }] }],
+    "PostToolUse": [{ "matcher": "Write|Edit|Read|Bash",
+                      "hooks": [{ "type": "command", "command": "python3 scripts/hook_dispatch.py" }] }]
+
+The event is taken from the payload's hook_event_name; an explicit event
+argument (`hook_dispatch.py Stop`) overrides it. For hooks without Python
+startup per call, see scripts/hook_daemon.py and scripts/hook_client.py.
+"""
+
+import json
+import sys
+import importlib.util
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+# event -> [(hook script, tool names it applies to, or None for every payload)]
+HOOKS: Dict[str, List[Tuple[str, Optional[Tuple[str, ...]]]]] = {
+    "Stop": [
+        ("log-reminder.py", None),
+        ("r-review-reminder.py", None),
+    ],
+    "PostToolUse": [
+        ("r-mass-production-guard.py", ("Write", "Edit", "Read", "Bash")),
+    ],
+}
+
+
+def get_hook_input() -> dict:
+    """Get hook input from stdin JSON."""
+    try:
+        return json.load(sys.stdin)
+    except (json.JSONDecodeError, EOFError):
+        return {}
+
+
+@lru_cache(maxsize=None)
+def load_handler(script: str) -> Callable[[dict], Optional[dict]]:
+    """handle() of a hook script (file names have dashes, so load by path)."""
+    name = "hook_" + Path(script).stem.replace("-", "_")
+    spec = importlib.util.spec_from_file_location(name, SCRIPTS_DIR / script)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.handle
+
+
+def merge(outputs: List[dict], event: str) -> Optional[dict]:
+    """Combine the responses of several hooks into one."""
+    merged: dict = {}
+    if any(o.get("decision") == "block" for o in outputs):
+        merged["decision"] = "block"
+        merged["reason"] = "\n\n".join(o["reason"] for o in outputs
+                                       if o.get("decision") == "block" and o.get("reason"))
+
+    specific: dict = {}
+    contexts = []
+    for output in outputs:
+        for key, value in output.get("hookSpecificOutput", {}).items():
+            if key == "additionalContext":
+                contexts.append(value)
+            else:
+                specific.setdefault(key, value)
+    if contexts:
+        specific["additionalContext"] = "\n\n".join(contexts)
+    if specific:
+        specific["hookEventName"] = event
+        merged["hookSpecificOutput"] = specific
+
+    messages = [o["systemMessage"] for o in outputs if o.get("systemMessage")]
+    if messages:
+        merged["systemMessage"] = "\n\n".join(messages)
+    stops = [o for o in outputs if o.get("continue") is False]
+    if stops:
+        merged["continue"] = False
+        reason = next((o["stopReason"] for o in stops if o.get("stopReason")), None)
+        if reason:
+            merged["stopReason"] = reason
+    return merged or None
+
+
+def dispatch(hook_input: dict, event: Optional[str] = None) -> Optional[dict]:
+    """Run every hook registered for the event; return the merged response, or None."""
+    event = event or hook_input.get("hook_event_name", "")
+    tool = hook_input.get("tool_name")
+    outputs = []
+    for script, tools in HOOKS.get(event, []):
+        if tools is not None and tool not in tools:
+            continue
+        try:
+            output = load_handler(script)(hook_input)
+        except Exception:
+            # Fail open — a broken hook must not take the others down
+            continue
+        if output:
+            outputs.append(output)
+    return merge(outputs, event) if outputs else None
+
+
+def respond(payload: bytes, event: Optional[str] = None) -> bytes:
+    """Raw payload in, raw response out (b'' for no response); used by the hook daemon."""
+    try:
+        hook_input = json.loads(payload or b"{}")
+    except ValueError:
+        hook_input = {}
+    if not isinstance(hook_input, dict):
+        hook_input = {}
+    output = dispatch(hook_input, event)
+    return json.dumps(output).encode() if output else b""
+
+
+def main():
+    event = sys.argv[1] if len(sys.argv) > 1 else None
+    output = dispatch(get_hook_input(), event)
+    if output:
+        json.dump(output, sys.stdout)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception:
+        # Fail open — never block Claude due to a hook bug
+        sys.exit(0)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Hook State — Shared SQLite Store for the Hook Scripts' Per-Project State
+
+log-reminder.py, r-review-reminder.py and r-mass-production-guard.py each
+keep a small JSON state per project. All of it lives in one SQLite database
+(WAL mode), one row per (hook, project). A hook reads, modifies and writes
+its row inside one IMMEDIATE transaction, so hooks fired concurrently on
+the same project (parallel sessions, majority-voting subagents) take turns
+instead of overwriting each other's updates. Rows not written for
+STATE_TTL are deleted.
+
+The database lives in the hook runtime directory of scripts/hook_client.py
+($XDG_RUNTIME_DIR/claude-hooks, else /tmp/claude-hooks-<uid>). That
+directory is only used if it is private to the user; otherwise connect()
+raises and the hooks fail open.
+
+Layout (<runtime dir>/state.sqlite; $CLAUDE_HOOK_STATE overrides):
+    state (hook, project, value, updated_at)     value = the hook's JSON state
+
+Usage:
+    python3 scripts/hook_state.py                       # list stored states
+    python3 scripts/hook_state.py --project DIR         # ... of one project
+    python3 scripts/hook_state.py --clear [--project DIR]
+"""
+
+import os
+import sys
+import copy
+import json
+import time
+import sqlite3
+import argparse
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from hook_client import private_dir, runtime_dir
+
+STATE_ENV = "CLAUDE_HOOK_STATE"
+STATE_TTL = 7 * 24 * 60 * 60
+BUSY_TIMEOUT = 10
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    hook TEXT NOT NULL,
+    project TEXT NOT NULL,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (hook, project)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS state_updated_at ON state (updated_at);
+"""
+
+# One connection per database and process (the hook daemon keeps it open)
+_CONNECTIONS: Dict[Path, sqlite3.Connection] = {}
+
+
+def default_path() -> Path:
+    return Path(os.environ.get(STATE_ENV) or os.path.join(runtime_dir(), "state.sqlite"))
+
+
+def connect(path: Optional[Path] = None) -> sqlite3.Connection:
+    """The state database, created on first use.
+
+    Raises PermissionError if the default runtime directory is not private to this user.
+    """
+    path = path or default_path()
+    db = _CONNECTIONS.get(path)
+    if db is None:
+        if path.parent != Path(runtime_dir()):
+            path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        elif not private_dir(str(path.parent), create=True):
+            # Predictable path: another user may have created or linked the directory first
+            raise PermissionError(f"{path.parent} is not a directory owned by this user with mode 0700")
+        # Autocommit mode: transactions are opened explicitly by locked_state()
+        db = sqlite3.connect(str(path), timeout=BUSY_TIMEOUT, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        if db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            db.executescript(SCHEMA)
+            db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        _CONNECTIONS[path] = db
+    return db
+
+
+class StateSlot:
+    """A hook's state for one project while it is locked."""
+
+    def __init__(self, state: dict):
+        self.state = state
+        self.saved = False
+
+    def save(self, state: dict):
+        """Write state when the `with` block ends."""
+        self.state = state
+        self.saved = True
+
+
+def get_state(hook: str, project: str, defaults: dict, path: Optional[Path] = None) -> dict:
+    """A hook's state for a project, read without taking the write lock."""
+    row = connect(path).execute("SELECT value FROM state WHERE hook = ? AND project = ?",
+                                (hook, project)).fetchone()
+    return json.loads(row[0]) if row else copy.deepcopy(defaults)
+
+
+@contextmanager
+def locked_state(hook: str, project: str, defaults: dict,
+                 path: Optional[Path] = None) -> Iterator[StateSlot]:
+    """Atomic read-modify-write of a hook's state for a project.
+
+    The database is write-locked for the duration of the block, so keep
+    slow work (git calls, file scans) outside of it. What was passed to
+    slot.save() is committed when the block ends; nothing is written if
+    save() was not called or the block raised.
+    """
+    db = connect(path)
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        row = db.execute("SELECT value FROM state WHERE hook = ? AND project = ?",
+                         (hook, project)).fetchone()
+        slot = StateSlot(json.loads(row[0]) if row else copy.deepcopy(defaults))
+        yield slot
+        if slot.saved:
+            now = time.time()
+            db.execute("INSERT OR REPLACE INTO state VALUES (?, ?, ?, ?)",
+                       (hook, project, json.dumps(slot.state), now))
+            db.execute("DELETE FROM state WHERE updated_at < ?", (now - STATE_TTL,))
+        db.execute("COMMIT")
+    except BaseException:
+        db.execute("ROLLBACK")
+        raise
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or clear the shared hook state')
+    parser.add_argument('--db', type=Path, default=default_path(),
+                        help='State database (default: $CLAUDE_HOOK_STATE or <runtime dir>/state.sqlite)')
+    parser.add_argument('--project', help='Only this project directory')
+    parser.add_argument('--clear', action='store_true', help='Delete the selected states')
+    args = parser.parse_args()
+
+    if not args.db.exists():
+        print(f"No hook state stored in {args.db}")
+        sys.exit(0)
+    try:
+        db = connect(args.db)
+    except PermissionError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    where, params = ("WHERE project = ?", (args.project,)) if args.project else ("", ())
+    if args.clear:
+        count = db.execute(f"DELETE FROM state {where}", params).rowcount
+        print(f"Cleared {count} state(s)")
+        sys.exit(0)
+    for hook, project, value, updated_at in db.execute(
+            f"SELECT hook, project, value, updated_at FROM state {where} ORDER BY project, hook", params):
+        stamp = datetime.fromtimestamp(updated_at).isoformat(timespec='seconds')
+        print(f"{project}  {hook}  ({stamp})\n    {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -8,54 +8,26 @@ and reminds it to update the session log.
 
 Adapted from: https://gist.github.com/michaelewens/9a1bc5a97f3f9bbb79453e5b682df462
 
-Usage (in .claude/settings.json):
+Usage (in .claude/settings.json; or run in-process by scripts/hook_dispatch.py):
     "Stop": [{ "hooks": [{ "type": "command", "command": "python3 scripts/log-reminder.py" }] }]
 """
 
 import json
 import sys
-import hashlib
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, Tuple
 
 THRESHOLD = 15
-STATE_DIR = Path("/tmp/claude-log-reminder")
+DEFAULT_STATE = {"counter": 0, "last_mtime": 0.0, "reminded": False, "no_log_reminded": False}
 
 
-def get_project_dir():
-    """Get project directory from stdin JSON or environment."""
+def get_hook_input() -> dict:
+    """Get hook input from stdin JSON."""
     try:
-        hook_input = json.load(sys.stdin)
+        return json.load(sys.stdin)
     except (json.JSONDecodeError, EOFError):
-        hook_input = {}
-
-    # If stop_hook_active, Claude is already continuing from a previous
-    # Stop hook block — let it stop this time to avoid infinite loops.
-    if hook_input.get("stop_hook_active", False):
-        sys.exit(0)
-
-    return hook_input.get("cwd", ""), hook_input
-
-
-def get_state_path(project_dir: str) -> Path:
-    """Return a project-keyed state file path."""
-    project_hash = hashlib.md5(project_dir.encode()).hexdigest()[:12]
-    return STATE_DIR / f"{project_hash}.json"
-
-
-def load_state(state_path: Path) -> dict:
-    """Load persisted state, or return defaults."""
-    try:
-        return json.loads(state_path.read_text())
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {"counter": 0, "last_mtime": 0.0, "reminded": False, "no_log_reminded": False}
-
-
-def save_state(state_path: Path, state: dict):
-    """Persist state to disk."""
-    STATE_DIR.mkdir(parents=True, exist_ok=True)
-    state_path.write_text(json.dumps(state))
+        return {}
 
 
 def find_latest_log(project_dir: str) -> Tuple[Optional[Path], float]:
@@ -72,58 +44,71 @@ def find_latest_log(project_dir: str) -> Tuple[Optional[Path], float]:
     return latest, latest.stat().st_mtime
 
 
-def main():
-    project_dir, hook_input = get_project_dir()
-    if not project_dir:
-        sys.exit(0)
+def handle(hook_input: dict) -> Optional[dict]:
+    """Run the hook on a parsed Stop payload; return the response, or None."""
+    # Imported here, not at the top, so a missing helper fails open like any hook error
+    from hook_state import locked_state
 
-    state_path = get_state_path(project_dir)
-    state = load_state(state_path)
+    # If stop_hook_active, Claude is already continuing from a previous
+    # Stop hook block — let it stop this time to avoid infinite loops.
+    if hook_input.get("stop_hook_active", False):
+        return None
+
+    project_dir = hook_input.get("cwd", "")
+    if not project_dir:
+        return None
 
     latest_log, current_mtime = find_latest_log(project_dir)
     today = datetime.now().strftime("%Y-%m-%d")
 
-    # Case 1: No session log exists at all — remind once, then let Claude work
-    if latest_log is None:
-        if not state.get("no_log_reminded", False):
-            state["no_log_reminded"] = True
-            save_state(state_path, state)
-            output = {
+    with locked_state("log-reminder", project_dir, DEFAULT_STATE) as slot:
+        state = slot.state
+
+        # Case 1: No session log exists at all — remind once, then let Claude work
+        if latest_log is None:
+            if not state.get("no_log_reminded", False):
+                state["no_log_reminded"] = True
+                slot.save(state)
+                return {
+                    "decision": "block",
+                    "reason": (
+                        f"No session log exists yet. Create one at "
+                        f"quality_reports/session_logs/{today}_description.md "
+                        f"before continuing. Include the current goal and key context."
+                    ),
+                }
+            # Already reminded — let Claude proceed (it will create the log)
+            return None
+
+        # Case 2: Log was updated since last check — reset everything
+        if current_mtime != state["last_mtime"]:
+            state = {"counter": 0, "last_mtime": current_mtime, "reminded": False, "no_log_reminded": False}
+            slot.save(state)
+            return None
+
+        # Case 3: Log not updated — increment counter
+        state["counter"] += 1
+
+        if state["counter"] >= THRESHOLD and not state["reminded"]:
+            state["reminded"] = True
+            slot.save(state)
+            return {
                 "decision": "block",
                 "reason": (
-                    f"No session log exists yet. Create one at "
-                    f"quality_reports/session_logs/{today}_description.md "
-                    f"before continuing. Include the current goal and key context."
+                    f"SESSION LOG REMINDER: {state['counter']} responses without "
+                    f"updating the session log. Append your recent progress to "
+                    f"{latest_log.name}."
                 ),
             }
-            json.dump(output, sys.stdout)
-        # Already reminded — let Claude proceed (it will create the log)
-        sys.exit(0)
 
-    # Case 2: Log was updated since last check — reset everything
-    if current_mtime != state["last_mtime"]:
-        state = {"counter": 0, "last_mtime": current_mtime, "reminded": False, "no_log_reminded": False}
-        save_state(state_path, state)
-        sys.exit(0)
+        slot.save(state)
+        return None
 
-    # Case 3: Log not updated — increment counter
-    state["counter"] += 1
-
-    if state["counter"] >= THRESHOLD and not state["reminded"]:
-        state["reminded"] = True
-        save_state(state_path, state)
-        output = {
-            "decision": "block",
-            "reason": (
-                f"SESSION LOG REMINDER: {state['counter']} responses without "
-                f"updating the session log. Append your recent progress to "
-                f"{latest_log.name}."
-            ),
-        }
-        json.dump(output, sys.stdout)
-        sys.exit(0)
 
-    save_state(state_path, state)
+def main():
+    output = handle(get_hook_input())
+    if output:
+        json.dump(output, sys.stdout)
     sys.exit(0)
 
 
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+R Review Index — Which Content of Each R Script Has Been Reviewed
+
+Maps each R script (path relative to the project root, / separated; see
+index_key()) to its review report and to the content that review saw:
+
+    quality_reports/r_review_index.json
+    {"R/clean.R": {"reviewed": "<content id>", "report": "quality_reports/clean_r_review.md",
+                   "report_id": "<content id of the report>", "recorded_at": "..."}}
+
+Content ids are git blob ids, so r-review-reminder.py takes them straight
+from `git status` for files whose work tree matches the index and hashes
+only the others. A review is current while the script's content id equals
+the reviewed one. Checkouts and touches do not invalidate it, and scripts
+sharing a file name in different directories get separate entries. Any
+edit after the review makes the entry stale until the script is reviewed
+and recorded again.
+
+Scripts without an entry fall back to the old check (a
+quality_reports/<stem>_r_review.md newer than the script), unless another
+modified script has the same file name stem. The hook only reads the
+index; entries are written by --record once /review-r or the r-reviewer
+agent has written the report (the hook's reminder says so).
+
+Usage:
+    python3 scripts/r_review_index.py                          # list entries (current / stale)
+    python3 scripts/r_review_index.py R/clean.R R/merge.R      # ... of these scripts
+    python3 scripts/r_review_index.py --record R/clean.R [--report quality_reports/clean_r_review.md]
+"""
+
+import os
+import sys
+import json
+import fcntl
+import hashlib
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+INDEX_PATH = Path("quality_reports") / "r_review_index.json"
+
+
+def content_id(path: Path) -> Optional[str]:
+    """git blob id of a file (what `git hash-object` prints without filters); None if unreadable."""
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def index_key(project_dir: str, r_file: str) -> str:
+    """Key of an R script in the index: its path relative to project_dir.
+
+    r_file may be relative to project_dir or absolute. Raises ValueError if
+    it is outside project_dir.
+    """
+    root = os.path.abspath(project_dir)
+    path = os.path.abspath(os.path.join(root, r_file))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"{r_file} is not inside {project_dir}")
+    return Path(os.path.relpath(path, root)).as_posix()
+
+
+def legacy_report(r_file: str) -> str:
+    """Report path the review workflow uses by default."""
+    return str(Path("quality_reports") / f"{Path(r_file).stem}_r_review.md")
+
+
+def load_index(project_dir: str) -> Dict[str, dict]:
+    try:
+        return json.loads((Path(project_dir) / INDEX_PATH).read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def record_reviews(project_dir: str, reviews: Dict[str, Tuple[str, str]]):
+    """Record reviews ({r_file: (reviewed content id, report path)}) in the index."""
+    index_path = Path(project_dir) / INDEX_PATH
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    recorded_at = datetime.now().isoformat(timespec="seconds")
+    # Concurrent --record calls take turns on the read-modify-write
+    with open(index_path.with_name(f".{index_path.name}.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        index = load_index(project_dir)
+        for r_file, (reviewed, report) in reviews.items():
+            index[r_file] = {
+                "reviewed": reviewed,
+                "report": report,
+                "report_id": content_id(Path(project_dir) / report),
+                "recorded_at": recorded_at,
+            }
+        tmp = index_path.with_name(f".{index_path.name}.tmp")
+        tmp.write_text(json.dumps(index, indent=2, sort_keys=True) + "\n")
+        tmp.replace(index_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show or record which content of each R script was reviewed')
+    parser.add_argument('files', nargs='*',
+                        help='R scripts, relative to the project root or absolute (default: all indexed)')
+    parser.add_argument('--project-dir', default='.', help='Project root (default: current directory)')
+    parser.add_argument('--record', action='store_true', help='Record the current content of the files as reviewed')
+    parser.add_argument('--report', help='Review report of the recorded file (default: quality_reports/<stem>_r_review.md)')
+    args = parser.parse_args()
+
+    try:
+        # Same keys as the hook, however the files were given
+        keys = [index_key(args.project_dir, r_file) for r_file in args.files]
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.record:
+        if not keys or (args.report and len(keys) > 1):
+            parser.error('--record needs the reviewed file(s); --report applies to a single file')
+        reviews = {}
+        for r_file in keys:
+            reviewed = content_id(Path(args.project_dir) / r_file)
+            if reviewed is None:
+                print(f"Error: File not found: {r_file}", file=sys.stderr)
+                sys.exit(1)
+            reviews[r_file] = (reviewed, args.report or legacy_report(r_file))
+        record_reviews(args.project_dir, reviews)
+        print(f"Recorded {len(reviews)} review(s) in {INDEX_PATH}")
+        sys.exit(0)
+
+    index = load_index(args.project_dir)
+    for r_file in keys or sorted(index):
+        entry = index.get(r_file)
+        if entry is None:
+            print(f"  not indexed: {r_file}")
+            continue
+        current = content_id(Path(args.project_dir) / r_file) == entry["reviewed"]
+        print(f"  {'current' if current else 'STALE'}: {r_file} -> {entry['report']} ({entry['recorded_at']})")
+
+
+if __name__ == '__main__':
+    main()
@@ -16,17 +16,20 @@ Design:
     emit a warning via stderr (exit 2 = soft block, but we use stderr + exit 0
     so it's truly non-blocking — Claude sees the message but isn't stopped).
 
-State: /tmp/claude-r-mass-production-guard/<project_hash>.json
+State: shared hook state store (scripts/hook_state.py), one entry per project
+
+Usage (in .claude/settings.json; or run in-process by scripts/hook_dispatch.py):
+    "PostToolUse": [{ "matcher": "Write|Edit|Read|Bash",
+                      "hooks": [{ "type": "command", "command": "python3 scripts/r-mass-production-guard.py" }] }]
 """
 
 import json
 import sys
-import hashlib
 import time
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Optional
 
-STATE_DIR = Path("/tmp/claude-r-mass-production-guard")
+DEFAULT_STATE = {"last_r_write": None, "last_r_write_time": 0, "warned_for": None}
 # Data file extensions that count as "Claude examined input"
 DATA_EXTENSIONS = {".csv", ".rds", ".dta", ".xlsx", ".tsv", ".sav", ".parquet", ".xls"}
 
@@ -39,24 +42,6 @@ def get_hook_input() -> dict:
         return {}
 
 
-def get_state_path(project_dir: str) -> Path:
-    """Project-keyed state file."""
-    project_hash = hashlib.md5(project_dir.encode()).hexdigest()[:12]
-    return STATE_DIR / f"{project_hash}.json"
-
-
-def load_state(state_path: Path) -> dict:
-    try:
-        return json.loads(state_path.read_text())
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {"last_r_write": None, "last_r_write_time": 0, "warned_for": None}
-
-
-def save_state(state_path: Path, state: dict):
-    STATE_DIR.mkdir(parents=True, exist_ok=True)
-    state_path.write_text(json.dumps(state))
-
-
 def is_r_file(file_path: str) -> bool:
     """Check if a file path is an R script."""
     return file_path.endswith(".R") or file_path.endswith(".r")
@@ -83,36 +68,38 @@ def get_file_path(hook_input: dict) -> Optional[str]:
     return tool_input.get("file_path", None)
 
 
-def main():
-    hook_input = get_hook_input()
+def handle(hook_input: dict) -> Optional[dict]:
+    """Run the guard on a parsed PostToolUse payload; return the response, or None."""
+    # Imported here, not at the top, so a missing helper fails open like any hook error
+    from hook_state import locked_state
+
     project_dir = hook_input.get("cwd", "")
     if not project_dir:
-        sys.exit(0)
+        return None
 
     tool_name = hook_input.get("tool_name", "")
-    state_path = get_state_path(project_dir)
-    state = load_state(state_path)
-
     file_path = get_file_path(hook_input)
 
-    # --- Event: Claude READ a data file → reset guard ---
-    if tool_name == "Read" and file_path and is_data_file(file_path):
-        state["last_r_write"] = None
-        state["last_r_write_time"] = 0
-        save_state(state_path, state)
-        sys.exit(0)
+    # Claude READ a data file or ran Rscript → reset guard
+    resets_guard = (tool_name == "Read" and file_path and is_data_file(file_path)) or is_rscript_run(hook_input)
+    writes_r_file = tool_name in ("Write", "Edit") and file_path and is_r_file(file_path)
 
-    # --- Event: Claude ran Rscript → reset guard ---
-    if is_rscript_run(hook_input):
-        state["last_r_write"] = None
-        state["last_r_write_time"] = 0
-        save_state(state_path, state)
-        sys.exit(0)
+    # --- Any other tool use: don't touch state ---
+    if not (resets_guard or writes_r_file):
+        return None
+
+    with locked_state("r-mass-production-guard", project_dir, DEFAULT_STATE) as slot:
+        state = slot.state
 
-    # --- Event: Claude WROTE an .R file ---
-    if tool_name in ("Write", "Edit") and file_path and is_r_file(file_path):
+        # --- Event: data read or Rscript run → reset guard ---
+        if resets_guard:
+            state["last_r_write"] = None
+            state["last_r_write_time"] = 0
+            slot.save(state)
+            return None
+
+        # --- Event: Claude WROTE an .R file ---
         previous_r = state.get("last_r_write")
-        previous_time = state.get("last_r_write_time", 0)
         warned_for = state.get("warned_for")
         now = time.time()
 
@@ -126,7 +113,7 @@ def main():
                 state["warned_for"] = warn_key
                 state["last_r_write"] = file_path
                 state["last_r_write_time"] = now
-                save_state(state_path, state)
+                slot.save(state)
 
                 prev_name = Path(previous_r).name
                 curr_name = Path(file_path).name
@@ -140,28 +127,30 @@ def main():
                     f"this script will process, or review the output of the "
                     f"previous script."
                 )
-                output = {
+                return {
                     "hookSpecificOutput": {
                         "hookEventName": "PostToolUse",
                         "additionalContext": warning_msg,
                     }
                 }
-                json.dump(output, sys.stdout)
-                sys.exit(0)
             # Already warned for this pair — don't repeat
             state["last_r_write"] = file_path
             state["last_r_write_time"] = now
-            save_state(state_path, state)
-            sys.exit(0)
+            slot.save(state)
+            return None
 
         # First .R write (or same file re-edited) — just record it
         state["last_r_write"] = file_path
         state["last_r_write_time"] = now
         state["warned_for"] = None
-        save_state(state_path, state)
-        sys.exit(0)
+        slot.save(state)
+        return None
 
-    # --- Any other tool use: don't touch state ---
+
+def main():
+    output = handle(get_hook_input())
+    if output:
+        json.dump(output, sys.stdout)
     sys.exit(0)
 
 
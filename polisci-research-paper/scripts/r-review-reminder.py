@@ -3,22 +3,30 @@
 R-Reviewer Reminder Hook for Claude Code
 
 A Stop hook that checks whether .R files were modified in the current session
-(via git diff). If so, and r-reviewer hasn't been run yet, it blocks Claude
-and reminds it to run the r-reviewer agent before stopping.
+(via git status). If so, and r-reviewer hasn't been run yet, it blocks Claude
+and reminds it to run the r-reviewer agent before stopping. Which content of
+each script was reviewed is looked up in the review index
+(scripts/r_review_index.py).
 
-Usage (in .claude/settings.json):
+The git status of a Stop is reused by further Stops of the same turn
+(see snapshot_key()): Stops with no tool call in between run git once.
+
+Usage (in .claude/settings.json; or run in-process by scripts/hook_dispatch.py):
     "Stop": [{ "hooks": [{ "type": "command", "command": "python3 scripts/r-review-reminder.py" }] }]
 """
 
 import json
 import sys
 import subprocess
-import hashlib
+from collections import Counter
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 
-STATE_DIR = Path("/tmp/claude-r-review-reminder")
+DEFAULT_STATE = {"reminded": False, "reviewed_files": []}
+GIT_TIMEOUT = 10
+# Hook state key of the cached `git status` snapshot
+GIT_STATUS_STATE = "r-review-reminder/git-status"
 
 
 def get_hook_input() -> dict:
@@ -29,124 +37,235 @@ def get_hook_input() -> dict:
         return {}
 
 
-def get_state_path(project_dir: str) -> Path:
-    """Return a project-keyed state file path."""
-    project_hash = hashlib.md5(project_dir.encode()).hexdigest()[:12]
-    return STATE_DIR / f"{project_hash}.json"
+def find_repository(project_dir: str) -> Optional[Tuple[Path, Path]]:
+    """(work tree root, git directory) of the repository containing project_dir (worktrees included)."""
+    for directory in (Path(project_dir).resolve(), *Path(project_dir).resolve().parents):
+        dot_git = directory / ".git"
+        if dot_git.is_dir():
+            return directory, dot_git
+        if dot_git.is_file():
+            text = dot_git.read_text().strip()
+            if not text.startswith("gitdir:"):
+                return None
+            return directory, (directory / text[len("gitdir:"):].strip()).resolve()
+    return None
 
 
-def load_state(state_path: Path) -> dict:
-    """Load persisted state, or return defaults."""
+def file_stamp(path: Path) -> Optional[List[int]]:
     try:
-        return json.loads(state_path.read_text())
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {"reminded": False, "reviewed_files": []}
-
-
-def save_state(state_path: Path, state: dict):
-    """Persist state to disk."""
-    STATE_DIR.mkdir(parents=True, exist_ok=True)
-    state_path.write_text(json.dumps(state))
-
-
-def get_modified_r_files(project_dir: str) -> list:
-    """Find .R files that have been modified (staged + unstaged + untracked)."""
-    r_files = []
+        stat = path.stat()
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def snapshot_key(project_dir: str, session_id: Optional[str],
+                 transcript_path: Optional[str]) -> Optional[list]:
+    """What a cached git status is valid for: the session and turn, HEAD and .git/index.
+
+    HEAD and the index catch commits, checkouts and staging. Work-tree
+    edits and new files touch neither, but every tool call is appended to
+    the transcript, so its (mtime, size) limits a snapshot to the turn it
+    was taken in. None (no caching) without a transcript or a repository.
+    """
+    repository = find_repository(project_dir)
+    if repository is None or not transcript_path:
+        return None
+    git_dir = repository[1]
     try:
-        # Staged and unstaged changes
-        result = subprocess.run(
-            ["git", "diff", "--name-only", "HEAD"],
-            capture_output=True, text=True, cwd=project_dir, timeout=5
-        )
-        if result.returncode == 0:
-            r_files.extend(
-                f for f in result.stdout.strip().split("\n")
-                if f.endswith(".R") and f
-            )
-
-        # Untracked files
+        head = (git_dir / "HEAD").read_text().strip()
+        # Linked worktrees keep their refs in the main repository's git directory
+        common_dir = git_dir
+        if (git_dir / "commondir").is_file():
+            common_dir = git_dir / (git_dir / "commondir").read_text().strip()
+    except OSError:
+        return None
+    key = [session_id, head]
+    if head.startswith("ref:"):
+        key += [file_stamp(common_dir / head[4:].strip()), file_stamp(common_dir / "packed-refs")]
+    return key + [file_stamp(git_dir / "index"), transcript_path, file_stamp(Path(transcript_path))]
+
+
+def parse_porcelain_v2(output: str) -> Dict[str, Optional[str]]:
+    """Paths (relative to the repository root) in `git status --porcelain=v2 -z` output.
+
+    Maps each path to its index blob id when the work tree matches the index,
+    to None otherwise (work tree changes, untracked, conflicted, deleted).
+    """
+    paths = {}
+    fields = iter(output.split("\0"))
+    for entry in fields:
+        if entry.startswith("1 "):
+            _, xy, _, _, _, _, _, index_id, path = entry.split(" ", 8)
+        elif entry.startswith("2 "):
+            _, xy, _, _, _, _, _, index_id, _, path = entry.split(" ", 9)
+            next(fields, None)  # the path it was renamed from
+        elif entry.startswith("u "):
+            xy, index_id, path = "", "", entry.split(" ", 10)[10]
+        elif entry.startswith("? "):
+            xy, index_id, path = "", "", entry[2:]
+        else:
+            continue
+        paths[path] = index_id if xy[1:] == "." and index_id.strip("0") else None
+    return paths
+
+
+def git_status_r_files(project_dir: str) -> Optional[Dict[str, Optional[str]]]:
+    """Staged, unstaged and untracked .R files under project_dir with their content ids, in one `git status` call.
+
+    Paths are relative to project_dir, which may be a subdirectory of the
+    repository (a project shipped inside a larger repo). Content ids come
+    from the index where possible and are hashed otherwise (None for
+    deleted files). None if git failed.
+    """
+    from r_review_index import content_id
+
+    repository = find_repository(project_dir)
+    if repository is None:
+        return None
+    # git reports paths from the repository root; the review index keys them from project_dir
+    prefix = Path(project_dir).resolve().relative_to(repository[0]).as_posix()
+    prefix = "" if prefix == "." else prefix + "/"
+    try:
+        # The untracked cache lets git skip unchanged directories (large raw data trees)
         result = subprocess.run(
-            ["git", "ls-files", "--others", "--exclude-standard"],
-            capture_output=True, text=True, cwd=project_dir, timeout=5
+            ["git", "-c", "core.untrackedCache=true", "status", "--porcelain=v2", "-z",
+             "--untracked-files=all", "--", "*.R"],
+            capture_output=True, text=True, cwd=project_dir, timeout=GIT_TIMEOUT
         )
-        if result.returncode == 0:
-            r_files.extend(
-                f for f in result.stdout.strip().split("\n")
-                if f.endswith(".R") and f
-            )
     except (subprocess.TimeoutExpired, FileNotFoundError):
-        pass
+        return None
+    if result.returncode != 0:
+        return None
+    r_files = {path[len(prefix):]: content for path, content in parse_porcelain_v2(result.stdout).items()
+               if path.startswith(prefix)}
+    for path, content in r_files.items():
+        if content is None:
+            r_files[path] = content_id(Path(project_dir) / path)
+    return r_files
+
+
+def get_modified_r_files(project_dir: str, session_id: Optional[str] = None,
+                         transcript_path: Optional[str] = None) -> Dict[str, Optional[str]]:
+    """Find .R files that have been modified (staged + unstaged + untracked).
+
+    Returns {path: content id}. Reuses the snapshot of an earlier Stop hook
+    while its snapshot_key() holds.
+    """
+    from hook_state import get_state, locked_state
+
+    key = snapshot_key(project_dir, session_id, transcript_path)
+    if key is not None:
+        cached = get_state(GIT_STATUS_STATE, project_dir, {})
+        if cached.get("key") == key:
+            return cached["files"]
+
+    r_files = git_status_r_files(project_dir)
+    if r_files is None:
+        return {}
+    # git status may have refreshed the index, so key on its state afterwards
+    key = snapshot_key(project_dir, session_id, transcript_path)
+    if key is not None:
+        with locked_state(GIT_STATUS_STATE, project_dir, {}) as slot:
+            slot.save({"key": key, "files": r_files})
+    return r_files
 
-    return list(set(r_files))
 
+def check_review_reports(project_dir: str, r_files: Dict[str, Optional[str]]) -> list:
+    """Check which R files do NOT have a review of their current content.
+
+    Only reads the review index; reviews are recorded with r_review_index.py --record.
+    """
+    from r_review_index import legacy_report, load_index
 
-def check_review_reports(project_dir: str, r_files: list) -> list:
-    """Check which R files do NOT have a recent review report."""
     unreviewed = []
-    quality_dir = Path(project_dir) / "quality_reports"
+    index = load_index(project_dir)
+    stems = Counter(Path(r_file).stem for r_file in r_files)
+
+    for r_file, content in r_files.items():
+        entry = index.get(r_file)
+        if entry is not None:
+            # Indexed: a lookup, no file access. A deleted script has nothing left to review
+            if content is not None and content != entry["reviewed"]:
+                unreviewed.append(r_file)
+            continue
 
-    for r_file in r_files:
-        script_name = Path(r_file).stem
-        report = quality_dir / f"{script_name}_r_review.md"
-        if not report.exists():
+        if stems[Path(r_file).stem] > 1:
+            # quality_reports/<stem>_r_review.md could be the review of another of these scripts
             unreviewed.append(r_file)
-        else:
-            # Report exists — check if R file is newer than report
-            r_path = Path(project_dir) / r_file
-            if r_path.exists() and r_path.stat().st_mtime > report.stat().st_mtime:
-                unreviewed.append(r_file)
+            continue
 
+        # Not indexed (reviewed before the index existed): the old report check
+        report_path = Path(project_dir) / legacy_report(r_file)
+        if content is None:
+            reviewed = report_path.exists()
+        else:
+            reviewed = (report_path.exists() and
+                        report_path.stat().st_mtime >= (Path(project_dir) / r_file).stat().st_mtime)
+        if not reviewed:
+            unreviewed.append(r_file)
     return unreviewed
 
 
-def main():
-    hook_input = get_hook_input()
+def handle(hook_input: dict) -> Optional[dict]:
+    """Run the hook on a parsed Stop payload; return the response, or None."""
+    # Helpers are imported in the functions that use them, not at the top, so a
+    # missing one fails open like any hook error
+    from hook_state import locked_state
 
     # If stop_hook_active, Claude is already continuing from a previous
     # Stop hook block — let it stop to avoid infinite loops.
     if hook_input.get("stop_hook_active", False):
-        sys.exit(0)
+        return None
 
     project_dir = hook_input.get("cwd", "")
     if not project_dir:
-        sys.exit(0)
-
-    state_path = get_state_path(project_dir)
-    state = load_state(state_path)
+        return None
 
     # Find modified R files
-    r_files = get_modified_r_files(project_dir)
+    r_files = get_modified_r_files(project_dir, hook_input.get("session_id"),
+                                   hook_input.get("transcript_path"))
     if not r_files:
         # No R files modified — nothing to do
-        sys.exit(0)
+        return None
 
     # Check which ones lack review reports (or have stale reports)
     unreviewed = check_review_reports(project_dir, r_files)
     if not unreviewed:
         # All modified R files have up-to-date reviews
-        sys.exit(0)
+        return None
+
+    with locked_state("r-review-reminder", project_dir, DEFAULT_STATE) as slot:
+        state = slot.state
 
-    # Already reminded once this session — let Claude proceed
-    if state.get("reminded", False):
-        # Check if the files changed since last reminder
-        if set(unreviewed) == set(state.get("unreviewed_files", [])):
-            sys.exit(0)
+        # Already reminded once this session — let Claude proceed
+        if state.get("reminded", False):
+            # Check if the files changed since last reminder
+            if set(unreviewed) == set(state.get("unreviewed_files", [])):
+                return None
 
-    # Block and remind
-    state["reminded"] = True
-    state["unreviewed_files"] = unreviewed
-    save_state(state_path, state)
+        # Block and remind
+        state["reminded"] = True
+        state["unreviewed_files"] = unreviewed
+        slot.save(state)
 
     file_list = ", ".join(unreviewed)
-    output = {
+    return {
         "decision": "block",
         "reason": (
             f"R-REVIEWER REMINDER: {len(unreviewed)} R file(s) were modified "
             f"without review: {file_list}. Run /review-r on these files before "
-            f"finishing, or use the r-reviewer agent directly."
+            f"finishing, or use the r-reviewer agent directly, then record each "
+            f"review with `python3 scripts/r_review_index.py --record <script> "
+            f"--report <report>`."
         ),
     }
-    json.dump(output, sys.stdout)
+
+
+def main():
+    output = handle(get_hook_input())
+    if output:
+        json.dump(output, sys.stdout)
     sys.exit(0)
 
 
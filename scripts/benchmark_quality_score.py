@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Benchmark Harness for quality_score.py
+
+Generates a synthetic course tree (lectures modeled on
+Quarto/Lecture1_Example.qmd, simulation-style R scripts, a large
+bibliography), then runs QualityScorer over it with stub `quarto` and
+`Rscript` executables so it works offline and measures our own code rather
+than Quarto or R. Reports throughput (files/s, lines/s) end to end and per
+check, plus peak Python memory per check (tracemalloc), and appends the
+results to a JSON-lines history file so runs can be compared over time.
+
+Usage:
+    python3 scripts/benchmark_quality_score.py
+    python3 scripts/benchmark_quality_score.py --lectures 24 --lecture-lines 3000
+    python3 scripts/benchmark_quality_score.py --r-scripts 10 --r-lines 20000 --rnorm-calls 2000
+    python3 scripts/benchmark_quality_score.py --bib-entries 50000 --no-history
+
+History: quality_reports/benchmarks/quality_score_history.jsonl (one run per
+line). Each run is compared with the most recent earlier run that used the
+same configuration.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import quality_score as qs
+import render_stage
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+TEMPLATE_LECTURE = REPO_ROOT / 'Quarto' / 'Lecture1_Example.qmd'
+DEFAULT_HISTORY = REPO_ROOT / 'quality_reports' / 'benchmarks' / 'quality_score_history.jsonl'
+
+# ==============================================================================
+# STUB EXECUTABLES (offline stand-ins for quarto and Rscript)
+# ==============================================================================
+
+QUARTO_STUB = '''#!{python}
+# Benchmark stub: "renders" a .qmd to revealjs-like HTML: one <section> per
+# top-level heading, one widget container (+ embedded JSON) per plotly call.
+import sys
+from pathlib import Path
+if sys.argv[1:2] == ['--version']:
+    print('0.0.0-benchmark-stub')
+    sys.exit(0)
+qmd = Path(sys.argv[2])
+out = ['<html><body><section id="title-slide" class="quarto-title-block"></section>']
+fence, depth, slides = False, 0, 0
+for line in qmd.read_text(encoding='utf-8').splitlines():
+    if line.startswith('```'):
+        fence = not fence
+    elif not fence and line.startswith(':::'):
+        depth = depth - 1 if not line.strip(':') else depth + 1
+    elif not fence and not depth and line.startswith(('# ', '## ')):
+        out.append('</section>' if slides else '')
+        slides += 1
+        out.append('<section id="slide-%d" class="slide level2">' % slides)
+    if 'plotly::plot_ly' in line:
+        out.append('<div id="htmlwidget-%d" class="plotly html-widget"></div>' % len(out))
+        out.append('<script type="application/json">{"x": [%s]}</script>' % ','.join(['0.5'] * 2000))
+out.append('</section></body></html>' if slides else '</body></html>')
+qmd.with_suffix('.html').write_text('\\n'.join(out), encoding='utf-8')
+(qmd.parent / (qmd.stem + '_files')).mkdir(exist_ok=True)
+'''
+
+RSCRIPT_STUB = '''#!{python}
+# Benchmark stub: speaks the quality_score.py R parse-server protocol.
+import sys
+if sys.argv[1:2] == ['--version']:
+    print('Rscript (R) version 0.0.0-benchmark-stub', file=sys.stderr)
+    sys.exit(0)
+for line in sys.stdin:
+    print('OK', flush=True)
+'''
+
+
+def install_stubs(bin_dir: Path) -> None:
+    """Write stub executables into bin_dir and put it first on PATH."""
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    for name, template in (('quarto', QUARTO_STUB), ('Rscript', RSCRIPT_STUB)):
+        stub = bin_dir / name
+        stub.write_text(template.replace('{python}', sys.executable), encoding='utf-8')
+        stub.chmod(0o755)
+    os.environ['PATH'] = f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}"
+
+# ==============================================================================
+# SYNTHETIC COURSE GENERATION
+# ==============================================================================
+
+def _bib_key(i: int) -> str:
+    return f'Author{i:05d}_synthetic'
+
+
+def generate_bibliography(path: Path, entries: int) -> None:
+    """Write a bibliography with `entries` article entries."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('% Synthetic benchmark bibliography\n\n')
+        for i in range(entries):
+            f.write(
+                f'@article{{{_bib_key(i)},\n'
+                f'  author  = {{Author, A. and Coauthor, B.}},\n'
+                f'  title   = {{Synthetic Paper Number {i}}},\n'
+                f'  journal = {{Journal of Benchmarks}},\n'
+                f'  year    = {{{1950 + i % 75}}}\n'
+                f'}}\n\n'
+            )
+
+
+def _lecture_slide(rng: random.Random, n: int, bib_entries: int) -> List[str]:
+    """One slide of synthetic lecture content."""
+    a, b = rng.randrange(bib_entries), rng.randrange(bib_entries)
+    lines = [
+        f'## Slide {n}',
+        '',
+        f'- Point drawn from @{_bib_key(a)} and [@{_bib_key(b)}; see also \\citet{{{_bib_key(a)}}}]',
+        '- Second key motivation point with `inline_code()` and @fig-example',
+        '',
+    ]
+    kind = n % 4
+    if kind == 0:
+        lines += ['$$', 'Y_{it} = \\alpha_i + \\beta D_{it} + ' + ' + '.join(
+            f'\\gamma_{k} X_{{k,it}}' for k in range(rng.randrange(2, 12))) + ' + \\varepsilon_{it}', '$$', '']
+    elif kind == 1:
+        lines += ['```{r}', '#| echo: false', 'df <- data.frame(x = rnorm(100), y = rnorm(100))',
+                  'plotly::plot_ly(df, x = ~x, y = ~y, type = "scatter")', '```', '']
+    elif kind == 2:
+        lines += ['::: {.callout-note}', '## Key Term', 'A formal definition goes here.', ':::', '']
+    else:
+        lines += ['$$Y = X\\beta + \\varepsilon$$', '']
+    return lines
+
+
+def generate_lecture(path: Path, target_lines: int, bib_entries: int, rng: random.Random) -> int:
+    """Write a lecture of roughly target_lines lines; return the line count."""
+    template = TEMPLATE_LECTURE.read_text(encoding='utf-8')
+    # Keep the template's front matter, minus the remote CSL
+    front_matter, body = template.split('\n---\n', 1)
+    front_matter = '\n'.join(l for l in front_matter.split('\n') if not l.startswith('csl:'))
+    lines = (front_matter + '\n---\n' + body).split('\n')
+    slide = 0
+    while len(lines) < target_lines:
+        slide += 1
+        lines += _lecture_slide(rng, slide, bib_entries)
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return len(lines)
+
+
+def generate_r_script(path: Path, target_lines: int, rnorm_calls: int, hardcoded_paths: int,
+                      rng: random.Random) -> int:
+    """Write a simulation-style R script; return the line count."""
+    lines = ['# Synthetic simulation script', 'library(data.table)', 'library(fixest)', '']
+    body = []
+    body += [f'sim_{i} <- rnorm({rng.randrange(10, 10000)}, mean = {i}, sd = 1)' for i in range(rnorm_calls)]
+    body += [f'dat_{i} <- fread("/data/raw/input_{i}.csv")' for i in range(hardcoded_paths)]
+    filler = max(0, target_lines - len(lines) - len(body))
+    body += [f'x_{i} <- mean(c({i}, {i + 1}, {i + 2}))  # filler' for i in range(filler)]
+    rng.shuffle(body)
+    lines += body
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return len(lines)
+
+
+def generate_course(root: Path, args: argparse.Namespace) -> Dict[str, List[Path]]:
+    """Build the synthetic tree under root; return files and line counts by kind."""
+    rng = random.Random(args.seed)
+    (root / 'Quarto').mkdir(parents=True)
+    (root / 'scripts' / 'R').mkdir(parents=True)
+    shutil.copy(TEMPLATE_LECTURE.parent / 'emory-clean.scss', root / 'Quarto' / 'emory-clean.scss')
+    generate_bibliography(root / 'Bibliography_base.bib', args.bib_entries)
+
+    course = {'qmd': [], 'R': [], 'lines': {}}
+    for i in range(1, args.lectures + 1):
+        path = root / 'Quarto' / f'Lecture{i:02d}_Synthetic.qmd'
+        course['lines'][path] = generate_lecture(path, args.lecture_lines, args.bib_entries, rng)
+        course['qmd'].append(path)
+    for i in range(1, args.r_scripts + 1):
+        path = root / 'scripts' / 'R' / f'Lecture{i:02d}_simulations.R'
+        course['lines'][path] = generate_r_script(path, args.r_lines, args.rnorm_calls,
+                                                  args.hardcoded_paths, rng)
+        course['R'].append(path)
+    return course
+
+# ==============================================================================
+# MEASUREMENT
+# ==============================================================================
+
+def measure(fn: Callable[[], None]) -> Dict[str, float]:
+    """Run fn once under tracemalloc; return wall seconds and peak bytes."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        fn()
+    finally:
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {'seconds': elapsed, 'peak_bytes': peak}
+
+
+def _throughput(result: Dict[str, float], files: int, lines: int) -> Dict:
+    seconds = max(result['seconds'], 1e-9)
+    return {
+        'files': files,
+        'lines': lines,
+        'seconds': round(result['seconds'], 6),
+        'files_per_s': round(files / seconds, 2),
+        'lines_per_s': round(lines / seconds, 1),
+        'peak_kib': round(result.get('peak_bytes', 0) / 1024, 1),
+    }
+
+
+def bench_end_to_end(course: Dict, build_dir: Path) -> Dict:
+    """Score every file once (no result cache) with --profile timings."""
+    files = course['qmd'] + course['R']
+    reports = []
+
+    def run():
+        for filepath in files:
+            outcome, payload = qs.score_file(filepath, cache_dir=None, build_dir=build_dir, profile=True)
+            if outcome != 'ok':
+                raise RuntimeError(f'{filepath}: {outcome} {payload}')
+            reports.append(payload)
+
+    start = time.perf_counter()
+    run()
+    result = {'seconds': time.perf_counter() - start}
+    summary = _throughput(result, len(files), sum(course['lines'].values()))
+    summary.pop('peak_kib')
+    summary['check_timings'] = qs.aggregate_timings(reports)['checks']
+    return summary
+
+
+def bench_checks(course: Dict, build_dir: Path) -> Dict[str, Dict]:
+    """Time each check in isolation over the files it applies to, with peak memory."""
+    qmds, rs = course['qmd'], course['R']
+    qmd_lines = sum(course['lines'][p] for p in qmds)
+    r_lines = sum(course['lines'][p] for p in rs)
+    bib = qmds[0].parent.parent / 'Bibliography_base.bib' if qmds else None
+
+    def scan(paths, make_visitor):
+        def run():
+            for path in paths:
+                visitor = make_visitor()
+                qs.LineScanner([visitor] if visitor else []).scan_file(path)
+        return run
+
+    checks = {
+        'line_read': (scan(qmds + rs, lambda: None), len(qmds + rs), qmd_lines + r_lines),
+        'equation_scan': (scan(qmds, qs.EquationOverflowVisitor), len(qmds), qmd_lines),
+        'citation_scan': (scan(qmds, lambda: qs.CitationVisitor(markdown=True)), len(qmds), qmd_lines),
+        'plotly_scan': (scan(qmds, lambda: qs.SubstringCountVisitor('plotly::plot_ly')), len(qmds), qmd_lines),
+        'path_scan': (scan(rs, qs.HardcodedPathVisitor), len(rs), r_lines),
+        'random_scan': (scan(rs, lambda: qs.KeywordVisitor(qs.R_SEED_KEYWORDS)), len(rs), r_lines),
+        'r_parse': (lambda: [qs.IssueDetector.check_r_syntax(p) for p in rs], len(rs), r_lines),
+    }
+    if bib is not None:
+        bib_lines = sum(1 for _ in open(bib, encoding='utf-8'))
+        checks['citation_lookup'] = (lambda: qs.BibIndex().keys([bib]), 1, bib_lines)
+        htmls = sorted(build_dir.glob('*/*.html'))
+        checks['plotly_check'] = (lambda: [qs.IssueDetector.check_plotly_widgets(h) for h in htmls],
+                                  len(htmls), 0)
+        checks['compilation'] = (lambda: [render_stage.render(q, build_dir=build_dir, force=True)
+                                          for q in qmds], len(qmds), qmd_lines)
+
+    results = {}
+    for name, (fn, files, lines) in checks.items():
+        if files:
+            results[name] = _throughput(measure(fn), files, lines)
+    return results
+
+# ==============================================================================
+# HISTORY
+# ==============================================================================
+
+def _git_commit() -> str:
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, cwd=REPO_ROOT, timeout=10)
+        return result.stdout.strip() or 'unknown'
+    except (subprocess.TimeoutExpired, FileNotFoundError):
+        return 'unknown'
+
+
+def previous_run(history: Path, config: Dict) -> Dict:
+    """Most recent recorded run with the same configuration, or {}."""
+    if not history.exists():
+        return {}
+    match = {}
+    with open(history, encoding='utf-8') as f:
+        for line in f:
+            try:
+                run = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if run.get('config') == config:
+                match = run
+    return match
+
+
+def print_results(run: Dict, baseline: Dict) -> None:
+    e2e = run['end_to_end']
+    print(f"\n# Quality Score Benchmark ({run['commit']}, {run['timestamp']})\n")
+    print(f"Config: {run['config']}\n")
+    print(f"## End to end: {e2e['files']} files, {e2e['lines']} lines in {e2e['seconds']:.3f}s "
+          f"({e2e['files_per_s']} files/s, {e2e['lines_per_s']:.0f} lines/s)")
+    if baseline:
+        before = baseline['end_to_end']['lines_per_s']
+        change = (e2e['lines_per_s'] - before) / before * 100 if before else 0.0
+        print(f"**vs {baseline['commit']}:** {change:+.1f}% lines/s")
+
+    print("\n## Per check\n")
+    print("| Check | Files | Seconds | Files/s | Lines/s | Peak KiB | vs baseline |")
+    print("|-------|------:|--------:|--------:|--------:|---------:|------------:|")
+    for name, r in sorted(run['checks'].items(), key=lambda item: item[1]['seconds'], reverse=True):
+        delta = ''
+        old = baseline.get('checks', {}).get(name) if baseline else None
+        if old and old['seconds'] > 0:
+            delta = f"{(r['seconds'] - old['seconds']) / old['seconds'] * 100:+.1f}% time"
+        print(f"| {name} | {r['files']} | {r['seconds']:.4f} | {r['files_per_s']} | "
+              f"{r['lines_per_s']:.0f} | {r['peak_kib']} | {delta} |")
+
+# ==============================================================================
+# CLI INTERFACE
+# ==============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark quality_score.py on a synthetic course')
+    parser.add_argument('--lectures', type=int, default=12, help='Number of lectures (default: 12)')
+    parser.add_argument('--lecture-lines', type=int, default=1500, help='Lines per lecture (default: 1500)')
+    parser.add_argument('--r-scripts', type=int, default=20, help='Number of R scripts (default: 20)')
+    parser.add_argument('--r-lines', type=int, default=2000, help='Lines per R script (default: 2000)')
+    parser.add_argument('--rnorm-calls', type=int, default=200, help='rnorm() calls per R script (default: 200)')
+    parser.add_argument('--hardcoded-paths', type=int, default=5,
+                        help='Absolute paths per R script (default: 5)')
+    parser.add_argument('--bib-entries', type=int, default=10000,
+                        help='Bibliography entries (default: 10000)')
+    parser.add_argument('--seed', type=int, default=20240101, help='Generator seed')
+    parser.add_argument('--workdir', type=Path, help='Generate the course here (default: temp dir)')
+    parser.add_argument('--keep', action='store_true', help='Keep the generated course tree')
+    parser.add_argument('--history', type=Path, default=DEFAULT_HISTORY,
+                        help='JSON-lines history file to compare against and append to')
+    parser.add_argument('--no-history', action='store_true', help='Do not read or write history')
+    parser.add_argument('--json', action='store_true', help='Print this run as JSON')
+    args = parser.parse_args()
+
+    config = {k: getattr(args, k) for k in
+              ('lectures', 'lecture_lines', 'r_scripts', 'r_lines', 'rnorm_calls',
+               'hardcoded_paths', 'bib_entries', 'seed')}
+
+    root = args.workdir or Path(tempfile.mkdtemp(prefix='quality-bench-'))
+    try:
+        install_stubs(root / '.bench-bin')
+        course = generate_course(root / 'course', args)
+        build_dir = root / '_build' / 'render'
+
+        run = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'config': config,
+            'end_to_end': bench_end_to_end(course, build_dir),
+            'checks': bench_checks(course, build_dir),
+        }
+    finally:
+        qs.shared_r_parser().close()
+        if not args.keep and args.workdir is None:
+            shutil.rmtree(root, ignore_errors=True)
+
+    baseline = {} if args.no_history else previous_run(args.history, config)
+    if args.json:
+        print(json.dumps(run, indent=2))
+    else:
+        print_results(run, baseline)
+        if args.keep or args.workdir is not None:
+            print(f"\nCourse kept at: {root / 'course'}")
+
+    if not args.no_history:
+        args.history.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(run) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Delta Sync — Hash-Compared File/Tree Copy for docs/ Publishing
+
+Copies files and directory trees into a destination directory, but only
+rewrites files whose content actually differs (size check, then sha256).
+Unchanged files keep their mtime, so a one-slide fix does not rewrite every
+asset tree under docs/. Used by sync_to_docs.sh in place of cp -r / rsync.
+
+Usage:
+    python3 scripts/delta_sync.py SRC [SRC ...] DEST_DIR
+    python3 scripts/delta_sync.py --delete Figures docs
+
+Each SRC file is synced to DEST_DIR/<name>; each SRC directory is mirrored
+to DEST_DIR/<name>/. With --delete, files inside mirrored directories that
+no longer exist in the source are removed.
+"""
+
+import os
+import sys
+import shutil
+import hashlib
+import argparse
+from pathlib import Path
+from typing import Dict
+
+
+def file_digest(path: Path) -> str:
+    """sha256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def same_content(src: Path, dest: Path) -> bool:
+    """True if dest exists with identical bytes to src."""
+    try:
+        if src.stat().st_size != dest.stat().st_size:
+            return False
+    except FileNotFoundError:
+        return False
+    return file_digest(src) == file_digest(dest)
+
+
+def sync_file(src: Path, dest: Path, stats: Dict[str, int], quiet: bool = False) -> None:
+    """Copy src to dest only if the content differs (atomic replace)."""
+    if dest.is_dir():
+        shutil.rmtree(dest)
+    if same_content(src, dest):
+        stats['unchanged'] += 1
+        return
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f'.{dest.name}.{os.getpid()}.tmp')
+    shutil.copy2(src, tmp)
+    os.replace(tmp, dest)
+    stats['updated'] += 1
+    if not quiet:
+        print(f"  Updated {dest}")
+
+
+def sync_tree(src: Path, dest: Path, delete: bool, stats: Dict[str, int], quiet: bool = False) -> None:
+    """Mirror directory src into dest, rewriting only changed files."""
+    if dest.exists() and not dest.is_dir():
+        dest.unlink()
+    for root, dirs, files in os.walk(src):
+        rel = Path(root).relative_to(src)
+        for name in files:
+            sync_file(Path(root) / name, dest / rel / name, stats, quiet)
+
+    if not delete or not dest.is_dir():
+        return
+    for root, dirs, files in os.walk(dest, topdown=False):
+        rel = Path(root).relative_to(dest)
+        for name in files:
+            if not (src / rel / name).is_file():
+                (Path(root) / name).unlink()
+                stats['deleted'] += 1
+                if not quiet:
+                    print(f"  Deleted {Path(root) / name}")
+        for name in dirs:
+            path = Path(root) / name
+            if not (src / rel / name).is_dir() and not any(path.iterdir()):
+                path.rmdir()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Copy files/trees, rewriting only changed content')
+    parser.add_argument('paths', type=Path, nargs='+', help='SRC [SRC ...] DEST_DIR')
+    parser.add_argument('--delete', action='store_true',
+                        help='Remove files in mirrored directories that are gone from the source')
+    parser.add_argument('--quiet', action='store_true', help='Only print the summary line')
+    args = parser.parse_args()
+
+    if len(args.paths) < 2:
+        parser.error('need at least one SRC and a DEST_DIR')
+    *sources, dest_dir = args.paths
+
+    stats = {'updated': 0, 'unchanged': 0, 'deleted': 0}
+    exit_code = 0
+    for src in sources:
+        if src.is_dir():
+            sync_tree(src, dest_dir / src.name, args.delete, stats, args.quiet)
+        elif src.is_file():
+            sync_file(src, dest_dir / src.name, stats, args.quiet)
+        else:
+            print(f"Error: Source not found: {src}", file=sys.stderr)
+            exit_code = 1
+
+    print(f"  {stats['updated']} updated, {stats['unchanged']} unchanged, {stats['deleted']} deleted")
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+LaTeX Stage — Incremental latexmk Builds for Beamer Decks and Manuscripts
+
+Builds each .tex with latexmk into a persistent per-source directory, so
+.aux/.toc/.nav/.bbl and latexmk's own .fdb_latexmk database survive between
+runs. latexmk compares the recorded input hashes and only re-runs XeLaTeX
+(and bibtex/biber) when an input actually changed; re-building an
+unchanged deck is a dependency check, not a compile. The quality scorer
+reads the compiled .log from here for overfull box detection.
+
+Layout:
+    _build/latex/<stem>-<pathhash>/<stem>.pdf
+    _build/latex/<stem>-<pathhash>/<stem>.log
+    _build/latex/<stem>-<pathhash>/<stem>.aux, .toc, .fdb_latexmk, ...
+
+Inputs are found through TEXINPUTS/BIBINPUTS = <source dir>:Preambles/:
+(the same search path as compiling by hand from Slides/).
+
+Usage:
+    python3 scripts/latex_stage.py Slides/Lecture01_Example.tex
+    python3 scripts/latex_stage.py --print-dirs Slides/*.tex
+    python3 scripts/latex_stage.py --jobs 4 Slides/*.tex
+    python3 scripts/latex_stage.py --force Manuscripts/example_paper/main.tex
+
+Exit codes:
+    0 = all files built (or already up to date)
+    1 = at least one build failed
+"""
+
+import os
+import re
+import sys
+import hashlib
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+from resource_policy import ResourcePolicy, run_limited
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BUILD_DIR = REPO_ROOT / '_build' / 'latex'
+PREAMBLES_DIR = REPO_ROOT / 'Preambles'
+LATEX_TIMEOUT = 600
+ENGINE_FLAG = '-xelatex'
+
+# Local inputs of a document: \input, \include, \includegraphics,
+# \bibliography / \addbibresource and \subfile, with optional [...] args
+INPUT_PATTERN = re.compile(
+    r'\\(?:input|include|subfile|includegraphics|bibliography|addbibresource)'
+    r'\s*(?:\[[^\]]*\])?\s*\{([^}]+)\}'
+)
+INPUT_EXTENSIONS = ('', '.tex', '.bib', '.pdf', '.png', '.jpg', '.jpeg', '.eps', '.sty')
+
+# With -file-line-error, errors look like "./deck.tex:45: Undefined control sequence."
+FILE_LINE_ERROR_PATTERN = re.compile(r'^(.+?):(\d+): (.+)$')
+OVERFULL_PATTERN = re.compile(
+    r'^Overfull \\([hv])box \(([\d.]+)pt too (?:wide|high)\)'
+    r'(?:.*?lines? (\d+)(?:--(\d+))?)?'
+)
+
+
+class LatexResult(NamedTuple):
+    ok: bool
+    error: str
+    build_dir: Optional[Path]
+    log: Optional[Path]     # engine log of the last run that did work
+    rebuilt: bool
+    limit: str = ''         # 'timeout'/'oom' if the build was stopped by its resource policy, 'killed' from outside
+
+
+class OverfullBox(NamedTuple):
+    kind: str               # 'hbox' (too wide) or 'vbox' (too high)
+    points: float
+    line: Optional[int]     # source line reported by TeX, if any
+    end_line: Optional[int]
+
+
+@lru_cache(maxsize=None)
+def latexmk_version() -> str:
+    """Return `latexmk --version`, or 'missing' if latexmk is not installed."""
+    try:
+        result = subprocess.run(['latexmk', '--version'], capture_output=True, text=True, timeout=30)
+        return result.stdout.strip()
+    except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
+        return 'missing'
+
+
+def search_path(tex: Path) -> List[Path]:
+    """Directories TeX searches for inputs of tex (TEXINPUTS order)."""
+    return [tex.resolve().parent, PREAMBLES_DIR]
+
+
+def _resolve_input(name: str, dirs: List[Path]) -> Optional[Path]:
+    for directory in dirs:
+        for ext in INPUT_EXTENSIONS:
+            candidate = directory / f'{name}{ext}'
+            if candidate.is_file():
+                return candidate.resolve()
+    return None
+
+
+def local_dependencies(tex: Path) -> List[Path]:
+    """Existing local files a document inputs, following nested .tex inputs."""
+    dirs = search_path(tex)
+    seen = {tex.resolve()}
+    pending = [tex]
+    deps = []
+    while pending:
+        source = pending.pop()
+        try:
+            text = source.read_text(encoding='utf-8')
+        except (OSError, UnicodeDecodeError):
+            continue
+        for match in INPUT_PATTERN.finditer(text):
+            for name in match.group(1).split(','):
+                candidate = _resolve_input(name.strip(), dirs)
+                if candidate is None or candidate in seen:
+                    continue
+                seen.add(candidate)
+                deps.append(candidate)
+                if candidate.suffix == '.tex':
+                    pending.append(candidate)
+    return sorted(deps)
+
+
+def build_dir_for(tex: Path, build_dir: Path = DEFAULT_BUILD_DIR) -> Path:
+    """Persistent build directory of a source path (independent of its content)."""
+    path_hash = hashlib.sha256(str(tex.resolve()).encode()).hexdigest()[:12]
+    return build_dir / f'{tex.stem}-{path_hash}'
+
+
+def _latex_env(tex: Path) -> dict:
+    env = dict(os.environ)
+    search = os.pathsep.join(str(d) for d in search_path(tex)) + os.pathsep
+    env['TEXINPUTS'] = search + env.get('TEXINPUTS', '')
+    env['BIBINPUTS'] = search + env.get('BIBINPUTS', '')
+    return env
+
+
+def first_error(log: Optional[Path], fallback: str) -> str:
+    """The first TeX error in a log with a little context, else fallback."""
+    if log is None or not log.exists():
+        return fallback
+    with open(log, encoding='utf-8', errors='replace') as f:
+        lines = f.read().splitlines()
+    for i, line in enumerate(lines):
+        if line.startswith('! ') or FILE_LINE_ERROR_PATTERN.match(line):
+            return '\n'.join(lines[i:i + 3])
+    return fallback
+
+
+def build(tex: Path, build_dir: Path = DEFAULT_BUILD_DIR, force: bool = False,
+          timeout: int = LATEX_TIMEOUT, policy: Optional[ResourcePolicy] = None) -> LatexResult:
+    """Bring the build of tex up to date with latexmk (-g re-runs unconditionally if force).
+
+    policy caps the whole latexmk process tree (default: wall time timeout).
+    """
+    policy = policy or ResourcePolicy(wall=timeout)
+    out_dir = build_dir_for(tex, build_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    log = out_dir / f'{tex.stem}.log'
+    before = log.stat().st_mtime_ns if log.exists() else None
+
+    cmd = ['latexmk', ENGINE_FLAG, '-interaction=nonstopmode', '-halt-on-error',
+           '-file-line-error', f'-outdir={out_dir}']
+    if force:
+        cmd.append('-g')
+    cmd.append(tex.name)
+    try:
+        result = run_limited(cmd, policy, cwd=tex.parent, env=_latex_env(tex))
+    except FileNotFoundError:
+        return LatexResult(False, 'latexmk not installed', None, None, False)
+    if result.limit:
+        return LatexResult(False, f'Compilation stopped: {result.detail}', None, None, False, result.limit)
+
+    rebuilt = log.exists() and log.stat().st_mtime_ns != before
+    log_path = log if log.exists() else None
+    if result.returncode != 0:
+        error = first_error(log_path, (result.stderr or result.stdout).strip()[-2000:])
+        return LatexResult(False, error, out_dir, log_path, rebuilt)
+    return LatexResult(True, '', out_dir, log_path, rebuilt)
+
+
+def overfull_boxes(log: Path) -> List[OverfullBox]:
+    """Overfull \\hbox/\\vbox warnings from a TeX log, streamed line by line."""
+    boxes = []
+    with open(log, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if not line.startswith('Overfull'):
+                continue
+            match = OVERFULL_PATTERN.match(line)
+            if match:
+                boxes.append(OverfullBox(
+                    kind=f'{match.group(1)}box',
+                    points=float(match.group(2)),
+                    line=int(match.group(3)) if match.group(3) else None,
+                    end_line=int(match.group(4)) if match.group(4) else None,
+                ))
+    return boxes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Incrementally build LaTeX/Beamer files with latexmk')
+    parser.add_argument('filepaths', type=Path, nargs='+', help='.tex file(s) to build')
+    parser.add_argument('--build-dir', type=Path, default=DEFAULT_BUILD_DIR,
+                        help=f'Build directory (default: {DEFAULT_BUILD_DIR.relative_to(REPO_ROOT)})')
+    parser.add_argument('--force', action='store_true', help='Re-run the engine even if up to date')
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help='Build up to N documents in parallel (default: 1)')
+    parser.add_argument('--print-dirs', action='store_true',
+                        help='Print only the build directory of each successful build (for scripts)')
+    args = parser.parse_args()
+
+    def build_one(tex: Path) -> Optional[LatexResult]:
+        if not tex.exists():
+            return None
+        return build(tex, build_dir=args.build_dir, force=args.force)
+
+    # Each document builds in its own latexmk process, so threads suffice
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        results = list(pool.map(build_one, args.filepaths))
+
+    exit_code = 0
+    for tex, result in zip(args.filepaths, results):
+        if result is None:
+            print(f"Error: File not found: {tex}", file=sys.stderr)
+            exit_code = 1
+            continue
+
+        if not result.ok:
+            print(f"Warning: Failed to build {tex}: {result.error.strip()[:500]}", file=sys.stderr)
+            exit_code = 1
+            continue
+
+        if args.print_dirs:
+            print(result.build_dir)
+        else:
+            state = 'rebuilt' if result.rebuilt else 'up to date'
+            print(f"  {tex.name}: {state} -> {result.build_dir}")
+
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
@@ -10,15 +10,48 @@ Usage:
     python scripts/quality_score.py Quarto/Lecture6_Topic.qmd --summary
     python scripts/quality_score.py Quarto/*.qmd
     python scripts/quality_score.py scripts/R/Lecture06_simulations.R
+    python scripts/quality_score.py Slides/Lecture01_Example.tex
+    python scripts/quality_score.py Quarto/*.qmd --jobs 4
+    python scripts/quality_score.py --changed-since origin/main
+    python scripts/quality_score.py --watch Quarto/ scripts/R/ --json
+    python scripts/quality_score.py --report
 """
 
 import sys
 import argparse
+import io
+import os
 import subprocess
+import traceback
+import hashlib
+import time
+import atexit
+import bisect
+import ctypes
+import select
+import struct
+import queue
+import threading
+import multiprocessing
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 import re
 import json
+import sqlite3
+
+from render_stage import (DEFAULT_BUILD_DIR, RENDER_TIMEOUT, RenderResult, local_dependencies as quarto_dependencies,
+                          render as render_quarto, render_batch)
+from latex_stage import (LATEX_TIMEOUT, LatexResult, OverfullBox, build as build_latex, latexmk_version,
+                         local_dependencies as latex_dependencies, overfull_boxes)
+from resource_cache import URL_PATTERN, cached_file, load_manifest, resolve as resolve_resources
+from resource_policy import (SAMPLE_INTERVAL, ResourcePolicy, apply_limit_specs, exceeded,
+                             kill_tree, tree_usage)
+from score_history import (DEFAULT_HISTORY, HistoryEntry, ScoreHistory, git_revision, history_entry,
+                           is_regression, render_dashboard, report_prefixes)
 
 # ==============================================================================
 # SCORING RUBRIC (from .claude/rules/quality-gates.md)
@@ -69,6 +102,1066 @@ THRESHOLDS = {
     'excellence': 95
 }
 
+# Calls that make an R script depend on the RNG (missing_set_seed)
+RANDOM_FUNCTIONS = ['rnorm', 'runif', 'sample', 'rbinom', 'rnbinom']
+
+# Default cap on simultaneous `quarto render` processes in --jobs mode.
+# Each render holds a Deno + knitr/R process tree, so this bounds memory
+# independently of how many files are scored in parallel.
+DEFAULT_MAX_RENDERS = 2
+
+# Per-check resource policy for checker subprocesses (override with --limit).
+# A check that exceeds its policy has its process tree killed and is marked
+# 'timeout'/'oom' in the report ('killed' if SIGKILLed from outside); the
+# file is INCOMPLETE, not auto-failed.
+R_SYNTAX_TIMEOUT = 10
+DEFAULT_LIMITS = {
+    'render': ResourcePolicy(wall=RENDER_TIMEOUT),
+    'latex': ResourcePolicy(wall=LATEX_TIMEOUT),
+    'r_parse': ResourcePolicy(wall=R_SYNTAX_TIMEOUT),
+}
+
+BEAMER_RUBRIC = {
+    'critical': {
+        'compilation_failure': {'points': 100, 'auto_fail': True},
+        'broken_citation': {'points': 15},
+        'typo_in_equation': {'points': 10},
+    },
+    'major': {
+        'overfull_hbox': {'points': 5},
+        'text_overflow': {'points': 5},
+        'tikz_label_overlap': {'points': 5},
+        'notation_inconsistency': {'points': 3},
+    },
+    'minor': {
+        'font_size_reduction': {'points': 1},
+        'missing_framing_sentence': {'points': 1},
+    }
+}
+
+# Overfull boxes up to this many points are invisible on a slide
+OVERFULL_TOLERANCE_PT = 1.0
+
+# Result cache location and size budget (least recently used entries are
+# evicted first once either limit is exceeded).
+DEFAULT_CACHE_DIR = Path('.quality_cache')
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+CACHE_MAX_ENTRIES = 5000
+
+# ==============================================================================
+# RENDER SLOTS (shared across worker processes in --jobs mode)
+# ==============================================================================
+
+_RENDER_SLOTS = None
+
+
+def _init_worker(render_slots) -> None:
+    """Process-pool initializer: install the shared render semaphore."""
+    global _RENDER_SLOTS
+    _RENDER_SLOTS = render_slots
+
+
+@contextmanager
+def render_slot():
+    """Hold one render slot for the duration of a render (no-op when serial)."""
+    if _RENDER_SLOTS is None:
+        yield
+        return
+    _RENDER_SLOTS.acquire()
+    try:
+        yield
+    finally:
+        _RENDER_SLOTS.release()
+
+# ==============================================================================
+# PROJECT LAYOUT
+# ==============================================================================
+
+def bibliography_for(filepath: Path) -> Path:
+    """Shared bibliography for a lecture (Quarto/X.qmd -> Bibliography_base.bib)."""
+    return filepath.parent.parent / 'Bibliography_base.bib'
+
+
+FRONT_MATTER_PATTERN = re.compile(r'\A---\s*\n(.*?)\n---\s*(?:\n|\Z)', re.DOTALL)
+
+
+def read_front_matter(filepath: Path) -> str:
+    """Read only the leading `---` YAML block of a document ('' if none)."""
+    lines = []
+    with open(filepath, encoding='utf-8') as f:
+        for lineno, line in enumerate(f, 1):
+            lines.append(line)
+            if lineno == 1 and line.strip() != '---':
+                return ''
+            if lineno > 1 and line.strip() == '---':
+                return ''.join(lines)
+    return ''
+
+
+def bibliographies_for(filepath: Path, content: str) -> List[Path]:
+    """Bibliography files a document declares, falling back to the shared one.
+
+    Reads `bibliography:` from Quarto front matter (a single path, a
+    `[a.bib, b.bib]` flow list or a `- a.bib` block list), resolved
+    relative to the document. `content` may be the whole document or just
+    its front matter (see read_front_matter). A URL resolves to its vendored
+    copy (scripts/resource_cache.py) once fetched.
+    """
+    front_matter = FRONT_MATTER_PATTERN.match(content)
+    declared = []
+    if front_matter:
+        lines = front_matter.group(1).split('\n')
+        for i, line in enumerate(lines):
+            if not line.startswith('bibliography:'):
+                continue
+            value = line.split(':', 1)[1].strip()
+            if value.startswith('['):
+                declared = [v.strip().strip('"\'') for v in value.strip('[]').split(',')]
+            elif value:
+                declared = [value.strip('"\'')]
+            else:
+                for item in lines[i + 1:]:
+                    if not item.strip().startswith('- '):
+                        break
+                    declared.append(item.strip()[2:].strip().strip('"\''))
+            break
+
+    declared = [d for d in declared if d]
+    if not declared:
+        return [bibliography_for(filepath)]
+    paths = []
+    for d in declared:
+        local = cached_file(d, load_manifest()) if URL_PATTERN.match(d) else None
+        paths.append(local if local is not None else filepath.parent / d)
+    return paths
+
+
+# \bibliography{a,b} (BibTeX) and \addbibresource[opts]{a.bib} (biblatex)
+LATEX_BIBLIOGRAPHY_PATTERN = re.compile(
+    r'^[^%\n]*\\(?:bibliography|addbibresource)\s*(?:\[[^\]]*\])?\{([^}]+)\}', re.MULTILINE
+)
+LATEX_DOCUMENT_PATTERN = re.compile(r'^\s*\\documentclass\b', re.MULTILINE)
+# From an unescaped % to end of line
+LATEX_COMMENT_PATTERN = re.compile(r'(?<!\\)%.*$')
+
+
+def latex_bibliographies_for(filepath: Path, content: str) -> List[Path]:
+    """Bibliography files a LaTeX document declares, falling back to the shared one.
+
+    Names are resolved relative to the document; BibTeX names without an
+    extension get `.bib`.
+    """
+    declared = []
+    for match in LATEX_BIBLIOGRAPHY_PATTERN.finditer(content):
+        for name in match.group(1).split(','):
+            name = name.strip()
+            if name:
+                declared.append(name if name.endswith('.bib') else f'{name}.bib')
+    if not declared:
+        return [bibliography_for(filepath)]
+    return [filepath.parent / d for d in declared]
+
+
+def is_latex_document(filepath: Path, head_lines: int = 200) -> bool:
+    """True if a .tex file is a standalone document (not an \\input fragment)."""
+    lines = []
+    with open(filepath, encoding='utf-8', errors='replace') as f:
+        for lineno, line in enumerate(f, 1):
+            lines.append(line)
+            if lineno >= head_lines:
+                break
+    return LATEX_DOCUMENT_PATTERN.search(''.join(lines)) is not None
+
+
+# natbib/biblatex commands: \cite, \citep, \citet, \citeauthor, \citeyear,
+# \Citet, \parencite, \textcite, starred forms and [pre][post] notes
+CITE_PATTERN = re.compile(
+    r'\\(?:[Cc]ite|[Pp]arencite|[Tt]extcite|[Aa]utocite|[Ff]ootcite|nocite)[a-z]*\*?'
+    r'(?:\[[^\]]*\]){0,2}\{([^}]+)\}'
+)
+# Pandoc/Quarto: @key, [@a; @b], -@key, @{key}; not emails or \@ macros
+PANDOC_CITE_PATTERN = re.compile(
+    r'(?<![\w@\\.])@(?:\{([^}\s]+)\}|(\w(?:[\w:.#$%&+?<>~/-]*\w)?))'
+)
+# Quarto cross-reference prefixes share the @ syntax but are not citations
+CROSSREF_PREFIXES = (
+    'fig-', 'tbl-', 'lst-', 'eq-', 'sec-', 'thm-', 'lem-', 'cor-', 'prp-', 'cnj-',
+    'def-', 'exm-', 'exr-', 'sol-', 'rem-', 'tip-', 'nte-', 'wrn-', 'imp-', 'cau-',
+)
+INLINE_CODE_PATTERN = re.compile(r'`[^`]*`')
+# An unterminated cite command at end of line, carried into the next line
+OPEN_CITE_PATTERN = re.compile(
+    r'\\(?:[Cc]ite|[Pp]arencite|[Tt]extcite|[Aa]utocite|[Ff]ootcite|nocite)[a-z]*\*?'
+    r'(?:\[[^\]]*\]){0,2}\{[^}]*$'
+)
+BIB_ENTRY_PATTERN = re.compile(r'@\w+\{([^,]+),')
+BIB_ENTRY_BYTES_PATTERN = re.compile(rb'@\w+\{([^,]+),')
+
+
+def parse_bib_entries(bib_content: str) -> Dict[str, str]:
+    """Map each bibliography key to the raw text of its entry."""
+    matches = list(BIB_ENTRY_PATTERN.finditer(bib_content))
+    entries = {}
+    for match, following in zip(matches, matches[1:] + [None]):
+        end = following.start() if following else len(bib_content)
+        entries[match.group(1).strip()] = bib_content[match.start():end].strip()
+    return entries
+
+# ==============================================================================
+# BIBLIOGRAPHY INDEX (parsed once per run, persisted with mtime invalidation)
+# ==============================================================================
+
+class BibIndex:
+    """Citation keys and entry byte offsets for any number of .bib files.
+
+    Each file is parsed at most once per process and re-parsed only when
+    its (mtime, size) stamp changes. With an index_path, parsed offsets are
+    persisted between runs so an unchanged bibliography is never re-read.
+    """
+
+    def __init__(self, index_path: Optional[Path] = None):
+        self.index_path = index_path
+        self._files: Dict[str, Dict] = {}
+        self._dirty = False
+        if index_path is not None:
+            try:
+                self._files = json.loads(index_path.read_text(encoding='utf-8'))
+            except (FileNotFoundError, json.JSONDecodeError, OSError):
+                self._files = {}
+
+    def _entries(self, bib_file: Path) -> Dict[str, List[int]]:
+        """Return {key: [start, end]} for one file, parsing only if stale."""
+        try:
+            stat = bib_file.stat()
+        except OSError:
+            return {}
+        name = str(bib_file.resolve())
+        stamp = [stat.st_mtime_ns, stat.st_size]
+        cached = self._files.get(name)
+        if cached is not None and cached['stamp'] == stamp:
+            return cached['entries']
+
+        data = bib_file.read_bytes()
+        matches = list(BIB_ENTRY_BYTES_PATTERN.finditer(data))
+        entries = {}
+        for match, following in zip(matches, matches[1:] + [None]):
+            end = following.start() if following else len(data)
+            key = match.group(1).decode('utf-8', errors='replace').strip()
+            entries[key] = [match.start(), end]
+
+        self._files[name] = {'stamp': stamp, 'entries': entries}
+        self._dirty = True
+        return entries
+
+    def keys(self, bib_files: List[Path]) -> set:
+        """Union of citation keys defined across bib_files."""
+        keys = set()
+        for bib_file in bib_files:
+            keys.update(self._entries(bib_file))
+        return keys
+
+    def entry(self, key: str, bib_files: List[Path]) -> Optional[str]:
+        """Raw text of the entry for key (first file that defines it)."""
+        for bib_file in bib_files:
+            span = self._entries(bib_file).get(key)
+            if span is not None:
+                with open(bib_file, 'rb') as f:
+                    f.seek(span[0])
+                    return f.read(span[1] - span[0]).decode('utf-8', errors='replace').strip()
+        return None
+
+    def save(self) -> None:
+        """Persist newly parsed files (atomic replace; no-op if nothing changed)."""
+        if self.index_path is None or not self._dirty:
+            return
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.index_path.with_suffix(f'.{os.getpid()}.tmp')
+            tmp.write_text(json.dumps(self._files), encoding='utf-8')
+            os.replace(tmp, self.index_path)
+            self._dirty = False
+        except OSError:
+            pass
+
+
+_BIB_INDEXES: Dict[Optional[Path], BibIndex] = {}
+
+
+def shared_bib_index(cache_dir: Optional[Path] = None) -> BibIndex:
+    """Per-process BibIndex, persisted under cache_dir when one is given."""
+    if cache_dir not in _BIB_INDEXES:
+        index_path = cache_dir / 'bib_index.json' if cache_dir is not None else None
+        _BIB_INDEXES[cache_dir] = BibIndex(index_path)
+    return _BIB_INDEXES[cache_dir]
+
+# ==============================================================================
+# RESULT CACHE (content-addressed, persistent across runs)
+# ==============================================================================
+
+def file_digest(filepath: Path) -> str:
+    """sha256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def tool_version(tool: str) -> str:
+    """Return `<tool> --version` output, or 'missing' if not installed."""
+    try:
+        result = subprocess.run([tool, '--version'], capture_output=True, text=True, timeout=30)
+        return (result.stdout + result.stderr).strip()
+    except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
+        return 'missing'
+
+
+@lru_cache(maxsize=None)
+def _scorer_fingerprint() -> str:
+    """Hash of the rubrics, thresholds and this script's own source."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([QUARTO_RUBRIC, R_SCRIPT_RUBRIC, BEAMER_RUBRIC, THRESHOLDS],
+                             sort_keys=True).encode())
+    digest.update(Path(__file__).read_bytes())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """On-disk cache of report dicts keyed by everything a score depends on.
+
+    The key hashes the file content, the rubric definitions (and scorer
+    source), the tool version used to check the file and, for Quarto
+    lectures and LaTeX documents, the bibliography contents and every
+    local input (includes, project files and themes for Quarto; \\input
+    files, figures and preambles for LaTeX).
+    Entries are one JSON file each, written atomically so concurrent
+    --jobs workers can share the directory. Hits refresh the entry mtime;
+    evict() removes least recently used entries beyond the size budget.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int = CACHE_MAX_BYTES,
+                 max_entries: int = CACHE_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+    def key_for(self, filepath: Path) -> str:
+        """Compute the cache key for a file in its current state."""
+        digest = hashlib.sha256()
+        digest.update(_scorer_fingerprint().encode())
+        digest.update(filepath.suffix.encode())
+        digest.update(file_digest(filepath).encode())
+
+        if filepath.suffix == '.qmd':
+            digest.update(tool_version('quarto').encode())
+            # Includes, _quarto.yml/_metadata.yml and the themes they name
+            for dep in quarto_dependencies(filepath):
+                digest.update(str(dep).encode())
+                digest.update(file_digest(dep).encode())
+            for bib_file in bibliographies_for(filepath, read_front_matter(filepath)):
+                digest.update(bib_file.read_bytes() if bib_file.exists() else b'<no-bib>')
+            resources = resolve_resources(filepath)
+            for local in resources.files:
+                digest.update(file_digest(local).encode())
+            digest.update('\n'.join(resources.misses).encode())
+        elif filepath.suffix == '.R':
+            digest.update(tool_version('Rscript').encode())
+        elif filepath.suffix == '.tex':
+            digest.update(latexmk_version().encode())
+            for dep in latex_dependencies(filepath):
+                digest.update(str(dep).encode())
+                digest.update(file_digest(dep).encode())
+            content = filepath.read_text(encoding='utf-8', errors='replace')
+            for bib_file in latex_bibliographies_for(filepath, content):
+                digest.update(bib_file.read_bytes() if bib_file.exists() else b'<no-bib>')
+
+        return digest.hexdigest()
+
+    def slide_key_for(self, slide_text: str, markdown: bool) -> str:
+        """Cache key for the line-level findings of one slide's source text."""
+        digest = hashlib.sha256(b'slide\0')
+        digest.update(_scorer_fingerprint().encode())
+        digest.update(b'md' if markdown else b'tex')
+        digest.update(slide_text.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f'{key}.json'
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached report for key, or None on a miss."""
+        entry = self._entry_path(key)
+        try:
+            report = json.loads(entry.read_text(encoding='utf-8'))
+        except (FileNotFoundError, json.JSONDecodeError, OSError):
+            return None
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return report
+
+    def put(self, key: str, report: Dict) -> None:
+        """Store a report. Auto-fail and incomplete reports are not cached (may be transient)."""
+        if report.get('auto_fail') or report.get('incomplete'):
+            return
+        report = {k: v for k, v in report.items() if k != 'timings'}
+        entry = self._entry_path(key)
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            tmp = entry.with_suffix(f'.{os.getpid()}.tmp')
+            tmp.write_text(json.dumps(report), encoding='utf-8')
+            os.replace(tmp, entry)
+        except OSError:
+            pass
+
+    def evict(self) -> int:
+        """Drop least recently used entries beyond the budget; return count removed."""
+        if not self.cache_dir.is_dir():
+            return 0
+        entries = []
+        for entry in self.cache_dir.glob('*/*.json'):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+
+        entries.sort(reverse=True)
+        total_bytes = 0
+        removed = 0
+        for count, (_, size, entry) in enumerate(entries, 1):
+            total_bytes += size
+            if count > self.max_entries or total_bytes > self.max_bytes:
+                try:
+                    entry.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+# ==============================================================================
+# PATTERN ENGINE (compiled once at import, shared by every detector)
+# ==============================================================================
+
+class KeywordSet:
+    """A fixed set of literal keywords matched together against a line.
+
+    find() reports every keyword occurring in the line, overlapping ones
+    included. Small sets use one C-level substring test per keyword; larger
+    sets first run a single precompiled alternation, so a line with no
+    keyword costs one regex search however many keywords there are (a
+    regex alternation only overtakes `in` past a handful of literals).
+    """
+
+    INLINE_LIMIT = 6
+
+    def __init__(self, keywords):
+        self.keywords: Tuple[str, ...] = tuple(dict.fromkeys(keywords))
+        self.prefilter: Optional[Callable[[str], Optional[re.Match]]] = None
+        if len(self.keywords) > self.INLINE_LIMIT:
+            longest_first = sorted(self.keywords, key=len, reverse=True)
+            self.prefilter = re.compile('|'.join(map(re.escape, longest_first))).search
+
+    def find(self, line: str, keywords: Optional[Tuple[str, ...]] = None) -> List[str]:
+        """Keywords (restricted to a subset if given) that occur in line."""
+        if self.prefilter is not None and self.prefilter(line) is None:
+            return []
+        return [k for k in (self.keywords if keywords is None else keywords) if k in line]
+
+
+# Quoted absolute POSIX/Windows path, and the exemptions for it
+ABSOLUTE_PATH_PATTERN = re.compile(r'["\'](?:[/\\]|[A-Za-z]:[/\\])')
+PATH_EXEMPT_PATTERN = re.compile(r'http:|https:|file://|/tmp/')
+
+# RNG calls and the seed that makes them reproducible, matched in one pass
+R_SEED_KEYWORDS = KeywordSet(RANDOM_FUNCTIONS + ['set.seed'])
+
+# ==============================================================================
+# LINE SCANNER (one streaming pass per file, shared by all line-level checks)
+# ==============================================================================
+
+class LineVisitor(ABC):
+    """A check that runs inside a LineScanner pass.
+
+    Subclasses implement visit() for each line (1-based lineno, no trailing
+    newline) and may implement finish() to flush state at end of file. New
+    line-level rubric checks are added as visitors, not as extra passes.
+    `name` labels the visitor in --profile timings.
+    """
+
+    name = 'line_check'
+
+    @abstractmethod
+    def visit(self, lineno: int, line: str) -> None:
+        """Inspect one line."""
+
+    def finish(self) -> None:
+        pass
+
+
+class LineScanner:
+    """Stream a file (or string) once, feeding every line to every visitor.
+
+    With a `record(name, wall, cpu)` callback, time spent in each visitor
+    is measured separately and reported under the visitor's name, and the
+    remainder of the pass (reading and splitting lines) as 'line_read'.
+    """
+
+    def __init__(self, visitors: List[LineVisitor],
+                 record: Optional[Callable[[str, float, float], None]] = None):
+        self.visitors = list(visitors)
+        self.record = record
+
+    def _run(self, lines) -> None:
+        if self.record is not None:
+            self._run_timed(lines)
+            return
+        visit = [v.visit for v in self.visitors]
+        for lineno, line in enumerate(lines, 1):
+            line = line.rstrip('\r\n')
+            for fn in visit:
+                fn(lineno, line)
+        for visitor in self.visitors:
+            visitor.finish()
+
+    def _run_timed(self, lines) -> None:
+        wall_clock, cpu_clock = time.perf_counter, time.process_time
+        spent = [[0.0, 0.0] for _ in self.visitors]
+        visit = [v.visit for v in self.visitors]
+        wall_start, cpu_start = wall_clock(), cpu_clock()
+        for lineno, line in enumerate(lines, 1):
+            line = line.rstrip('\r\n')
+            for fn, acc in zip(visit, spent):
+                w, c = wall_clock(), cpu_clock()
+                fn(lineno, line)
+                acc[0] += wall_clock() - w
+                acc[1] += cpu_clock() - c
+        for visitor, acc in zip(self.visitors, spent):
+            w, c = wall_clock(), cpu_clock()
+            visitor.finish()
+            self.record(visitor.name, acc[0] + wall_clock() - w, acc[1] + cpu_clock() - c)
+        self.record('line_read',
+                    max(0.0, wall_clock() - wall_start - sum(a[0] for a in spent)),
+                    max(0.0, cpu_clock() - cpu_start - sum(a[1] for a in spent)))
+
+    def scan_file(self, filepath: Path) -> None:
+        with open(filepath, encoding='utf-8') as f:
+            self._run(f)
+
+    def scan_text(self, content: str) -> None:
+        self._run(io.StringIO(content))
+
+
+class EquationOverflowVisitor(LineVisitor):
+    """Displayed ($$) equations longer than 100 chars; records the opening line."""
+
+    name = 'equation_scan'
+    MAX_CHARS = 100
+
+    def __init__(self):
+        self.overflows: List[int] = []
+        self._start = 0
+        self._length = 0
+
+    def visit(self, lineno: int, line: str) -> None:
+        delimiters = line.count('$$')
+        if not self._start:
+            if delimiters >= 2:
+                # Self-contained $$ ... $$ on one line
+                if len(line) > self.MAX_CHARS:
+                    self.overflows.append(lineno)
+            elif delimiters == 1:
+                self._start = lineno
+                self._length = len(line)
+        else:
+            self._length += 1 + len(line)
+            if delimiters:
+                if self._length > self.MAX_CHARS:
+                    self.overflows.append(self._start)
+                self._start = 0
+
+
+class CitationVisitor(LineVisitor):
+    """Collect citation keys (LaTeX cite commands; Pandoc @key with markdown=True).
+
+    In markdown mode YAML front matter, fenced code and inline code are
+    skipped, as are Quarto cross-references; otherwise LaTeX % comments
+    are. A cite command left open at the end of a line is continued on the
+    next one.
+    """
+
+    name = 'citation_scan'
+
+    def __init__(self, markdown: bool = False):
+        self.markdown = markdown
+        self.keys: set = set()
+        self.first_line: Dict[str, int] = {}
+        self._front_matter = False
+        self._fence = None
+        self._carry = ''
+
+    def _add(self, key: str, lineno: int) -> None:
+        if key and key != '*':
+            self.keys.add(key)
+            self.first_line.setdefault(key, lineno)
+
+    def visit(self, lineno: int, line: str) -> None:
+        if self.markdown:
+            stripped = line.strip()
+            if lineno == 1 and stripped == '---':
+                self._front_matter = True
+                return
+            if self._front_matter:
+                if stripped in ('---', '...'):
+                    self._front_matter = False
+                return
+            if self._fence:
+                if stripped.startswith(self._fence):
+                    self._fence = None
+                return
+            if stripped.startswith(('```', '~~~')):
+                self._fence = stripped[:3]
+                return
+            line = INLINE_CODE_PATTERN.sub('', line)
+        elif '%' in line:
+            line = LATEX_COMMENT_PATTERN.sub('', line)
+
+        text = self._carry + line
+        for match in CITE_PATTERN.finditer(text):
+            for key in match.group(1).split(','):
+                self._add(key.strip(), lineno)
+        open_cite = OPEN_CITE_PATTERN.search(text)
+        self._carry = open_cite.group(0)[-500:] if open_cite else ''
+
+        if self.markdown:
+            for match in PANDOC_CITE_PATTERN.finditer(line):
+                key = match.group(1) or match.group(2)
+                if not key.startswith(CROSSREF_PREFIXES):
+                    self._add(key, lineno)
+
+
+class HardcodedPathVisitor(LineVisitor):
+    """Lines with quoted absolute paths (excluding URLs and /tmp/)."""
+
+    name = 'path_scan'
+
+    def __init__(self):
+        self.lines: List[int] = []
+
+    def visit(self, lineno: int, line: str) -> None:
+        # Most lines have no quote at all; skip the regexes for them
+        if '"' not in line and "'" not in line:
+            return
+        if ABSOLUTE_PATH_PATTERN.search(line) and not PATH_EXEMPT_PATTERN.search(line):
+            self.lines.append(lineno)
+
+
+class KeywordVisitor(LineVisitor):
+    """First line on which each keyword of a KeywordSet occurs.
+
+    Keywords drop out of the match once found, so the visitor costs nothing
+    after every keyword has been seen.
+    """
+
+    def __init__(self, keywords, name: str = 'keyword_scan'):
+        self.name = name
+        self.keywords = keywords if isinstance(keywords, KeywordSet) else KeywordSet(keywords)
+        self.found: Dict[str, int] = {}
+        self._pending = self.keywords.keywords
+
+    def visit(self, lineno: int, line: str) -> None:
+        # Hot path: a cheap miss test before building any match list
+        if self.keywords.prefilter is not None:
+            if not self._pending or self.keywords.prefilter(line) is None:
+                return
+        else:
+            for keyword in self._pending:
+                if keyword in line:
+                    break
+            else:
+                return
+        for keyword in self.keywords.find(line, self._pending):
+            self.found[keyword] = lineno
+        self._pending = tuple(k for k in self._pending if k not in self.found)
+
+
+class SubstringCountVisitor(LineVisitor):
+    """Total occurrences of a substring."""
+
+    def __init__(self, needle: str, name: str = 'substring_scan'):
+        self.name = name
+        self.needle = needle
+        self.count = 0
+
+    def visit(self, lineno: int, line: str) -> None:
+        self.count += line.count(self.needle)
+
+
+class LatexBibliographyVisitor(LineVisitor):
+    """Lines that may declare a bibliography, for latex_bibliographies_for()."""
+
+    name = 'bibliography_scan'
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def visit(self, lineno: int, line: str) -> None:
+        if '\\bibliography' in line or '\\addbibresource' in line:
+            self.lines.append(line)
+
+
+def extract_cited_keys(content: str, markdown: bool = False) -> set:
+    """Return the set of citation keys referenced in a source file."""
+    visitor = CitationVisitor(markdown=markdown)
+    LineScanner([visitor]).scan_text(content)
+    return visitor.keys
+
+# ==============================================================================
+# SLIDES (per-slide split, hashing and cached line-level findings)
+# ==============================================================================
+
+# Quarto slide boundaries: `#` section and `##` slide headings
+SLIDE_HEADING_PATTERN = re.compile(r'^#{1,2}\s+(.*?)\s*(?:\{[^}]*\})?\s*$')
+FRAME_BEGIN_PATTERN = re.compile(r'^\s*\\begin\{frame\}(?:<[^>]*>)?(?:\[[^\]]*\])?(?:\{([^}]*)\})?')
+FRAMETITLE_PATTERN = re.compile(r'\\frametitle\{([^}]*)\}')
+
+
+class Slide(NamedTuple):
+    number: int         # 0 = everything before the first slide (front matter, preamble)
+    title: str
+    start_line: int     # 1-based line of the slide's first line in the file
+    text: str
+
+    def line(self, relative: int) -> int:
+        """File line of a 1-based line number within the slide."""
+        return self.start_line + relative - 1
+
+    @property
+    def label(self) -> str:
+        return f'slide {self.number}: {self.title}' if self.title else f'slide {self.number}'
+
+
+class SlideSplitter(LineVisitor):
+    """Cut a Quarto (## headings) or Beamer (\\begin{frame}) source into slides during a scan.
+
+    Headings inside YAML front matter, fenced code (R `## comments`) and
+    ::: fenced divs (callouts, columns) do not start slides, matching
+    Pandoc. Each slide is handed to on_slide as soon as the next one
+    starts, so only the slide being read is held in memory.
+    """
+
+    name = 'slide_split'
+
+    def __init__(self, markdown: bool, on_slide: Callable[[Slide], None]):
+        self.markdown = markdown
+        self.on_slide = on_slide
+        self._lines: List[str] = []
+        self._start = 1
+        self._title: Optional[str] = None   # None marks the chunk before any slide
+        self._number = 0
+        self._emitted = False
+        self._front_matter = False
+        self._fence: Optional[str] = None
+        self._div_depth = 0
+
+    def _slide_title(self, lineno: int, line: str) -> Optional[str]:
+        """Title of the slide line starts, or None if it does not start one."""
+        if not self.markdown:
+            match = FRAME_BEGIN_PATTERN.match(line) if '\\begin{frame}' in line else None
+            return (match.group(1) or '').strip() if match else None
+        stripped = line.strip()
+        if lineno == 1 and stripped == '---':
+            self._front_matter = True
+            return None
+        if self._front_matter:
+            if stripped in ('---', '...'):
+                self._front_matter = False
+            return None
+        if self._fence:
+            if stripped.startswith(self._fence):
+                self._fence = None
+            return None
+        if stripped.startswith(('```', '~~~')):
+            self._fence = stripped[:3]
+            return None
+        if stripped.startswith(':::'):
+            # Fenced div: a bare run of colons closes, anything else opens
+            self._div_depth = max(0, self._div_depth - 1) if not stripped.strip(':') else self._div_depth + 1
+            return None
+        match = SLIDE_HEADING_PATTERN.match(line) if not self._div_depth else None
+        return (match.group(1) or '').strip() if match else None
+
+    def _emit(self) -> None:
+        text = ''.join(line + '\n' for line in self._lines)
+        title = self._title
+        if title == '' and not self.markdown:
+            frametitle = FRAMETITLE_PATTERN.search(text)
+            title = frametitle.group(1).strip() if frametitle else ''
+        number = 0 if self._title is None else self._number
+        self._emitted = True
+        self.on_slide(Slide(number, title or '', self._start, text))
+
+    def visit(self, lineno: int, line: str) -> None:
+        title = self._slide_title(lineno, line)
+        if title is not None:
+            if self._lines:
+                self._emit()
+            self._lines = []
+            self._start, self._title = lineno, title
+            self._number += 1
+        self._lines.append(line)
+
+    def finish(self) -> None:
+        if self._lines or not self._emitted:
+            self._emit()
+
+
+def slide_for_line(slides: List[Slide], line: int) -> Optional[Slide]:
+    """The slide containing a 1-based file line."""
+    index = bisect.bisect_right([s.start_line for s in slides], line) - 1
+    return slides[index] if index >= 0 else None
+
+
+def scan_slide(text: str, markdown: bool, record=None) -> Dict:
+    """Line-level findings of one slide, with slide-relative line numbers.
+
+    Returns {'overflows': [line], 'citations': {key: first line},
+    'plotly': count}; JSON-serialisable so it can be cached by slide hash.
+    """
+    citations = CitationVisitor(markdown=markdown)
+    visitors: List[LineVisitor] = [citations]
+    if markdown:
+        equations = EquationOverflowVisitor()
+        plotly_calls = SubstringCountVisitor('plotly::plot_ly', name='plotly_scan')
+        visitors += [equations, plotly_calls]
+    LineScanner(visitors, record=record).scan_text(text)
+    return {
+        'overflows': equations.overflows if markdown else [],
+        'citations': citations.first_line,
+        'plotly': plotly_calls.count if markdown else 0,
+    }
+
+# ==============================================================================
+# R PARSE SERVER (one warm Rscript per process instead of one per file)
+# ==============================================================================
+
+# Reads one absolute path per line on stdin and answers one line per path:
+#   OK
+#   ERR<TAB>line<TAB>column<TAB>message
+# Paths arrive as data, never spliced into R code.
+R_PARSE_SERVER = r"""
+con <- file("stdin", open = "r")
+while (length(path <- readLines(con, n = 1L, warn = FALSE)) > 0L) {
+  res <- tryCatch({
+    invisible(parse(file = path, keep.source = FALSE))
+    "OK"
+  }, error = function(e) {
+    msg <- conditionMessage(e)
+    pos <- regmatches(msg, regexec(":([0-9]+):([0-9]+):", msg))[[1]]
+    line <- if (length(pos) == 3L) pos[2] else "NA"
+    col <- if (length(pos) == 3L) pos[3] else "NA"
+    paste("ERR", line, col, gsub("[\t\r\n]+", " ", msg), sep = "\t")
+  })
+  cat(res, "\n", sep = "")
+  flush(stdout())
+}
+"""
+
+class RParseResult(NamedTuple):
+    ok: bool
+    message: str
+    line: Optional[int] = None
+    column: Optional[int] = None
+    limit: str = ''     # 'timeout' or 'oom' if the request was stopped by its resource policy
+
+
+class RParseServer:
+    """A long-lived `Rscript` that parses files on request.
+
+    Started lazily on first use and reused for every R file scored by this
+    process, so R interpreter startup is paid once per run. A request that
+    exceeds its policy (wall time, or CPU time and memory of the server
+    tree) kills the server; the next request starts a new one.
+    """
+
+    def __init__(self, policy: ResourcePolicy = DEFAULT_LIMITS['r_parse']):
+        self.policy = policy
+        self._proc = None
+        self._lines: Optional[queue.Queue] = None
+        self._lock = threading.Lock()
+
+    def _start(self) -> None:
+        self._proc = subprocess.Popen(
+            ['Rscript', '--vanilla', '-e', R_PARSE_SERVER],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding='utf-8',
+            bufsize=1,
+            start_new_session=True
+        )
+        self._lines = queue.Queue()
+        threading.Thread(target=self._pump, args=(self._proc.stdout, self._lines), daemon=True).start()
+
+    @staticmethod
+    def _pump(stream, lines: queue.Queue) -> None:
+        for line in stream:
+            lines.put(line.rstrip('\n'))
+        lines.put(None)
+
+    def close(self) -> None:
+        if self._proc is None:
+            return
+        try:
+            self._proc.stdin.close()
+            self._proc.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            self._proc.kill()
+        self._proc = None
+
+    def _await_reply(self, policy: ResourcePolicy):
+        """Next reply line, or (limit, detail) once the request exceeds policy."""
+        watch_tree = policy.cpu is not None or policy.rss is not None
+        cpu_start = tree_usage(self._proc.pid)[0] if policy.cpu is not None else 0.0
+        started = time.monotonic()
+        while True:
+            try:
+                return self._lines.get(timeout=SAMPLE_INTERVAL), None
+            except queue.Empty:
+                pass
+            cpu, rss, pids = tree_usage(self._proc.pid) if watch_tree else (0.0, 0.0, set())
+            limit = exceeded(policy, time.monotonic() - started, cpu - cpu_start, rss)
+            if limit[0]:
+                kill_tree(self._proc, pids)
+                return None, limit
+
+    def parse(self, filepath: Path, policy: Optional[ResourcePolicy] = None) -> RParseResult:
+        """Parse one R file and return a structured result."""
+        path = str(filepath.resolve())
+        if '\n' in path:
+            return RParseResult(False, 'Unsupported newline in file path')
+
+        with self._lock:
+            try:
+                if self._proc is None or self._proc.poll() is not None:
+                    self._start()
+                self._proc.stdin.write(path + '\n')
+                self._proc.stdin.flush()
+                reply, limit = self._await_reply(policy or self.policy)
+            except FileNotFoundError:
+                return RParseResult(False, 'Rscript not installed')
+            except OSError as e:
+                self._proc = None
+                return RParseResult(False, f'R parse server failed: {e}')
+
+            if limit is not None:
+                self._proc = None
+                return RParseResult(False, f'Syntax check stopped: {limit[1]}', limit=limit[0])
+            if reply is None:
+                self._proc = None
+                return RParseResult(False, 'R parse server exited unexpectedly')
+
+        if reply == 'OK':
+            return RParseResult(True, '')
+        _, line, column, message = (reply.split('\t', 3) + ['', '', ''])[:4]
+        return RParseResult(
+            False,
+            message,
+            int(line) if line.isdigit() else None,
+            int(column) if column.isdigit() else None,
+        )
+
+
+_R_PARSER: Optional[RParseServer] = None
+
+
+def shared_r_parser() -> RParseServer:
+    """Per-process RParseServer, shut down at interpreter exit."""
+    global _R_PARSER
+    if _R_PARSER is None:
+        _R_PARSER = RParseServer()
+        atexit.register(_R_PARSER.close)
+    return _R_PARSER
+
+# ==============================================================================
+# HTML WIDGET SCAN (streamed in fixed-size chunks; constant memory)
+# ==============================================================================
+
+# Start/end tags that matter: slide sections, widget containers, and the
+# script/style blocks whose (possibly huge) bodies are skipped unread
+HTML_TAG_PATTERN = re.compile(rb'<(/?)(section|div|script|style)\b([^>]*)>', re.IGNORECASE)
+HTML_CLASS_PATTERN = re.compile(rb'''\bclass\s*=\s*["']([^"']*)["']''', re.IGNORECASE)
+HTML_ID_PATTERN = re.compile(rb'''\bid\s*=\s*["']([^"']*)["']''', re.IGNORECASE)
+HTML_CLOSE_PATTERNS = {
+    b'script': re.compile(rb'</script\s*>', re.IGNORECASE),
+    b'style': re.compile(rb'</style\s*>', re.IGNORECASE),
+}
+HTML_CHUNK_BYTES = 1 << 20
+# A tag still open at a chunk boundary is carried over up to this size
+HTML_MAX_TAG_BYTES = 1 << 16
+
+
+class SlideWidgets(NamedTuple):
+    slide_id: str       # '' for content before the first slide (title slide)
+    widgets: int
+
+
+def plotly_widgets_per_slide(html_file: Path) -> List[SlideWidgets]:
+    """Count plotly widget containers in each revealjs slide of a rendered deck.
+
+    A widget is a <div> whose class has both `plotly` and `html-widget`;
+    a slide starts at each <section> whose class has `slide`. Text inside
+    <script>/<style> (the embedded plotly JSON, CSS rules naming
+    .html-widget) is skipped, so only real containers are counted. The
+    file is read in 1 MiB chunks, so memory stays constant however large
+    a self-contained deck gets. Element 0 covers everything before the
+    first slide.
+    """
+    slides = [['', 0]]
+    skip_to = None
+    carry = b''
+    with open(html_file, 'rb') as f:
+        while True:
+            chunk = f.read(HTML_CHUNK_BYTES)
+            buf = carry + chunk
+            pos = 0
+            while True:
+                if skip_to is not None:
+                    end = skip_to.search(buf, pos)
+                    if end is None:
+                        # Keep just enough to match a closing tag split across chunks
+                        pos = max(pos, len(buf) - 16)
+                        break
+                    skip_to = None
+                    pos = end.end()
+                    continue
+                tag = HTML_TAG_PATTERN.search(buf, pos)
+                if tag is None:
+                    start = buf.rfind(b'<', pos)
+                    pos = start if start >= 0 and len(buf) - start < HTML_MAX_TAG_BYTES else len(buf)
+                    break
+                pos = tag.end()
+                closing, name, attrs = tag.group(1), tag.group(2).lower(), tag.group(3)
+                if closing:
+                    continue
+                if name in HTML_CLOSE_PATTERNS:
+                    skip_to = HTML_CLOSE_PATTERNS[name]
+                    continue
+                classes = HTML_CLASS_PATTERN.search(attrs)
+                classes = classes.group(1).split() if classes else []
+                if name == b'section' and b'slide' in classes:
+                    slide_id = HTML_ID_PATTERN.search(attrs)
+                    slides.append([slide_id.group(1).decode('utf-8', 'replace') if slide_id else '', 0])
+                elif name == b'div' and b'html-widget' in classes and b'plotly' in classes:
+                    slides[-1][1] += 1
+            carry = buf[pos:]
+            if not chunk:
+                break
+    return [SlideWidgets(slide_id, widgets) for slide_id, widgets in slides]
+
 # ==============================================================================
 # ISSUE DETECTION (Lightweight checks - full agents run separately)
 # ==============================================================================
@@ -77,70 +1170,59 @@ class IssueDetector:
     """Detect common issues for quality scoring."""
 
     @staticmethod
-    def check_quarto_compilation(filepath: Path) -> Tuple[bool, str]:
-        """Check if Quarto file compiles successfully."""
-        try:
-            result = subprocess.run(
-                ['quarto', 'render', str(filepath), '--to', 'html'],
-                capture_output=True,
-                text=True,
-                timeout=120,
-                cwd=filepath.parent
-            )
-            if result.returncode != 0:
-                return False, result.stderr
-            return True, ""
-        except subprocess.TimeoutExpired:
-            return False, "Compilation timeout (>2min)"
-        except FileNotFoundError:
-            return False, "Quarto not installed"
+    def check_quarto_compilation(filepath: Path, build_dir: Path = DEFAULT_BUILD_DIR, force: bool = False,
+                                 prerendered: Optional[RenderResult] = None,
+                                 policy: ResourcePolicy = DEFAULT_LIMITS['render']) -> RenderResult:
+        """Check if Quarto file compiles; the result points at the rendered HTML on success.
+
+        Renders through the shared render stage, so an artifact already
+        built for this exact source (by a previous run, a --batch-render
+        pass or sync_to_docs.sh) is reused instead of re-rendered.
+        """
+        if prerendered is not None:
+            return prerendered
+        with render_slot():
+            return render_quarto(filepath, build_dir=build_dir, force=force, policy=policy)
 
     @staticmethod
-    def check_equation_overflow(content: str) -> List[int]:
-        """Detect displayed equations that might overflow (crude heuristic)."""
-        overflows = []
-        lines = content.split('\n')
-        in_equation = False
-        equation_start = 0
-
-        for i, line in enumerate(lines, 1):
-            if '$$' in line and not in_equation:
-                in_equation = True
-                equation_start = i
-            elif '$$' in line and in_equation:
-                in_equation = False
-                math_content = '\n'.join(lines[equation_start-1:i])
-                if len(math_content) > 100:
-                    overflows.append(equation_start)
-
-        return overflows
+    def check_latex_compilation(filepath: Path,
+                                policy: ResourcePolicy = DEFAULT_LIMITS['latex']) -> LatexResult:
+        """Bring the incremental latexmk build of a .tex document up to date.
 
-    @staticmethod
-    def check_broken_citations(content: str, bib_file: Path) -> List[str]:
-        """Check for citation keys not in bibliography."""
-        cite_pattern = r'\\citep?\{([^}]+)\}'
-        cited_keys = set()
-        for match in re.finditer(cite_pattern, content):
-            keys = match.group(1).split(',')
-            cited_keys.update(k.strip() for k in keys)
+        The build directory persists across runs, so latexmk only re-runs
+        the engine when an input changed.
+        """
+        with render_slot():
+            return build_latex(filepath, policy=policy)
 
-        if not bib_file.exists():
-            return list(cited_keys)
+    @staticmethod
+    def check_overfull_boxes(log_file: Optional[Path],
+                             tolerance: float = OVERFULL_TOLERANCE_PT) -> List[OverfullBox]:
+        """Overfull boxes in a LaTeX log beyond a tolerance (in points)."""
+        if log_file is None or not log_file.exists():
+            return []
+        return [box for box in overfull_boxes(log_file) if box.points > tolerance]
 
-        bib_content = bib_file.read_text(encoding='utf-8')
-        bib_keys = set(re.findall(r'@\w+\{([^,]+),', bib_content))
+    @staticmethod
+    def check_equation_overflow(content: str) -> List[int]:
+        """Detect displayed equations that might overflow (crude heuristic)."""
+        visitor = EquationOverflowVisitor()
+        LineScanner([visitor]).scan_text(content)
+        return visitor.overflows
 
-        broken = cited_keys - bib_keys
-        return list(broken)
+    @staticmethod
+    def check_broken_citations(cited_keys: set, bib_files: List[Path], bib_index: BibIndex) -> List[str]:
+        """Check for citation keys not in any of the bibliographies."""
+        broken = set(cited_keys) - bib_index.keys(bib_files)
+        return sorted(broken)
 
     @staticmethod
     def check_plotly_widgets(html_file: Path, expected: int = None) -> Tuple[int, bool]:
-        """Check if plotly charts rendered in HTML."""
+        """Check if plotly charts rendered in HTML (streamed; constant memory)."""
         if not html_file.exists():
             return 0, False
 
-        html_content = html_file.read_text(encoding='utf-8')
-        actual_count = html_content.count('htmlwidget')
+        actual_count = sum(s.widgets for s in plotly_widgets_per_slide(html_file))
 
         if expected is None:
             return actual_count, True
@@ -148,35 +1230,17 @@ class IssueDetector:
         return actual_count, (actual_count >= expected)
 
     @staticmethod
-    def check_r_syntax(filepath: Path) -> Tuple[bool, str]:
-        """Check R script for syntax errors."""
-        try:
-            result = subprocess.run(
-                ['Rscript', '-e', f'parse("{filepath}")'],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            if result.returncode != 0:
-                return False, result.stderr
-            return True, ""
-        except subprocess.TimeoutExpired:
-            return False, "Syntax check timeout"
-        except FileNotFoundError:
-            return False, "Rscript not installed"
+    def check_r_syntax(filepath: Path,
+                       policy: ResourcePolicy = DEFAULT_LIMITS['r_parse']) -> RParseResult:
+        """Check R script for syntax errors (via the shared R parse server)."""
+        return shared_r_parser().parse(filepath, policy)
 
     @staticmethod
     def check_hardcoded_paths(content: str) -> List[int]:
         """Detect absolute paths in R scripts."""
-        issues = []
-        lines = content.split('\n')
-
-        for i, line in enumerate(lines, 1):
-            if re.search(r'["\'][/\\]|["\'][A-Za-z]:[/\\]', line):
-                if not re.search(r'http:|https:|file://|/tmp/', line):
-                    issues.append(i)
-
-        return issues
+        visitor = HardcodedPathVisitor()
+        LineScanner([visitor]).scan_text(content)
+        return visitor.lines
 
 # ==============================================================================
 # QUALITY SCORER
@@ -185,9 +1249,19 @@ class IssueDetector:
 class QualityScorer:
     """Calculate quality scores for course materials."""
 
-    def __init__(self, filepath: Path, verbose: bool = False):
+    def __init__(self, filepath: Path, verbose: bool = False, bib_index: Optional[BibIndex] = None,
+                 build_dir: Path = DEFAULT_BUILD_DIR, force_render: bool = False,
+                 prerendered: Optional[RenderResult] = None, profile: bool = False,
+                 slide_cache: Optional[ResultCache] = None,
+                 limits: Optional[Dict[str, ResourcePolicy]] = None):
         self.filepath = filepath
         self.verbose = verbose
+        self.bib_index = bib_index if bib_index is not None else shared_bib_index()
+        self.build_dir = build_dir
+        self.force_render = force_render
+        self.prerendered = prerendered
+        self.slide_cache = slide_cache
+        self.limits = limits if limits is not None else DEFAULT_LIMITS
         self.score = 100
         self.issues = {
             'critical': [],
@@ -195,85 +1269,284 @@ class QualityScorer:
             'minor': []
         }
         self.auto_fail = False
+        # check -> {'status': 'timeout'|'oom', 'detail'} for checks stopped by their resource policy
+        self.incomplete: Dict[str, Dict[str, str]] = {}
+        # check -> reason for checks skipped because their tool is not installed
+        self.skipped: Dict[str, str] = {}
+        # Remote resources the render had to fetch (not vendored)
+        self.resource_misses: List[str] = []
+        # check -> {'calls', 'wall', 'cpu', 'subprocess'}; None unless profiling
+        self.timings: Optional[Dict[str, Dict]] = {} if profile else None
+
+    def _record(self, check: str, wall: float, cpu: float, subprocess_bound: bool = False,
+                calls: int = 1) -> None:
+        """Accumulate one timing sample for a check."""
+        entry = self.timings.setdefault(
+            check, {'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'subprocess': subprocess_bound})
+        entry['calls'] += calls
+        entry['wall'] += wall
+        entry['cpu'] += cpu
+
+    @contextmanager
+    def _timed(self, check: str, subprocess_bound: bool = False):
+        """Time a block as one call of check (no-op unless profiling).
+
+        Subprocess-bound checks (render, R parse) spend their wall time
+        waiting on a child; cpu only covers this Python process.
+        """
+        if self.timings is None:
+            yield
+            return
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self._record(check, time.perf_counter() - wall_start,
+                         time.process_time() - cpu_start, subprocess_bound)
+
+    def _mark_incomplete(self, check: str, limit: str, detail: str) -> None:
+        """Record a check that hit its resource limit; the other checks still run."""
+        self.incomplete[check] = {'status': limit, 'detail': detail[:200]}
+
+    def _scanner(self, visitors: List[LineVisitor]) -> LineScanner:
+        return LineScanner(visitors, record=self._record if self.timings is not None else None)
+
+    def _slide_findings(self, markdown: bool,
+                        visitors: Tuple[LineVisitor, ...] = ()) -> List[Tuple[Slide, Dict]]:
+        """Cut the source into slides and collect line-level findings per slide.
+
+        One streamed pass over the file; extra visitors run in the same
+        pass. Findings are cached by slide content, so after a one-slide
+        edit only that slide is scanned again; the rest come from the cache.
+        """
+        record = self._record if self.timings is not None else None
+        results = []
+        nested = [0.0, 0.0]     # time of the per-slide work below, recorded under its own checks
+
+        def on_slide(slide: Slide) -> None:
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            findings = key = None
+            if self.slide_cache is not None:
+                with self._timed('slide_cache'):
+                    key = self.slide_cache.slide_key_for(slide.text, markdown)
+                    findings = self.slide_cache.get(key)
+            if findings is None:
+                findings = scan_slide(slide.text, markdown, record)
+                if key is not None:
+                    self.slide_cache.put(key, findings)
+            results.append((slide, findings))
+            nested[0] += time.perf_counter() - wall_start
+            nested[1] += time.process_time() - cpu_start
+
+        self._scanner([SlideSplitter(markdown, on_slide), *visitors]).scan_file(self.filepath)
+        if self.timings is not None:
+            # The pass timed on_slide as part of slide_split; keep only the splitting there
+            self._record(SlideSplitter.name, -nested[0], -nested[1], calls=0)
+        return results
+
+    def _citation_lines(self, slides: List[Tuple[Slide, Dict]]) -> Dict[str, Tuple[int, Slide]]:
+        """First (file line, slide) of every cited key."""
+        first: Dict[str, Tuple[int, Slide]] = {}
+        for slide, findings in slides:
+            for key, relative in findings['citations'].items():
+                first.setdefault(key, (slide.line(relative), slide))
+        return first
 
     def score_quarto(self) -> Dict:
         """Score Quarto lecture slides."""
-        content = self.filepath.read_text(encoding='utf-8')
-
         # Check compilation
-        compiles, error = IssueDetector.check_quarto_compilation(self.filepath)
-        if not compiles:
+        with self._timed('compilation', subprocess_bound=True):
+            render = IssueDetector.check_quarto_compilation(
+                self.filepath, build_dir=self.build_dir, force=self.force_render,
+                prerendered=self.prerendered, policy=self.limits['render'])
+        html_file = render.html if render.ok else None
+        self.resource_misses = list(render.misses)
+        if render.limit:
+            # Stopped by its resource policy: says nothing about the source
+            self._mark_incomplete('compilation', render.limit, render.error)
+        elif not render.ok:
             self.auto_fail = True
             self.issues['critical'].append({
                 'type': 'compilation_failure',
                 'description': 'Quarto compilation failed',
-                'details': error[:200],
+                'details': render.error[:200],
                 'points': 100
             })
             self.score = 0
             return self._generate_report()
 
+        # Line-level checks, per slide (unchanged slides come from the cache)
+        slides = self._slide_findings(markdown=True)
+
         # Check equation overflow (heuristic)
-        equation_overflows = IssueDetector.check_equation_overflow(content)
-        for line in equation_overflows:
-            self.issues['critical'].append({
-                'type': 'equation_overflow',
-                'description': f'Potential equation overflow at line {line}',
-                'details': 'Equation >100 chars may overflow slide',
-                'points': 20
-            })
-            self.score -= 20
+        for slide, findings in slides:
+            for relative in findings['overflows']:
+                self.issues['critical'].append({
+                    'type': 'equation_overflow',
+                    'description': f'Potential equation overflow at line {slide.line(relative)} ({slide.label})',
+                    'details': 'Equation >100 chars may overflow slide',
+                    'points': 20,
+                    'slide': slide.number
+                })
+                self.score -= 20
 
         # Check broken citations
-        bib_file = self.filepath.parent.parent / 'Bibliography_base.bib'
-        broken_citations = IssueDetector.check_broken_citations(content, bib_file)
+        cited = self._citation_lines(slides)
+        with self._timed('citation_lookup'):
+            bib_files = bibliographies_for(self.filepath, read_front_matter(self.filepath))
+            broken_citations = IssueDetector.check_broken_citations(set(cited), bib_files, self.bib_index)
         for key in broken_citations:
+            line, slide = cited[key]
             self.issues['critical'].append({
                 'type': 'broken_citation',
                 'description': f'Citation key not in bibliography: {key}',
-                'details': 'Add to Bibliography_base.bib or fix key',
-                'points': 15
+                'details': f'Line {line} ({slide.label}): add to Bibliography_base.bib or fix key',
+                'points': 15,
+                'slide': slide.number
             })
             self.score -= 15
 
-        # Check plotly widgets (if HTML exists)
-        html_file = self.filepath.parent.parent / 'docs' / 'slides' / self.filepath.with_suffix('.html').name
-        if html_file.exists():
-            widget_count, _ = IssueDetector.check_plotly_widgets(html_file)
-            expected_plotly = content.count('plotly::plot_ly')
-            if expected_plotly > 0 and widget_count < expected_plotly:
-                missing = expected_plotly - widget_count
-                self.issues['critical'].append({
+        # Check plotly widgets in the freshly rendered HTML, slide by slide
+        expected_plotly = sum(findings['plotly'] for _, findings in slides)
+        if expected_plotly > 0 and html_file is not None and html_file.exists():
+            with self._timed('plotly_check'):
+                rendered = plotly_widgets_per_slide(html_file)
+            if slides[0][0].number > 0:
+                rendered = rendered[1:]     # no source before the first heading
+            if len(rendered) == len(slides):
+                # Source slides and rendered <section>s line up one to one
+                pairs = [(slide, findings['plotly'], html.widgets)
+                         for (slide, findings), html in zip(slides, rendered)]
+            else:
+                # Cannot align slides (e.g. generated slides); compare deck totals
+                pairs = [(None, expected_plotly, sum(html.widgets for html in rendered))]
+            for slide, expected, found in pairs:
+                if found >= expected:
+                    continue
+                missing = expected - found
+                issue = {
                     'type': 'missing_plotly_chart',
                     'description': f'{missing} plotly chart(s) failed to render',
-                    'details': f'Expected {expected_plotly}, found {widget_count}',
+                    'details': f'Expected {expected}, found {found}',
                     'points': 10 * missing
-                })
+                }
+                if slide is not None:
+                    issue['description'] += f' on {slide.label}'
+                    issue['details'] += f' (source line {slide.start_line})'
+                    issue['slide'] = slide.number
+                self.issues['critical'].append(issue)
                 self.score -= 10 * missing
 
         self.score = max(0, self.score)
         return self._generate_report()
 
+    def score_beamer(self) -> Dict:
+        """Score a LaTeX/Beamer document (slides or manuscript)."""
+        # Check compilation (incremental; an up-to-date build does not re-run XeLaTeX)
+        build = None
+        if latexmk_version() == 'missing':
+            # No LaTeX toolchain: score the source checks, skip the build and its log
+            self.skipped['compilation'] = 'latexmk not installed (overfull boxes not checked)'
+        else:
+            with self._timed('compilation', subprocess_bound=True):
+                build = IssueDetector.check_latex_compilation(self.filepath, policy=self.limits['latex'])
+        if build is None:
+            pass
+        elif build.limit:
+            self._mark_incomplete('compilation', build.limit, build.error)
+        elif not build.ok:
+            self.auto_fail = True
+            self.issues['critical'].append({
+                'type': 'compilation_failure',
+                'description': 'LaTeX compilation failed',
+                'details': build.error[:200],
+                'points': 100
+            })
+            self.score = 0
+            return self._generate_report()
+
+        # Line-level checks, per frame (unchanged frames come from the cache)
+        declarations = LatexBibliographyVisitor()
+        slides = self._slide_findings(markdown=False, visitors=(declarations,))
+
+        # Check broken citations
+        cited = self._citation_lines(slides)
+        with self._timed('citation_lookup'):
+            bib_files = latex_bibliographies_for(self.filepath, '\n'.join(declarations.lines))
+            broken_citations = IssueDetector.check_broken_citations(set(cited), bib_files, self.bib_index)
+        for key in broken_citations:
+            line, slide = cited[key]
+            self.issues['critical'].append({
+                'type': 'broken_citation',
+                'description': f'Citation key not in bibliography: {key}',
+                'details': f'Line {line} ({slide.label}): add to Bibliography_base.bib or fix key',
+                'points': 15,
+                'slide': slide.number
+            })
+            self.score -= 15
+
+        # Check overfull boxes reported by the last engine run
+        with self._timed('log_scan'):
+            boxes = IssueDetector.check_overfull_boxes(build.log if build is not None else None)
+        frames = [slide for slide, _ in slides]
+        for box in boxes:
+            location = f' at line {box.line}' if box.line is not None else ''
+            slide = slide_for_line(frames, box.line) if box.line is not None else None
+            if slide is not None:
+                location += f' ({slide.label})'
+            if box.kind == 'hbox':
+                issue = {
+                    'type': 'overfull_hbox',
+                    'description': f'Overfull \\hbox ({box.points:g}pt too wide){location}',
+                    'details': 'Content runs past the right margin; shorten or resize it',
+                    'points': 5
+                }
+            else:
+                issue = {
+                    'type': 'text_overflow',
+                    'description': f'Overfull \\vbox ({box.points:g}pt too high){location}',
+                    'details': 'Frame content runs off the bottom of the slide; split the frame',
+                    'points': 5
+                }
+            if slide is not None:
+                issue['slide'] = slide.number
+            self.issues['major'].append(issue)
+            self.score -= 5
+
+        self.score = max(0, self.score)
+        return self._generate_report()
+
     def score_r_script(self) -> Dict:
         """Score R script quality."""
-        content = self.filepath.read_text(encoding='utf-8')
-
         # Check syntax
-        is_valid, error = IssueDetector.check_r_syntax(self.filepath)
-        if not is_valid:
+        with self._timed('r_parse', subprocess_bound=True):
+            syntax = IssueDetector.check_r_syntax(self.filepath, policy=self.limits['r_parse'])
+        if syntax.limit:
+            self._mark_incomplete('r_parse', syntax.limit, syntax.message)
+        elif not syntax.ok:
             self.auto_fail = True
+            location = ''
+            if syntax.line is not None:
+                location = f' at line {syntax.line}'
+                if syntax.column is not None:
+                    location += f', column {syntax.column}'
             self.issues['critical'].append({
                 'type': 'syntax_error',
-                'description': 'R syntax error',
-                'details': error[:200],
+                'description': f'R syntax error{location}',
+                'details': syntax.message[:200],
                 'points': 100
             })
             self.score = 0
             return self._generate_report()
 
+        # Single pass over the source for all line-level checks
+        paths = HardcodedPathVisitor()
+        keywords = KeywordVisitor(R_SEED_KEYWORDS, name='random_scan')
+        self._scanner([paths, keywords]).scan_file(self.filepath)
+        random_lines = [keywords.found[f] for f in RANDOM_FUNCTIONS if f in keywords.found]
+
         # Check hardcoded paths
-        path_issues = IssueDetector.check_hardcoded_paths(content)
-        for line in path_issues:
+        for line in paths.lines:
             self.issues['critical'].append({
                 'type': 'hardcoded_path',
                 'description': f'Hardcoded absolute path at line {line}',
@@ -283,13 +1556,12 @@ class QualityScorer:
             self.score -= 20
 
         # Check for set.seed() if randomness detected
-        has_random = any(fn in content for fn in ['rnorm', 'runif', 'sample', 'rbinom', 'rnbinom'])
-        has_seed = 'set.seed' in content
-        if has_random and not has_seed:
+        if random_lines and 'set.seed' not in keywords.found:
+            first_random = min(random_lines)
             self.issues['major'].append({
                 'type': 'missing_set_seed',
                 'description': 'Missing set.seed() for reproducibility',
-                'details': 'Add set.seed(YYYYMMDD) after library() calls',
+                'details': f'Randomness from line {first_random}; add set.seed(YYYYMMDD) after library() calls',
                 'points': 10
             })
             self.score -= 10
@@ -302,6 +1574,9 @@ class QualityScorer:
         if self.auto_fail:
             status = 'FAIL'
             threshold = 'None (auto-fail)'
+        elif self.incomplete:
+            status = 'INCOMPLETE'
+            threshold = 'None (check hit a resource limit)'
         elif self.score >= THRESHOLDS['excellence']:
             status = 'EXCELLENCE'
             threshold = 'excellence'
@@ -320,7 +1595,7 @@ class QualityScorer:
         minor_count = len(self.issues['minor'])
         total_count = critical_count + major_count + minor_count
 
-        return {
+        report = {
             'filepath': str(self.filepath),
             'score': self.score,
             'status': status,
@@ -339,81 +1614,739 @@ class QualityScorer:
             },
             'thresholds': THRESHOLDS
         }
+        if self.incomplete:
+            report['incomplete'] = self.incomplete
+        if self.skipped:
+            report['skipped'] = self.skipped
+        if self.resource_misses:
+            report['resource_misses'] = self.resource_misses
+        if self.timings is not None:
+            report['timings'] = summarize_timings(self.timings)
+        return report
 
     def print_report(self, summary_only: bool = False) -> None:
         """Print formatted quality report."""
-        report = self._generate_report()
+        print_report(self._generate_report(), summary_only=summary_only, verbose=self.verbose)
 
-        print(f"\n# Quality Score: {self.filepath.name}\n")
+# ==============================================================================
+# PROFILING (--profile)
+# ==============================================================================
 
-        status_emoji = {
-            'EXCELLENCE': '[EXCELLENCE]',
-            'PR_READY': '[PASS]',
-            'COMMIT_READY': '[PASS]',
-            'BLOCKED': '[BLOCKED]',
-            'FAIL': '[FAIL]'
-        }
+def summarize_timings(checks: Dict[str, Dict]) -> Dict:
+    """Per-check timings plus subprocess-wait vs Python totals for one file."""
+    return {
+        'checks': {
+            name: {
+                'calls': entry['calls'],
+                'wall': round(entry['wall'], 6),
+                'cpu': round(entry['cpu'], 6),
+                'subprocess': entry['subprocess'],
+            }
+            for name, entry in checks.items()
+        },
+        'wall': round(sum(e['wall'] for e in checks.values()), 6),
+        'subprocess_wall': round(sum(e['wall'] for e in checks.values() if e['subprocess']), 6),
+        'python_cpu': round(sum(e['cpu'] for e in checks.values()), 6),
+    }
+
+
+def aggregate_timings(reports: List[Dict]) -> Dict:
+    """Merge the 'timings' of every report in a run."""
+    checks: Dict[str, Dict] = {}
+    files = 0
+    for report in reports:
+        timings = report.get('timings')
+        if not timings:
+            continue
+        files += 1
+        for name, entry in timings['checks'].items():
+            total = checks.setdefault(name, {'calls': 0, 'wall': 0.0, 'cpu': 0.0,
+                                             'subprocess': entry['subprocess']})
+            total['calls'] += entry['calls']
+            total['wall'] += entry['wall']
+            total['cpu'] += entry['cpu']
+    summary = summarize_timings(checks)
+    summary['files'] = files
+    return summary
+
+
+def print_profile(aggregate: Dict, stream=None) -> None:
+    """Print the run-wide timing table, slowest check first."""
+    stream = stream if stream is not None else sys.stdout
+    print(f"\n# Profile: {aggregate['files']} file(s), {aggregate['wall']:.3f}s in checks\n", file=stream)
+    print("| Check | Calls | Wall (s) | CPU (s) | Kind |", file=stream)
+    print("|-------|------:|---------:|--------:|------|", file=stream)
+    ordered = sorted(aggregate['checks'].items(), key=lambda item: item[1]['wall'], reverse=True)
+    for name, entry in ordered:
+        kind = 'subprocess' if entry['subprocess'] else 'python'
+        print(f"| {name} | {entry['calls']} | {entry['wall']:.3f} | {entry['cpu']:.3f} | {kind} |", file=stream)
+    python_wall = aggregate['wall'] - aggregate['subprocess_wall']
+    print(f"\n**Subprocess wait:** {aggregate['subprocess_wall']:.3f}s  "
+          f"**Python:** {python_wall:.3f}s wall / {aggregate['python_cpu']:.3f}s CPU", file=stream)
+
+# ==============================================================================
+# REPORT OUTPUT
+# ==============================================================================
+
+def print_report(report: Dict, summary_only: bool = False, verbose: bool = False) -> None:
+    """Print a formatted quality report from a report dict."""
+    print(f"\n# Quality Score: {Path(report['filepath']).name}\n")
+
+    status_emoji = {
+        'EXCELLENCE': '[EXCELLENCE]',
+        'PR_READY': '[PASS]',
+        'COMMIT_READY': '[PASS]',
+        'BLOCKED': '[BLOCKED]',
+        'INCOMPLETE': '[INCOMPLETE]',
+        'FAIL': '[FAIL]'
+    }
+
+    print(f"## Overall Score: {report['score']}/100 {status_emoji.get(report['status'], '')}")
+
+    if report['status'] == 'BLOCKED':
+        print(f"\n**Status:** BLOCKED - Cannot commit (score < {THRESHOLDS['commit']})")
+    elif report['status'] == 'COMMIT_READY':
+        print(f"\n**Status:** Ready for commit (score >= {THRESHOLDS['commit']})")
+        gap_to_pr = THRESHOLDS['pr'] - report['score']
+        print(f"**Next milestone:** PR threshold ({THRESHOLDS['pr']}+)")
+        print(f"**Gap analysis:** Need +{gap_to_pr} points to reach PR quality")
+    elif report['status'] == 'PR_READY':
+        print(f"\n**Status:** Ready for PR (score >= {THRESHOLDS['pr']})")
+        gap_to_excellence = THRESHOLDS['excellence'] - report['score']
+        if gap_to_excellence > 0:
+            print(f"**Next milestone:** Excellence ({THRESHOLDS['excellence']})")
+            print(f"**Gap analysis:** +{gap_to_excellence} points to excellence")
+    elif report['status'] == 'EXCELLENCE':
+        print(f"\n**Status:** Excellence achieved! (score >= {THRESHOLDS['excellence']})")
+    elif report['status'] == 'FAIL':
+        print(f"\n**Status:** Auto-fail (compilation/syntax error)")
+    elif report['status'] == 'INCOMPLETE':
+        print(f"\n**Status:** Incomplete - score covers only the checks that finished")
+    for check, outcome in report.get('incomplete', {}).items():
+        print(f"**{check}:** {outcome['status']} - {outcome['detail']}")
+    for check, reason in report.get('skipped', {}).items():
+        print(f"**Warning:** {check} skipped - {reason}")
+    for url in report.get('resource_misses', []):
+        print(f"**Not vendored (render needs network):** {url} - run scripts/resource_cache.py --fetch")
+
+    if summary_only:
+        print(f"\n**Total issues:** {report['issues']['counts']['total']} "
+              f"({report['issues']['counts']['critical']} critical, "
+              f"{report['issues']['counts']['major']} major, "
+              f"{report['issues']['counts']['minor']} minor)")
+        return
+
+    # Detailed issues
+    print(f"\n## Critical Issues (MUST FIX): {report['issues']['counts']['critical']}")
+    if report['issues']['counts']['critical'] == 0:
+        print("No critical issues - safe to commit\n")
+    else:
+        for i, issue in enumerate(report['issues']['critical'], 1):
+            print(f"{i}. **{issue['description']}** (-{issue['points']} points)")
+            print(f"   - {issue['details']}\n")
+
+    if report['issues']['counts']['major'] > 0:
+        print(f"## Major Issues (SHOULD FIX): {report['issues']['counts']['major']}")
+        for i, issue in enumerate(report['issues']['major'], 1):
+            print(f"{i}. **{issue['description']}** (-{issue['points']} points)")
+            print(f"   - {issue['details']}\n")
+
+    if report['issues']['counts']['minor'] > 0 and verbose:
+        print(f"## Minor Issues (NICE-TO-HAVE): {report['issues']['counts']['minor']}")
+        for i, issue in enumerate(report['issues']['minor'], 1):
+            print(f"{i}. {issue['description']} (-{issue['points']} points)\n")
+
+    # Recommendations
+    if report['status'] == 'BLOCKED':
+        print("## Recommended Actions")
+        print("1. Fix all critical issues above")
+        print(f"2. Re-run quality score (target: >={THRESHOLDS['commit']})")
+        print("3. Commit after reaching threshold\n")
+    elif report['status'] == 'COMMIT_READY' and report['score'] < THRESHOLDS['pr']:
+        print("## Recommended Actions to Reach PR Threshold")
+        points_needed = THRESHOLDS['pr'] - report['score']
+        print(f"Need +{points_needed} points to reach {THRESHOLDS['pr']}/100")
+        if report['issues']['counts']['major'] > 0:
+            print("Fix major issues listed above to improve score")
+        print(f"\n**Estimated time:** 10-20 minutes\n")
+
+def new_run_counts() -> Dict[str, int]:
+    """Per-outcome counters for a multi-file run (see run_exit_code)."""
+    counts = {'files': 0, 'scored': 0, 'missing': 0, 'unsupported': 0, 'errors': 0}
+    counts.update({status: 0 for status in ('EXCELLENCE', 'PR_READY', 'COMMIT_READY', 'BLOCKED', 'INCOMPLETE', 'FAIL')})
+    return counts
+
+
+def run_exit_code(counts: Dict[str, int]) -> Tuple[int, str]:
+    """Exit code of a run and the reason for it, from its outcome counts."""
+    reasons = []
+    if counts['FAIL']:
+        reasons.append(f"{counts['FAIL']} file(s) auto-failed (compilation/syntax error)")
+    if counts['BLOCKED']:
+        reasons.append(f"{counts['BLOCKED']} file(s) below the commit threshold ({THRESHOLDS['commit']})")
+    if counts['INCOMPLETE']:
+        reasons.append(f"{counts['INCOMPLETE']} file(s) incomplete (a check hit its resource limit)")
+    if counts['missing']:
+        reasons.append(f"{counts['missing']} file(s) not found")
+    if counts['errors']:
+        reasons.append(f"{counts['errors']} file(s) could not be scored")
+    if not reasons:
+        return 0, f"all {counts['scored']} scored file(s) at or above the commit threshold ({THRESHOLDS['commit']})"
+    return (2 if counts['FAIL'] else 1), '; '.join(reasons)
+
+# ==============================================================================
+# CHANGE DETECTION (--changed-since)
+# ==============================================================================
+
+# Files scored, and sources whose changes are tracked. A .tex file without
+# \documentclass (preamble, \input fragment) is followed for includes and
+# citations, but only the documents including it are scored (is_latex_document).
+SCORABLE_SUFFIXES = ('.qmd', '.R', '.tex')
+
+INCLUDE_PATTERNS = {
+    '.qmd': re.compile(r'\{\{<\s*include\s+([^\s>]+)\s*>\}\}'),
+    '.tex': re.compile(r'\\(?:input|include)\{([^}]+)\}'),
+    '.R': re.compile(r'\bsource\(\s*["\']([^"\']+)["\']'),
+}
 
-        print(f"## Overall Score: {report['score']}/100 {status_emoji.get(report['status'], '')}")
-
-        if report['status'] == 'BLOCKED':
-            print(f"\n**Status:** BLOCKED - Cannot commit (score < {THRESHOLDS['commit']})")
-        elif report['status'] == 'COMMIT_READY':
-            print(f"\n**Status:** Ready for commit (score >= {THRESHOLDS['commit']})")
-            gap_to_pr = THRESHOLDS['pr'] - report['score']
-            print(f"**Next milestone:** PR threshold ({THRESHOLDS['pr']}+)")
-            print(f"**Gap analysis:** Need +{gap_to_pr} points to reach PR quality")
-        elif report['status'] == 'PR_READY':
-            print(f"\n**Status:** Ready for PR (score >= {THRESHOLDS['pr']})")
-            gap_to_excellence = THRESHOLDS['excellence'] - report['score']
-            if gap_to_excellence > 0:
-                print(f"**Next milestone:** Excellence ({THRESHOLDS['excellence']})")
-                print(f"**Gap analysis:** +{gap_to_excellence} points to excellence")
-        elif report['status'] == 'EXCELLENCE':
-            print(f"\n**Status:** Excellence achieved! (score >= {THRESHOLDS['excellence']})")
-        elif report['status'] == 'FAIL':
-            print(f"\n**Status:** Auto-fail (compilation/syntax error)")
-
-        if summary_only:
-            print(f"\n**Total issues:** {report['issues']['counts']['total']} "
-                  f"({report['issues']['counts']['critical']} critical, "
-                  f"{report['issues']['counts']['major']} major, "
-                  f"{report['issues']['counts']['minor']} minor)")
+
+class ChangeDetectionError(Exception):
+    """Raised when git cannot answer which files changed."""
+
+
+def _git(args: List[str], cwd: Path) -> str:
+    """Run a git command and return stdout, raising ChangeDetectionError on failure."""
+    try:
+        result = subprocess.run(['git'] + args, capture_output=True, text=True,
+                                cwd=cwd, timeout=60)
+    except (subprocess.TimeoutExpired, FileNotFoundError) as e:
+        raise ChangeDetectionError(f"git {args[0]} failed: {e}")
+    if result.returncode != 0:
+        raise ChangeDetectionError(result.stderr.strip() or f"git {args[0]} failed")
+    return result.stdout
+
+
+def _split_lines(output: str) -> List[str]:
+    return [line for line in output.split('\n') if line]
+
+
+def changed_paths(ref: str, repo_root: Path) -> List[str]:
+    """Repo-relative paths changed since ref: committed, staged, unstaged and untracked."""
+    changed = set(_split_lines(_git(['diff', '--name-only', ref], repo_root)))
+    changed.update(_split_lines(_git(['ls-files', '--others', '--exclude-standard'], repo_root)))
+    return sorted(changed)
+
+
+def changed_bib_keys(bib_path: str, ref: str, repo_root: Path) -> set:
+    """Keys whose entries were added, removed or edited in a .bib since ref."""
+    try:
+        old_entries = parse_bib_entries(_git(['show', f'{ref}:{bib_path}'], repo_root))
+    except ChangeDetectionError:
+        old_entries = {}
+    current = repo_root / bib_path
+    new_entries = parse_bib_entries(current.read_text(encoding='utf-8')) if current.exists() else {}
+    keys = set(old_entries) | set(new_entries)
+    return {k for k in keys if old_entries.get(k) != new_entries.get(k)}
+
+
+def _direct_dependencies(rel_path: str, content: str) -> set:
+    """Repo-relative paths a source file includes, inputs or sources."""
+    pattern = INCLUDE_PATTERNS.get(Path(rel_path).suffix)
+    if pattern is None:
+        return set()
+    base = Path(rel_path).parent
+    deps = set()
+    for match in pattern.finditer(content):
+        target = match.group(1).strip()
+        if Path(rel_path).suffix == '.tex' and not Path(target).suffix:
+            target += '.tex'
+        deps.add(os.path.normpath(str(base / target)))
+    return deps
+
+
+def files_changed_since(ref: str, cwd: Path = Path('.')) -> List[Path]:
+    """Scorable files affected by changes since ref.
+
+    Starts from files git reports as changed (including untracked), then
+    adds every tracked source that transitively includes a changed file
+    or cites a bibliography key whose entry changed. Paths are returned
+    relative to cwd, sorted, and restricted to scorable documents (no .tex fragments).
+    """
+    repo_root = Path(_git(['rev-parse', '--show-toplevel'], cwd).strip())
+    changed = changed_paths(ref, repo_root)
+
+    sources = set(p for p in _split_lines(_git(['ls-files'], repo_root))
+                  if p.endswith(SCORABLE_SUFFIXES))
+    sources.update(p for p in changed if p.endswith(SCORABLE_SUFFIXES))
+
+    dirty_keys = set()
+    for path in changed:
+        if path.endswith('.bib'):
+            dirty_keys |= changed_bib_keys(path, ref, repo_root)
+
+    dependents: Dict[str, set] = {}
+    affected = set(p for p in changed if p.endswith(SCORABLE_SUFFIXES))
+    for source in sources:
+        try:
+            content = (repo_root / source).read_text(encoding='utf-8')
+        except (OSError, UnicodeDecodeError):
+            continue
+        for dep in _direct_dependencies(source, content):
+            dependents.setdefault(dep, set()).add(source)
+        if dirty_keys and extract_cited_keys(content, markdown=source.endswith('.qmd')) & dirty_keys:
+            affected.add(source)
+
+    # Walk the reverse include graph from every changed input
+    frontier = list(affected | set(changed))
+    while frontier:
+        for dependent in dependents.get(frontier.pop(), ()):
+            if dependent not in affected:
+                affected.add(dependent)
+                frontier.append(dependent)
+
+    cwd_abs = Path(cwd).resolve()
+    return sorted(
+        Path(os.path.relpath(repo_root / p, cwd_abs))
+        for p in affected
+        if p.endswith(SCORABLE_SUFFIXES) and (repo_root / p).exists()
+        and (not p.endswith('.tex') or is_latex_document(repo_root / p))
+    )
+
+# ==============================================================================
+# FILE DISPATCH
+# ==============================================================================
+
+def score_file(filepath: Path, verbose: bool = False, cache_dir: Optional[Path] = None,
+               build_dir: Path = DEFAULT_BUILD_DIR, prerendered: Optional[RenderResult] = None,
+               profile: bool = False,
+               limits: Optional[Dict[str, ResourcePolicy]] = None,
+               force_render: bool = False) -> Tuple[str, object]:
+    """Score one file and return an (outcome, payload) pair.
+
+    Outcomes:
+        'ok'          -> payload is the report dict
+        'missing'     -> payload is None
+        'unsupported' -> payload is the file suffix
+        'error'       -> payload is (message, formatted traceback)
+
+    Never raises, so it is safe to run inside a worker process; the parent
+    turns outcomes into output and exit codes in input order. With a
+    cache_dir, unchanged files are answered from the ResultCache, and in a
+    changed slide deck only the edited slides are scanned again. With
+    force_render, lectures are re-rendered rather than reusing build_dir
+    artifacts.
+    A prerendered result (from --batch-render) replaces the render step.
+    With profile, the report carries per-check 'timings'. limits overrides
+    DEFAULT_LIMITS, the resource policy of each checker subprocess.
+    """
+    if not filepath.exists():
+        return 'missing', None
+
+    try:
+        if filepath.suffix not in SCORABLE_SUFFIXES:
+            return 'unsupported', filepath.suffix
+        if filepath.suffix == '.tex' and not is_latex_document(filepath):
+            return 'unsupported', '.tex without \\documentclass (an \\input fragment)'
+
+        cache = ResultCache(cache_dir) if cache_dir is not None else None
+        if cache is not None:
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            key = cache.key_for(filepath)
+            cached = cache.get(key)
+            lookup = {'calls': 1, 'wall': time.perf_counter() - wall_start,
+                      'cpu': time.process_time() - cpu_start, 'subprocess': False}
+            if cached is not None:
+                cached['filepath'] = str(filepath)
+                if profile:
+                    cached['timings'] = summarize_timings({'cache_lookup': lookup})
+                return 'ok', cached
+
+        bib_index = shared_bib_index(cache_dir)
+        scorer = QualityScorer(filepath, verbose=verbose, bib_index=bib_index,
+                               build_dir=build_dir, force_render=force_render,
+                               prerendered=prerendered, profile=profile, slide_cache=cache,
+                               limits=limits)
+
+        if filepath.suffix == '.qmd':
+            report = scorer.score_quarto()
+        elif filepath.suffix == '.tex':
+            report = scorer.score_beamer()
+        else:
+            report = scorer.score_r_script()
+
+        bib_index.save()
+        if cache is not None:
+            cache.put(key, report)
+            if profile:
+                scorer.timings['cache_lookup'] = lookup
+                report['timings'] = summarize_timings(scorer.timings)
+
+        return 'ok', report
+
+    except Exception as e:
+        return 'error', (str(e), traceback.format_exc())
+
+
+def iter_scores(filepaths: List[Path], verbose: bool = False, jobs: int = 1,
+                max_renders: int = DEFAULT_MAX_RENDERS, cache_dir: Optional[Path] = None,
+                build_dir: Path = DEFAULT_BUILD_DIR, batch_render: bool = False,
+                profile: bool = False, limits: Optional[Dict[str, ResourcePolicy]] = None,
+                ordered: bool = True, force_render: bool = False):
+    """Yield (filepath, outcome, payload), in input order unless not ordered.
+
+    With jobs > 1, files are scored in a process pool and at most
+    `max_renders` Quarto renders run at once across all workers. Results
+    are yielded in the order the files were given, so output and exit
+    codes are identical to a serial run; with ordered=False (--jsonl) each
+    result is yielded as soon as its file completes. With batch_render, all
+    lectures are rendered up front in one project-level quarto call and
+    each file is scored against its own render result.
+    """
+    prerendered: Dict[Path, RenderResult] = {}
+    if batch_render:
+        lectures = [f for f in filepaths if f.suffix == '.qmd' and f.exists()]
+        if lectures:
+            policy = (limits or DEFAULT_LIMITS)['render']
+            prerendered = render_batch(lectures, build_dir=build_dir, force=force_render,
+                                       policy=policy)
+
+    if jobs <= 1 or len(filepaths) <= 1:
+        for filepath in filepaths:
+            yield (filepath,) + score_file(filepath, verbose, cache_dir, build_dir,
+                                           prerendered.get(filepath), profile, limits, force_render)
+        return
+
+    render_slots = multiprocessing.BoundedSemaphore(max(1, max_renders))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(render_slots,)) as pool:
+        futures = {pool.submit(score_file, filepath, verbose, cache_dir, build_dir,
+                               prerendered.get(filepath), profile, limits, force_render): filepath
+                   for filepath in filepaths}
+        for future in (futures if ordered else as_completed(futures)):
+            yield (futures[future],) + future.result()
+
+# ==============================================================================
+# WATCH MODE (--watch: long-lived process, re-scores files as they are saved)
+# ==============================================================================
+
+# Seconds without further changes before a burst of saves is scored
+WATCH_DEBOUNCE = 0.3
+WATCH_POLL_INTERVAL = 1.0
+# Files whose changes can affect a score (.bib: citations; fragments: includes)
+WATCH_SUFFIXES = SCORABLE_SUFFIXES + ('.bib',)
+# Directories never descended into (build output, caches, VCS)
+WATCH_SKIP_DIRS = ('_build', 'docs', 'node_modules')
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct('iIII')
+
+
+def _skip_dir(name: str) -> bool:
+    return name.startswith('.') or name in WATCH_SKIP_DIRS or name.endswith('_files')
+
+
+def _watched(path: Path) -> bool:
+    return path.suffix in WATCH_SUFFIXES and not path.name.startswith(('.', '#'))
+
+
+def walk_watched(roots: List[Path]) -> List[Path]:
+    """Every watchable file under the root directories (and root files themselves)."""
+    found = []
+    for root in roots:
+        if root.is_file():
+            found.append(root)
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if not _skip_dir(d))
+            found.extend(Path(dirpath) / name for name in sorted(filenames)
+                         if _watched(Path(dirpath) / name))
+    return found
+
+
+class PollingWatcher:
+    """Detect saved files by comparing (mtime, size) snapshots of the watched set."""
+
+    kind = 'polling'
+
+    def __init__(self, roots: List[Path], extra_files: List[Path],
+                 interval: float = WATCH_POLL_INTERVAL):
+        self.roots = roots
+        self.extra_files = extra_files
+        self.interval = interval
+        self._stamps = self._snapshot()
+
+    def _snapshot(self) -> Dict[Path, Tuple[int, int]]:
+        stamps = {}
+        for path in walk_watched(self.roots) + self.extra_files:
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            stamps[path] = (stat.st_mtime_ns, stat.st_size)
+        return stamps
+
+    def wait(self, timeout: Optional[float]) -> set:
+        """Changed paths, blocking up to timeout seconds (forever if None)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            pause = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            if pause > 0:
+                time.sleep(pause)
+            stamps = self._snapshot()
+            changed = {p for p in stamps.keys() | self._stamps.keys()
+                       if stamps.get(p) != self._stamps.get(p)}
+            self._stamps = stamps
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify through ctypes: one watch per directory, no polling.
+
+    Root directories are watched recursively (new subdirectories are
+    picked up as they appear); extra files are watched through their
+    parent directory. Raises OSError where inotify is unavailable.
+    """
+
+    kind = 'inotify'
+    MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE
+
+    def __init__(self, roots: List[Path], extra_files: List[Path]):
+        try:
+            self._libc = ctypes.CDLL(None, use_errno=True)
+            self._libc.inotify_init1
+        except (OSError, AttributeError) as e:
+            raise OSError(f'inotify unavailable: {e}')
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._dirs: Dict[int, Path] = {}
+        self._recursive: set = set()
+        self._only: Dict[Path, set] = {}   # non-recursive dir -> the files wanted from it
+        for root in roots:
+            if root.is_dir():
+                for dirpath, dirnames, _ in os.walk(root):
+                    dirnames[:] = [d for d in dirnames if not _skip_dir(d)]
+                    self._add(Path(dirpath), recursive=True)
+            else:
+                self._add(root.parent, only=root)
+        for path in extra_files:
+            self._add(path.parent, only=path)
+
+    def _add(self, directory: Path, recursive: bool = False, only: Optional[Path] = None) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(directory)), self.MASK)
+        if wd < 0:
             return
+        self._dirs[wd] = directory
+        if recursive:
+            self._recursive.add(directory)
+        elif directory not in self._recursive:
+            self._only.setdefault(directory, set()).add(only)
+
+    def _wanted(self, path: Path) -> bool:
+        if path.parent in self._recursive:
+            return _watched(path)
+        return path in self._only.get(path.parent, ())
+
+    def wait(self, timeout: Optional[float]) -> set:
+        """Changed paths, blocking up to timeout seconds (forever if None)."""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed = set()
+        try:
+            data = os.read(self._fd, 1 << 16)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', errors='replace')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped: report everything under the roots
+                changed.update(walk_watched(sorted(self._recursive)))
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / name
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and directory in self._recursive and not _skip_dir(name):
+                    self._add(path, recursive=True)
+                continue
+            if mask & IN_CREATE:
+                continue    # the IN_CLOSE_WRITE that follows carries the content
+            if self._wanted(path):
+                changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def make_watcher(roots: List[Path], extra_files: List[Path], poll: bool = False):
+    """An inotify watcher where the platform has one, else a polling watcher."""
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(roots, extra_files)
+        except OSError:
+            pass
+    return PollingWatcher(roots, extra_files)
 
-        # Detailed issues
-        print(f"\n## Critical Issues (MUST FIX): {report['issues']['counts']['critical']}")
-        if report['issues']['counts']['critical'] == 0:
-            print("No critical issues - safe to commit\n")
+
+def bibliographies_of(documents: List[Path]) -> List[Path]:
+    """Bibliography files the watched documents read (watched for citation checks)."""
+    bibs = set()
+    for document in documents:
+        try:
+            if document.suffix == '.qmd':
+                bibs.update(bibliographies_for(document, read_front_matter(document)))
+            elif document.suffix == '.tex':
+                bibs.update(latex_bibliographies_for(document, document.read_text(encoding='utf-8')))
+        except (OSError, UnicodeDecodeError):
+            continue
+    return sorted(b for b in bibs if b.exists())
+
+
+def affected_documents(changed: set, documents: List[Path]) -> List[Path]:
+    """Documents to re-score after changes to a set of files.
+
+    A scorable document is re-scored itself; a .bib change re-scores every
+    lecture and LaTeX document; any other change (an \\input fragment, an
+    included .qmd, a sourced .R) re-scores the documents that mention its
+    file name.
+    """
+    affected = set()
+    fragments = []
+    for path in changed:
+        if path in documents:
+            affected.add(path)
+        elif path.suffix == '.bib':
+            affected.update(d for d in documents if d.suffix in ('.qmd', '.tex'))
         else:
-            for i, issue in enumerate(report['issues']['critical'], 1):
-                print(f"{i}. **{issue['description']}** (-{issue['points']} points)")
-                print(f"   - {issue['details']}\n")
+            fragments.append(path)
+    for document in documents:
+        if document in affected or not fragments:
+            continue
+        try:
+            content = document.read_text(encoding='utf-8')
+        except (OSError, UnicodeDecodeError):
+            continue
+        if any(f.name in content or (f.suffix == '.tex' and f'{{{f.stem}}}' in content)
+               for f in fragments):
+            affected.add(document)
+    return sorted(affected)
+
+
+def watch(roots: List[Path], verbose: bool = False, summary: bool = False,
+          as_json: bool = False, cache_dir: Optional[Path] = None,
+          build_dir: Path = DEFAULT_BUILD_DIR, debounce: float = WATCH_DEBOUNCE,
+          poll: bool = False, limits: Optional[Dict[str, ResourcePolicy]] = None) -> None:
+    """Score every document under roots, then re-score them as files change.
+
+    Runs until interrupted. Everything expensive to set up stays warm for
+    the whole session: compiled patterns, the bibliography index, the
+    result cache and the R parse server. With as_json, each report is
+    written as one JSON line and flushed.
+    """
+    def documents_under() -> List[Path]:
+        return [p for p in walk_watched(roots)
+                if p.suffix in SCORABLE_SUFFIXES
+                and (p.suffix != '.tex' or is_latex_document(p))]
+
+    def emit(filepath: Path, outcome: str, payload) -> None:
+        if outcome == 'ok':
+            if as_json:
+                print(json.dumps(payload), flush=True)
+            else:
+                print_report(payload, summary_only=summary, verbose=verbose)
+                sys.stdout.flush()
+        elif outcome == 'error':
+            message, formatted_tb = payload
+            if as_json:
+                print(json.dumps({'filepath': str(filepath), 'error': message}), flush=True)
+            else:
+                print(f"Error scoring {filepath}: {message}", flush=True)
+            sys.stderr.write(formatted_tb)
+
+    def rescore(targets: List[Path]) -> None:
+        for filepath in targets:
+            emit(filepath, *score_file(filepath, verbose, cache_dir, build_dir, limits=limits))
+        if cache_dir is not None:
+            ResultCache(cache_dir).evict()
+
+    documents = documents_under()
+    watcher = make_watcher(roots, bibliographies_of(documents), poll)
+    print(f"Watching {len(documents)} file(s) under {', '.join(map(str, roots))} "
+          f"({watcher.kind}); Ctrl-C to stop", file=sys.stderr, flush=True)
+    rescore(documents)
+    try:
+        while True:
+            changed = watcher.wait(None)
+            while changed:
+                more = watcher.wait(debounce)
+                if not more:
+                    break
+                changed |= more
+            if not changed:
+                continue
+            documents = documents_under()
+            rescore(affected_documents(changed, documents))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
 
-        if report['issues']['counts']['major'] > 0:
-            print(f"## Major Issues (SHOULD FIX): {report['issues']['counts']['major']}")
-            for i, issue in enumerate(report['issues']['major'], 1):
-                print(f"{i}. **{issue['description']}** (-{issue['points']} points)")
-                print(f"   - {issue['details']}\n")
-
-        if report['issues']['counts']['minor'] > 0 and self.verbose:
-            print(f"## Minor Issues (NICE-TO-HAVE): {report['issues']['counts']['minor']}")
-            for i, issue in enumerate(report['issues']['minor'], 1):
-                print(f"{i}. {issue['description']} (-{issue['points']} points)\n")
-
-        # Recommendations
-        if report['status'] == 'BLOCKED':
-            print("## Recommended Actions")
-            print("1. Fix all critical issues above")
-            print(f"2. Re-run quality score (target: >={THRESHOLDS['commit']})")
-            print("3. Commit after reaching threshold\n")
-        elif report['status'] == 'COMMIT_READY' and report['score'] < THRESHOLDS['pr']:
-            print("## Recommended Actions to Reach PR Threshold")
-            points_needed = THRESHOLDS['pr'] - report['score']
-            print(f"Need +{points_needed} points to reach {THRESHOLDS['pr']}/100")
-            if report['issues']['counts']['major'] > 0:
-                print("Fix major issues listed above to improve score")
-            print(f"\n**Estimated time:** 10-20 minutes\n")
+# ==============================================================================
+# SCORE HISTORY (quality_reports/quality_history.sqlite; see score_history.py)
+# ==============================================================================
+
+def record_history(path: Path, entries: List[HistoryEntry]) -> None:
+    """Append a run to the score history in one transaction; never fails the run."""
+    try:
+        history = ScoreHistory(path)
+        try:
+            history.record(entries)
+        finally:
+            history.close()
+    except (sqlite3.Error, OSError) as e:
+        print(f"Warning: Could not record score history in {path}: {e}", file=sys.stderr)
+
+
+def show_history_report(path: Path, filepaths: List[Path], as_json: bool = False) -> None:
+    """Print the dashboard from the latest rows of the score history."""
+    rows, last_run = [], None
+    if path.exists():
+        try:
+            history = ScoreHistory(path)
+            try:
+                prefixes = report_prefixes(filepaths, git_revision()['toplevel']) if filepaths else None
+                rows = history.latest(prefixes)
+                last_run = history.last_run()
+            finally:
+                history.close()
+        except (sqlite3.Error, OSError) as e:
+            print(f"Error: Cannot read score history {path}: {e}", file=sys.stderr)
+            sys.exit(1)
+    if as_json:
+        print(json.dumps({'last_run': last_run, 'files': rows,
+                          'regressions': [r['filepath'] for r in rows if is_regression(r)]}, indent=2))
+    else:
+        print(render_dashboard(rows, last_run, path))
 
 # ==============================================================================
 # CLI INTERFACE
@@ -434,12 +2367,46 @@ Examples:
   # Score an R script
   python scripts/quality_score.py scripts/R/Lecture06_simulations.R
 
+  # Score Beamer decks (incremental latexmk builds under _build/latex)
+  python scripts/quality_score.py Slides/*.tex
+
   # Summary only (no detailed issues)
   python scripts/quality_score.py Quarto/Lecture6.qmd --summary
 
   # Verbose output (include minor issues)
   python scripts/quality_score.py Quarto/Lecture6.qmd --verbose
 
+  # Score a whole course with 4 workers, at most 2 renders at a time
+  python scripts/quality_score.py Quarto/*.qmd --jobs 4 --max-renders 2
+
+  # Where does the time go? Per-check timing table (and 'timings' in --json)
+  python scripts/quality_score.py Quarto/*.qmd scripts/R/*.R --profile
+
+  # Render all lectures in one quarto invocation, then score them
+  python scripts/quality_score.py Quarto/*.qmd --batch-render
+
+  # Re-score everything, bypassing the result cache (.quality_cache/) and rendered output
+  python scripts/quality_score.py Quarto/*.qmd --no-cache --force-render
+
+  # Stream one JSON report per line as files finish (CI), ending with a summary line
+  python scripts/quality_score.py Quarto/*.qmd scripts/R/*.R --jsonl --jobs 4
+
+  # Score only what changed relative to main (plus dependents)
+  python scripts/quality_score.py --changed-since origin/main
+  python scripts/quality_score.py --changed-since HEAD Quarto/
+
+  # Keep running and re-score files as they are saved (one JSON line per report)
+  python scripts/quality_score.py --watch Quarto/ scripts/R/ --json
+
+  # Give renders 5 minutes and 4 GiB (whole process tree), R parsing 20 CPU seconds
+  python scripts/quality_score.py Quarto/*.qmd --limit render:wall=300 --limit render:rss=4096 \\
+      --limit r_parse:cpu=20
+
+  # Dashboard of latest scores, changes and regressions from the score history
+  # (every run is recorded in quality_reports/quality_history.sqlite)
+  python scripts/quality_score.py --report
+  python scripts/quality_score.py --report Quarto/ --json
+
 Quality Thresholds:
   80/100 = Commit threshold (blocks if below)
   90/100 = PR threshold (warning if below)
@@ -447,58 +2414,177 @@ Quality Thresholds:
 
 Exit Codes:
   0 = Score >= 80 (commit allowed)
-  1 = Score < 80 (commit blocked)
+  1 = Score < 80 (commit blocked), or a check hit its resource limit (timeout/oom/killed)
   2 = Auto-fail (compilation/syntax error)
         """
     )
 
-    parser.add_argument('filepaths', type=Path, nargs='+', help='Path(s) to file(s) to score')
+    parser.add_argument('filepaths', type=Path, nargs='*',
+                        help='Path(s) to file(s) to score (with --changed-since: restrict to these paths)')
     parser.add_argument('--summary', action='store_true', help='Show summary only')
     parser.add_argument('--verbose', action='store_true', help='Show all issues including minor')
-    parser.add_argument('--json', action='store_true', help='Output as JSON')
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument('--json', action='store_true', help='Output as JSON')
+    output.add_argument('--jsonl', action='store_true',
+                        help='Stream one JSON report per line as each file finishes, then a summary line')
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help='Score N files concurrently in a process pool (default: 1)')
+    parser.add_argument('--max-renders', type=int, default=DEFAULT_MAX_RENDERS, metavar='N',
+                        help=f'Max concurrent Quarto renders or LaTeX builds with --jobs (default: {DEFAULT_MAX_RENDERS})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Ignore and do not update the result cache (rendered lectures in --build-dir '
+                             'are still reused; see --force-render)')
+    parser.add_argument('--force-render', action='store_true',
+                        help='Re-render lectures even if --build-dir holds an up-to-date render')
+    parser.add_argument('--cache-dir', type=Path, default=DEFAULT_CACHE_DIR,
+                        help=f'Result cache directory (default: {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--build-dir', type=Path, default=DEFAULT_BUILD_DIR,
+                        help='Rendered artifact directory shared with sync_to_docs.sh (default: _build/render)')
+    parser.add_argument('--batch-render', action='store_true',
+                        help='Render all lectures in one project-level quarto invocation before scoring')
+    parser.add_argument('--profile', action='store_true',
+                        help='Time every check; add timings to --json and print a summary table')
+    parser.add_argument('--changed-since', metavar='REF',
+                        help='Score only files changed since a git ref, plus files that depend on them')
+    parser.add_argument('--watch', action='store_true',
+                        help='Score the given files/directories, then re-score them on every save until Ctrl-C')
+    parser.add_argument('--poll', action='store_true',
+                        help='With --watch, poll for changes instead of using inotify')
+    parser.add_argument('--debounce', type=float, default=WATCH_DEBOUNCE, metavar='SECONDS',
+                        help=f'With --watch, wait this long after the last save before scoring (default: {WATCH_DEBOUNCE})')
+    parser.add_argument('--report', action='store_true',
+                        help='Print the dashboard (latest score, change, recent trend and regressions per file) '
+                             'from the score history and exit; file paths filter it')
+    parser.add_argument('--history', type=Path, default=DEFAULT_HISTORY, metavar='PATH',
+                        help='Score history database, written on every scoring run unless --no-history '
+                             '(default: quality_reports/quality_history.sqlite)')
+    parser.add_argument('--no-history', action='store_true',
+                        help='Do not record this run in the score history (--watch runs never are)')
+    parser.add_argument('--limit', action='append', default=[], metavar='CHECK:KEY=VALUE',
+                        help='Resource limit for a check (render, latex, r_parse); KEY is wall or cpu '
+                             '(seconds) or rss (MiB), 0 removes it. Repeatable. Defaults: ' +
+                             '; '.join(f'{check} {policy.describe()}' for check, policy in DEFAULT_LIMITS.items()))
 
     args = parser.parse_args()
 
+    if args.jobs < 1:
+        parser.error('--jobs must be >= 1')
+    if args.max_renders < 1:
+        parser.error('--max-renders must be >= 1')
+    if args.report:
+        show_history_report(args.history, args.filepaths, as_json=args.json or args.jsonl)
+        sys.exit(0)
+    if not args.filepaths and not args.changed_since:
+        parser.error('give file path(s) to score or --changed-since REF')
+    if args.watch and args.changed_since:
+        parser.error('--watch and --changed-since cannot be combined')
+    try:
+        limits = apply_limit_specs(DEFAULT_LIMITS, args.limit)
+    except ValueError as e:
+        parser.error(f'--limit: {e}')
+    if args.watch:
+        watch(args.filepaths, verbose=args.verbose, summary=args.summary, as_json=args.json or args.jsonl,
+              cache_dir=None if args.no_cache else args.cache_dir, build_dir=args.build_dir,
+              debounce=args.debounce, poll=args.poll, limits=limits)
+        sys.exit(0)
+
+    filepaths = args.filepaths
+    if args.changed_since:
+        try:
+            filepaths = files_changed_since(args.changed_since)
+        except ChangeDetectionError as e:
+            print(f"Error: Cannot determine changes since {args.changed_since}: {e}")
+            sys.exit(1)
+        if args.filepaths:
+            roots = [p.resolve() for p in args.filepaths]
+            filepaths = [f for f in filepaths
+                         if any(f.resolve() == r or r in f.resolve().parents for r in roots)]
+    counts = new_run_counts()
+
+    def emit_line(record: Dict) -> None:
+        print(json.dumps(record), flush=True)
+
+    def finish() -> None:
+        exit_code, reason = run_exit_code(counts)
+        if args.jsonl:
+            emit_line({'summary': dict(counts, exit_code=exit_code, reason=reason)})
+        sys.exit(exit_code)
+
+    if args.changed_since and not filepaths:
+        if args.json:
+            print(json.dumps([], indent=2))
+        elif not args.jsonl:
+            print(f"No changed files to score since {args.changed_since}")
+        finish()
+
+    cache_dir = None if args.no_cache else args.cache_dir
+
+    # --json holds every report for the final array; --jsonl holds none
     results = []
-    exit_code = 0
-
-    for filepath in args.filepaths:
-        if not filepath.exists():
-            print(f"Error: File not found: {filepath}")
-            exit_code = 1
+    timings = []
+    history_entries = []
+
+    for filepath, outcome, payload in iter_scores(filepaths, verbose=args.verbose,
+                                                  jobs=args.jobs, max_renders=args.max_renders,
+                                                  cache_dir=cache_dir, build_dir=args.build_dir,
+                                                  batch_render=args.batch_render,
+                                                  profile=args.profile, limits=limits,
+                                                  ordered=not args.jsonl, force_render=args.force_render):
+        counts['files'] += 1
+        if outcome == 'missing':
+            counts['missing'] += 1
+            if args.jsonl:
+                emit_line({'filepath': str(filepath), 'error': 'File not found'})
+            else:
+                print(f"Error: File not found: {filepath}")
             continue
 
-        try:
-            scorer = QualityScorer(filepath, verbose=args.verbose)
+        if outcome == 'unsupported':
+            counts['unsupported'] += 1
+            if args.jsonl:
+                emit_line({'filepath': str(filepath), 'error': f'Unsupported file type: {payload}'})
+            else:
+                print(f"Error: Unsupported file type: {payload}")
+            continue
 
-            if filepath.suffix == '.qmd':
-                report = scorer.score_quarto()
-            elif filepath.suffix == '.R':
-                report = scorer.score_r_script()
+        if outcome == 'error':
+            counts['errors'] += 1
+            message, formatted_tb = payload
+            if args.jsonl:
+                emit_line({'filepath': str(filepath), 'error': message})
             else:
-                print(f"Error: Unsupported file type: {filepath.suffix}")
-                continue
+                print(f"Error scoring {filepath}: {message}")
+            sys.stderr.write(formatted_tb)
+            continue
 
+        report = payload
+        counts['scored'] += 1
+        counts[report['status']] += 1
+        history_entries.append(history_entry(report))
+        if args.profile:
+            timings.append({'timings': report.get('timings')})
+
+        if args.jsonl:
+            emit_line(report)
+        elif args.json:
             results.append(report)
+        else:
+            print_report(report, summary_only=args.summary, verbose=args.verbose)
 
-            if not args.json:
-                scorer.print_report(summary_only=args.summary)
+    if args.json:
+        print(json.dumps(results, indent=2))
 
-            if report['auto_fail']:
-                exit_code = max(exit_code, 2)
-            elif report['score'] < THRESHOLDS['commit']:
-                exit_code = max(exit_code, 1)
+    if args.profile:
+        # Keep stdout machine-readable; the table goes to stderr in --json/--jsonl mode
+        print_profile(aggregate_timings(timings), sys.stderr if args.json or args.jsonl else sys.stdout)
 
-        except Exception as e:
-            print(f"Error scoring {filepath}: {e}")
-            import traceback
-            traceback.print_exc()
-            exit_code = 1
+    if cache_dir is not None:
+        ResultCache(cache_dir).evict()
 
-    if args.json:
-        print(json.dumps(results, indent=2))
+    if history_entries and not args.no_history:
+        record_history(args.history, history_entries)
 
-    sys.exit(exit_code)
+    finish()
 
 if __name__ == '__main__':
     main()
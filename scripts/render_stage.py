@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Render Stage — Render-Once Artifact Store for Quarto Lectures
+
+Renders each .qmd once and keeps the output (<stem>.html + <stem>_files/)
+in a build directory keyed by a hash of the source and every local file it
+references (includes, figures, theme, bibliography). Both the quality
+scorer (compilation + plotly checks) and sync_to_docs.sh (publishing) read
+from the same artifacts, so an unchanged lecture is never rendered twice.
+Remote front-matter resources (csl: https://...) are replaced by their
+vendored copies (scripts/resource_cache.py); URLs not vendored yet are
+reported as misses.
+
+Layout:
+    _build/render/<stem>-<key>/<stem>.html
+    _build/render/<stem>-<key>/<stem>_files/
+    _build/render/<stem>-<key>/render.json     (source path, key, quarto version)
+
+Usage:
+    python3 scripts/render_stage.py Quarto/Lecture1_Example.qmd
+    python3 scripts/render_stage.py --print-dirs Quarto/*.qmd
+    python3 scripts/render_stage.py --force Quarto/Lecture1_Example.qmd
+    python3 scripts/render_stage.py --jobs 4 Quarto/*.qmd
+    python3 scripts/render_stage.py --batch Quarto/*.qmd
+
+Exit codes:
+    0 = all files rendered (or reused)
+    1 = at least one render failed
+"""
+
+import os
+import re
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+import time
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from resource_cache import resolve as resolve_resources
+from resource_policy import ResourcePolicy, run_limited
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BUILD_DIR = REPO_ROOT / '_build' / 'render'
+RENDER_TIMEOUT = 120
+
+# Progress header quarto prints before each file of a project render
+PROGRESS_PATTERN = re.compile(r'^\[\s*\d+/\d+\]\s+(.+?)\s*$')
+PROJECT_FILES = ('_quarto.yml', '_quarto.yaml')
+# First line of the temporary project file of a --batch render (followed by the owner pid)
+TEMP_PROJECT_MARKER = '# Temporary project written by scripts/render_stage.py --batch'
+
+# Anything that looks like a relative path to a local input of a lecture:
+# markdown images/links, {{< include >}}, front-matter theme/bibliography/csl
+# entries and file paths quoted in code chunks.
+DEPENDENCY_PATTERN = re.compile(
+    r'[\w./-]+\.(?:qmd|md|R|r|tex|bib|csl|scss|css|js|html|png|jpe?g|gif|svg|pdf|rds|RData|csv)\b'
+)
+
+
+class RenderResult(NamedTuple):
+    ok: bool
+    error: str
+    artifact_dir: Optional[Path]
+    cached: bool
+    limit: str = ''     # 'timeout'/'oom' if the render was stopped by its resource policy, 'killed' from outside
+    misses: Tuple[str, ...] = ()    # remote resources with no vendored copy (fetched by quarto)
+
+    @property
+    def html(self) -> Optional[Path]:
+        """Rendered HTML inside the artifact directory."""
+        if self.artifact_dir is None:
+            return None
+        manifest = json.loads((self.artifact_dir / 'render.json').read_text(encoding='utf-8'))
+        return self.artifact_dir / manifest['html']
+
+
+@lru_cache(maxsize=None)
+def quarto_version() -> str:
+    """Return `quarto --version`, or 'missing' if Quarto is not installed."""
+    try:
+        result = subprocess.run(['quarto', '--version'], capture_output=True, text=True, timeout=30)
+        return result.stdout.strip()
+    except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
+        return 'missing'
+
+
+def config_files(qmd: Path) -> List[Path]:
+    """Project and directory metadata files quarto may read for qmd (its directory and every parent)."""
+    found = []
+    for directory in qmd.resolve().parents:
+        for name in PROJECT_FILES + ('_metadata.yml',):
+            path = directory / name
+            if path.is_file() and _temporary_project_owner(path) is None:
+                found.append(path)
+    return found
+
+
+def local_dependencies(qmd: Path) -> List[Path]:
+    """Existing local files a lecture references, following .qmd includes,
+    plus the project/metadata files quarto reads and the themes they name."""
+    seen = {qmd.resolve()}
+    pending = [qmd]
+    deps = []
+    for config in config_files(qmd):
+        seen.add(config)
+        deps.append(config)
+        pending.append(config)
+    while pending:
+        source = pending.pop()
+        try:
+            text = source.read_text(encoding='utf-8')
+        except (OSError, UnicodeDecodeError):
+            continue
+        for token in DEPENDENCY_PATTERN.findall(text):
+            if '://' in token:
+                continue
+            candidate = (source.parent / token).resolve()
+            if candidate in seen or not candidate.is_file():
+                continue
+            seen.add(candidate)
+            deps.append(candidate)
+            if candidate.suffix in ('.qmd', '.scss'):
+                pending.append(candidate)
+    return sorted(deps)
+
+
+def render_key(qmd: Path) -> str:
+    """Hash of the source path and content, its local dependencies, vendored
+    copies of its remote resources and the Quarto version."""
+    digest = hashlib.sha256()
+    digest.update(str(qmd.resolve()).encode())
+    digest.update(quarto_version().encode())
+    digest.update(qmd.read_bytes())
+    for dep in local_dependencies(qmd) + resolve_resources(qmd).files:
+        digest.update(str(dep).encode())
+        digest.update(hashlib.sha256(dep.read_bytes()).digest())
+    return digest.hexdigest()[:16]
+
+
+def artifact_dir_for(qmd: Path, build_dir: Path = DEFAULT_BUILD_DIR) -> Path:
+    """Where the artifacts for the current state of qmd live (may not exist yet)."""
+    return build_dir / f'{qmd.stem}-{render_key(qmd)}'
+
+
+def _prune_stale(qmd: Path, keep: Path, build_dir: Path) -> None:
+    """Remove older artifact dirs rendered from the same source path."""
+    source = str(qmd.resolve())
+    for candidate in build_dir.glob(f'{qmd.stem}-*'):
+        if candidate == keep or not candidate.is_dir():
+            continue
+        try:
+            manifest = json.loads((candidate / 'render.json').read_text(encoding='utf-8'))
+        except (FileNotFoundError, json.JSONDecodeError, OSError):
+            continue
+        if manifest.get('source') == source:
+            shutil.rmtree(candidate, ignore_errors=True)
+
+
+def render(qmd: Path, build_dir: Path = DEFAULT_BUILD_DIR, force: bool = False,
+           timeout: int = RENDER_TIMEOUT, policy: Optional[ResourcePolicy] = None) -> RenderResult:
+    """Render qmd into the build dir, reusing an existing artifact unless force.
+
+    policy caps the whole quarto process tree (default: wall time timeout).
+    """
+    resources = resolve_resources(qmd)
+    misses = tuple(resources.misses)
+    target = artifact_dir_for(qmd, build_dir)
+    if not force and (target / 'render.json').exists():
+        return RenderResult(True, '', target, True, misses=misses)
+
+    policy = policy or ResourcePolicy(wall=timeout)
+    try:
+        result = run_limited(['quarto', 'render', qmd.name] + resources.overrides, policy, cwd=qmd.parent)
+    except FileNotFoundError:
+        return RenderResult(False, 'Quarto not installed', None, False, misses=misses)
+    if result.limit:
+        return RenderResult(False, f'Compilation stopped: {result.detail}', None, False, result.limit, misses)
+
+    if result.returncode != 0:
+        return RenderResult(False, result.stderr, None, False, misses=misses)
+
+    return _store_artifact(qmd, target, build_dir)._replace(misses=misses)
+
+
+def _store_artifact(qmd: Path, target: Path, build_dir: Path) -> RenderResult:
+    """Move freshly rendered output next to qmd into the artifact dir target."""
+    html = qmd.with_suffix('.html')
+    files_dir = qmd.parent / f'{qmd.stem}_files'
+    if not html.exists():
+        return RenderResult(False, f'Rendered output not found: {html.name}', None, False)
+
+    # Assemble in a temp dir, then swap into place
+    staging = build_dir / f'.{target.name}.tmp'
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    shutil.move(str(html), str(staging / html.name))
+    if files_dir.is_dir():
+        shutil.move(str(files_dir), str(staging / files_dir.name))
+    (staging / 'render.json').write_text(json.dumps({
+        'source': str(qmd.resolve()),
+        'key': target.name.rsplit('-', 1)[1],
+        'html': html.name,
+        'quarto_version': quarto_version(),
+        'rendered_at': datetime.now().isoformat(timespec='seconds'),
+    }, indent=2), encoding='utf-8')
+
+    shutil.rmtree(target, ignore_errors=True)
+    staging.rename(target)
+    _prune_stale(qmd, target, build_dir)
+    return RenderResult(True, '', target, False)
+
+
+def _split_progress(stderr: str) -> Dict[str, str]:
+    """Split project-render stderr into per-file segments by progress header."""
+    segments: Dict[str, List[str]] = {}
+    current = None
+    for line in stderr.splitlines():
+        match = PROGRESS_PATTERN.match(line)
+        if match:
+            current = Path(match.group(1)).name
+            segments[current] = []
+        elif current is not None:
+            segments[current].append(line)
+    return {name: '\n'.join(lines) for name, lines in segments.items()}
+
+
+def _temporary_project_owner(path: Path) -> Optional[int]:
+    """pid of the batch that wrote a temporary project file (0 if unknown); None for other files."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            first = f.readline()
+    except (OSError, UnicodeDecodeError):
+        return None
+    if not first.startswith(TEMP_PROJECT_MARKER):
+        return None
+    match = re.search(r'pid (\d+)', first)
+    return int(match.group(1)) if match else 0
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _claim_project_file(directory: Path) -> Optional[Path]:
+    """Create the temporary project file of a batch render in directory (O_EXCL).
+
+    Returns None if directory holds a real Quarto project or another live
+    batch is rendering it. A temporary project file left behind by a batch
+    that was killed (its pid is gone) is removed first. The caller removes
+    the returned file when the batch is done.
+    """
+    for name in PROJECT_FILES:
+        existing = directory / name
+        if not existing.exists():
+            continue
+        owner = _temporary_project_owner(existing)
+        if owner is None or _pid_alive(owner):
+            return None
+        existing.unlink(missing_ok=True)
+    project_file = directory / PROJECT_FILES[0]
+    try:
+        fd = os.open(project_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        return None
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(f'{TEMP_PROJECT_MARKER} (pid {os.getpid()})\n')
+    return project_file
+
+
+def _render_project(project_file: Path, qmds: List[Path], policy: ResourcePolicy, overrides: List[str]):
+    """One `quarto render` over qmds through the claimed temporary project file.
+
+    overrides (-M metadata arguments) apply to every file, so qmds must
+    share them. Time limits of policy scale with the number of files;
+    memory does not.
+    Returns (returncode, stderr), or None if a limit stopped the batch.
+    """
+    render_list = '\n'.join(f'    - {json.dumps(q.name)}' for q in qmds)
+    project_file.write_text(
+        f'{TEMP_PROJECT_MARKER} (pid {os.getpid()})\n'
+        f'project:\n  type: default\n  render:\n{render_list}\n',
+        encoding='utf-8'
+    )
+    scaled = policy._replace(
+        wall=policy.wall * len(qmds) if policy.wall is not None else None,
+        cpu=policy.cpu * len(qmds) if policy.cpu is not None else None,
+    )
+    result = run_limited(['quarto', 'render'] + overrides, scaled, cwd=project_file.parent)
+    if result.limit:
+        return None
+    return result.returncode, result.stderr
+
+
+def render_batch(qmds: List[Path], build_dir: Path = DEFAULT_BUILD_DIR, force: bool = False,
+                 timeout: int = RENDER_TIMEOUT,
+                 policy: Optional[ResourcePolicy] = None) -> Dict[Path, RenderResult]:
+    """Render many lectures with one project-level quarto invocation per directory.
+
+    Lectures with a current artifact are reused. The rest are rendered
+    together, paying Deno and engine startup once. Quarto stops a project
+    render at the first failing file; that file gets its own stderr
+    segment as the error and the batch resumes with the files after it.
+    Directories that already hold a real Quarto project (or are being
+    batch-rendered by another run), and batches whose failure cannot be
+    attributed to a file, fall back to render(). Lectures
+    are batched with others that resolve to the same vendored resources,
+    since the -M overrides apply to the whole invocation.
+    """
+    policy = policy or ResourcePolicy(wall=timeout)
+    resources = {qmd: resolve_resources(qmd) for qmd in qmds}
+    results: Dict[Path, RenderResult] = {}
+    pending: Dict[Tuple[Path, Tuple[str, ...]], List[Path]] = {}
+    for qmd in qmds:
+        target = artifact_dir_for(qmd, build_dir)
+        if not force and (target / 'render.json').exists():
+            results[qmd] = RenderResult(True, '', target, True)
+        else:
+            pending.setdefault((qmd.parent.resolve(), tuple(resources[qmd].overrides)), []).append(qmd)
+
+    for (directory, overrides), remaining in pending.items():
+        project_file = _claim_project_file(directory)
+        if project_file is None:
+            # A real Quarto project, or another batch is rendering this directory
+            for qmd in remaining:
+                results[qmd] = render(qmd, build_dir, force=True, policy=policy)
+            continue
+
+        try:
+            while remaining:
+                started = time.time()
+                try:
+                    outcome = _render_project(project_file, remaining, policy, list(overrides))
+                except FileNotFoundError:
+                    for qmd in remaining:
+                        results[qmd] = RenderResult(False, 'Quarto not installed', None, False)
+                    break
+
+                if outcome is None:
+                    # Batch hit a resource limit: isolate the heavy lecture one by one
+                    for qmd in remaining:
+                        results[qmd] = render(qmd, build_dir, force=True, policy=policy)
+                    break
+
+                returncode, stderr = outcome
+                segments = _split_progress(stderr)
+                failed_name = list(segments)[-1] if returncode != 0 and segments else None
+                if failed_name not in {q.name for q in remaining}:
+                    failed_name = None
+
+                still_pending = []
+                for qmd in remaining:
+                    html = qmd.with_suffix('.html')
+                    if qmd.name == failed_name:
+                        results[qmd] = RenderResult(False, segments[failed_name] or stderr, None, False)
+                    elif html.exists() and html.stat().st_mtime >= started - 1:
+                        results[qmd] = _store_artifact(qmd, artifact_dir_for(qmd, build_dir), build_dir)
+                    else:
+                        still_pending.append(qmd)
+
+                if returncode != 0 and failed_name is None:
+                    # Failure not attributable to a file: render the rest individually
+                    for qmd in still_pending:
+                        results[qmd] = render(qmd, build_dir, force=True, policy=policy)
+                    break
+                if returncode == 0:
+                    for qmd in still_pending:
+                        missing = qmd.with_suffix('.html').name
+                        results[qmd] = RenderResult(False, f'Rendered output not found: {missing}', None, False)
+                    break
+                remaining = still_pending
+        finally:
+            project_file.unlink(missing_ok=True)
+
+    return {qmd: result._replace(misses=tuple(resources[qmd].misses)) for qmd, result in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render Quarto files once into the shared build directory')
+    parser.add_argument('filepaths', type=Path, nargs='+', help='Quarto file(s) to render')
+    parser.add_argument('--build-dir', type=Path, default=DEFAULT_BUILD_DIR,
+                        help=f'Artifact directory (default: {DEFAULT_BUILD_DIR.relative_to(REPO_ROOT)})')
+    parser.add_argument('--force', action='store_true', help='Re-render even if an artifact exists')
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help='Render up to N lectures in parallel (default: 1)')
+    parser.add_argument('--batch', action='store_true',
+                        help='Render all dirty lectures in one project-level quarto invocation per directory')
+    parser.add_argument('--print-dirs', action='store_true',
+                        help='Print only the artifact directory of each successful render (for scripts)')
+    args = parser.parse_args()
+
+    def render_one(qmd: Path) -> Optional[RenderResult]:
+        if not qmd.exists():
+            return None
+        return render(qmd, build_dir=args.build_dir, force=args.force)
+
+    if args.batch:
+        existing = [q for q in args.filepaths if q.exists()]
+        batch = render_batch(existing, build_dir=args.build_dir, force=args.force)
+        results = [batch.get(q) for q in args.filepaths]
+    else:
+        # Lectures are rendered in separate quarto processes, so threads suffice
+        with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+            results = list(pool.map(render_one, args.filepaths))
+
+    exit_code = 0
+    for qmd, result in zip(args.filepaths, results):
+        if result is None:
+            print(f"Error: File not found: {qmd}", file=sys.stderr)
+            exit_code = 1
+            continue
+
+        for url in result.misses:
+            print(f"Warning: {qmd}: remote resource not vendored, render needs network: {url} "
+                  f"(run scripts/resource_cache.py --fetch)", file=sys.stderr)
+
+        if not result.ok:
+            print(f"Warning: Failed to render {qmd}: {result.error.strip()[:500]}", file=sys.stderr)
+            exit_code = 1
+            continue
+
+        if args.print_dirs:
+            print(result.artifact_dir)
+        else:
+            state = 'reused' if result.cached else 'rendered'
+            print(f"  {qmd.name}: {state} -> {result.artifact_dir}")
+
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Resource Cache — Vendored Copies of Remote Front-Matter Resources
+
+Lectures may point front-matter resources at URLs, e.g.
+
+    csl: https://raw.githubusercontent.com/citation-style-language/styles/master/american-political-science-review.csl
+
+Fetched once into a vendored cache directory, these are substituted at
+render time with `quarto render -M key:<local copy>`. The source keeps its
+URL and renders need no network and always see the same bytes.
+render_stage.py applies the substitution to every render (the quality
+scorer and sync_to_docs.sh included) and reports URLs that are not cached
+yet; those renders still go to the network as before.
+
+Resolved keys: csl, bibliography, citation-abbreviations. Quarto's
+{{< include >}} only accepts local files, so includes need no handling.
+
+Layout (commit it, so every checkout renders offline):
+    Quarto/_resources/<urlhash>-<name>      (cached file)
+    Quarto/_resources/manifest.json         (url -> file, sha256, fetched_at)
+
+Usage:
+    python3 scripts/resource_cache.py Quarto/*.qmd                  # report cached / missing
+    python3 scripts/resource_cache.py --fetch Quarto/*.qmd          # fetch what is missing
+    python3 scripts/resource_cache.py --fetch --refresh Quarto/*.qmd
+
+Exit codes:
+    0 = every remote resource is cached
+    1 = at least one remote resource is missing (or could not be fetched)
+"""
+
+import re
+import sys
+import json
+import hashlib
+import argparse
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CACHE_DIR = REPO_ROOT / 'Quarto' / '_resources'
+MANIFEST_NAME = 'manifest.json'
+FETCH_TIMEOUT = 30
+REMOTE_KEYS = ('csl', 'bibliography', 'citation-abbreviations')
+
+URL_PATTERN = re.compile(r'^https?://', re.IGNORECASE)
+FRONT_MATTER_KEY_PATTERN = re.compile(r'^([A-Za-z][\w-]*):\s*(.*?)\s*$')
+
+
+class Resolution(NamedTuple):
+    overrides: List[str]    # extra `quarto render` arguments (-M key:value pairs)
+    files: List[Path]       # cached files substituted for URLs
+    misses: List[str]       # URLs with no cached copy (the render fetches them)
+
+
+def front_matter_values(qmd: Path) -> Dict[str, List[str]]:
+    """Values of the REMOTE_KEYS in the leading `---` block (scalars, flow or block lists)."""
+    values: Dict[str, List[str]] = {}
+    try:
+        with open(qmd, encoding='utf-8') as f:
+            if f.readline().strip() != '---':
+                return values
+            current = None
+            for line in f:
+                if line.strip() == '---':
+                    break
+                if current is not None and line.strip().startswith('- '):
+                    values[current].append(line.strip()[2:].strip().strip('"\''))
+                    continue
+                current = None
+                match = FRONT_MATTER_KEY_PATTERN.match(line)
+                if not match or match.group(1) not in REMOTE_KEYS:
+                    continue
+                key, value = match.groups()
+                if value.startswith('['):
+                    values[key] = [v.strip().strip('"\'') for v in value.strip('[]').split(',') if v.strip()]
+                elif value:
+                    values[key] = [value.strip('"\'')]
+                else:
+                    values[key] = []
+                    current = key
+    except (OSError, UnicodeDecodeError):
+        pass
+    return values
+
+
+def remote_urls(qmd: Path) -> List[str]:
+    """Every URL among the resolvable front-matter resources of a lecture."""
+    return [v for vs in front_matter_values(qmd).values() for v in vs if URL_PATTERN.match(v)]
+
+
+def load_manifest(cache_dir: Path = DEFAULT_CACHE_DIR) -> Dict[str, Dict]:
+    try:
+        return json.loads((cache_dir / MANIFEST_NAME).read_text(encoding='utf-8'))
+    except (FileNotFoundError, json.JSONDecodeError, OSError):
+        return {}
+
+
+def cached_file(url: str, manifest: Dict[str, Dict], cache_dir: Path = DEFAULT_CACHE_DIR) -> Optional[Path]:
+    """Local copy of url, or None if it has not been fetched."""
+    entry = manifest.get(url)
+    if entry is None:
+        return None
+    path = cache_dir / entry['file']
+    return path if path.is_file() else None
+
+
+def resolve(qmd: Path, cache_dir: Path = DEFAULT_CACHE_DIR) -> Resolution:
+    """Render arguments that substitute cached copies for a lecture's remote resources.
+
+    A key is only overridden when all of its URLs are cached; otherwise it
+    is left alone and its missing URLs are reported.
+    """
+    values = front_matter_values(qmd)
+    if not any(URL_PATTERN.match(v) for vs in values.values() for v in vs):
+        return Resolution([], [], [])
+    manifest = load_manifest(cache_dir)
+    overrides, files, misses = [], [], []
+    for key, items in values.items():
+        if not any(URL_PATTERN.match(v) for v in items):
+            continue
+        resolved = []
+        for item in items:
+            if not URL_PATTERN.match(item):
+                resolved.append(item)
+                continue
+            local = cached_file(item, manifest, cache_dir)
+            if local is None:
+                misses.append(item)
+            else:
+                files.append(local)
+                resolved.append(str(local))
+        if len(resolved) == len(items):
+            # Quarto reads -M values as YAML; JSON strings and lists are valid YAML
+            value = resolved[0] if len(resolved) == 1 else resolved
+            overrides += ['-M', f'{key}:{json.dumps(value)}']
+    return Resolution(overrides, files, misses)
+
+
+def _cache_name(url: str) -> str:
+    name = re.sub(r'[^\w.-]', '_', url.rstrip('/').rsplit('/', 1)[-1].split('?')[0]) or 'resource'
+    return f'{hashlib.sha256(url.encode()).hexdigest()[:12]}-{name}'
+
+
+def fetch(urls: List[str], cache_dir: Path = DEFAULT_CACHE_DIR, refresh: bool = False) -> Dict[str, str]:
+    """Download urls into the cache (skipping cached ones unless refresh).
+
+    Returns {url: error} for the downloads that failed.
+    """
+    manifest = load_manifest(cache_dir)
+    errors = {}
+    for url in dict.fromkeys(urls):
+        if not refresh and cached_file(url, manifest, cache_dir) is not None:
+            continue
+        try:
+            with urllib.request.urlopen(url, timeout=FETCH_TIMEOUT) as response:
+                data = response.read()
+        except (OSError, ValueError) as e:
+            errors[url] = str(e)
+            continue
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        name = _cache_name(url)
+        tmp = cache_dir / f'.{name}.tmp'
+        tmp.write_bytes(data)
+        tmp.replace(cache_dir / name)
+        manifest[url] = {
+            'file': name,
+            'sha256': hashlib.sha256(data).hexdigest(),
+            'fetched_at': datetime.now().isoformat(timespec='seconds'),
+        }
+    if manifest:
+        tmp = cache_dir / f'.{MANIFEST_NAME}.tmp'
+        tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True) + '\n', encoding='utf-8')
+        tmp.replace(cache_dir / MANIFEST_NAME)
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Vendor remote CSL/bibliography resources of Quarto lectures')
+    parser.add_argument('filepaths', type=Path, nargs='+', help='Quarto file(s) to resolve')
+    parser.add_argument('--cache-dir', type=Path, default=DEFAULT_CACHE_DIR,
+                        help=f'Vendored cache directory (default: {DEFAULT_CACHE_DIR.relative_to(REPO_ROOT)})')
+    parser.add_argument('--fetch', action='store_true', help='Download resources that are not cached yet')
+    parser.add_argument('--refresh', action='store_true', help='With --fetch, download cached resources again')
+    args = parser.parse_args()
+
+    urls = {}
+    for qmd in args.filepaths:
+        if not qmd.exists():
+            print(f"Error: File not found: {qmd}", file=sys.stderr)
+            continue
+        for url in remote_urls(qmd):
+            urls.setdefault(url, []).append(qmd)
+
+    errors = fetch(list(urls), args.cache_dir, refresh=args.refresh) if args.fetch else {}
+
+    manifest = load_manifest(args.cache_dir)
+    exit_code = 0
+    for url, lectures in urls.items():
+        local = cached_file(url, manifest, args.cache_dir)
+        users = ', '.join(q.name for q in lectures)
+        if local is not None:
+            print(f"  cached: {url} -> {local.name} ({users})")
+        else:
+            reason = f": {errors[url]}" if url in errors else ''
+            print(f"  MISSING: {url} ({users}){reason}", file=sys.stderr)
+            exit_code = 1
+    if not urls:
+        print("No remote resources referenced")
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
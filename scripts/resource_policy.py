@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Resource Policy — Wall/CPU/Memory Caps for Checker Subprocesses
+
+Runs a checker command (quarto render, latexmk, Rscript) in its own process
+group under a ResourcePolicy and kills the whole process tree on overrun:
+
+    wall   seconds of elapsed time
+    cpu    seconds of CPU summed over the process tree
+    rss    megabytes of resident memory summed over the process tree
+
+Tree usage is sampled from /proc (Linux), which covers knitr/R children and
+Deno workers that a per-process rlimit would miss; RLIMIT_CPU is also set
+on the top process as a backstop. Where /proc is unavailable only the wall
+limit applies. A run that hits a limit is reported as 'timeout' (wall or
+CPU) or 'oom', and one SIGKILLed from outside as 'oom' if the kernel
+recorded an OOM kill in our cgroup, else 'killed', so callers can mark the
+check instead of failing the file.
+
+Policies are per check and can be overridden with specs of the form
+CHECK:KEY=VALUE, e.g. render:wall=300, render:rss=4096, r_parse:cpu=20.
+"""
+
+import os
+import signal
+import subprocess
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+try:
+    import resource
+except ImportError:     # not on Windows
+    resource = None
+
+SAMPLE_INTERVAL = 0.2
+KILL_GRACE = 2.0
+PROC = Path('/proc')
+PAGE_BYTES = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+CGROUP_ROOT = Path('/sys/fs/cgroup')
+
+
+class ResourcePolicy(NamedTuple):
+    wall: Optional[float] = None    # seconds
+    cpu: Optional[float] = None     # CPU seconds, whole tree
+    rss: Optional[int] = None       # MiB, whole tree
+
+    def describe(self) -> str:
+        parts = []
+        if self.wall is not None:
+            parts.append(f'wall {self.wall:g}s')
+        if self.cpu is not None:
+            parts.append(f'cpu {self.cpu:g}s')
+        if self.rss is not None:
+            parts.append(f'rss {self.rss} MiB')
+        return ', '.join(parts) or 'unlimited'
+
+
+class LimitedRun(NamedTuple):
+    returncode: Optional[int]
+    stdout: str
+    stderr: str
+    limit: str      # '' if the command ran to completion, else 'timeout', 'oom' or 'killed'
+    detail: str     # which limit was exceeded, for messages
+
+
+def apply_limit_specs(policies: Dict[str, ResourcePolicy],
+                      specs: Iterable[str]) -> Dict[str, ResourcePolicy]:
+    """Return a copy of policies with CHECK:KEY=VALUE overrides applied.
+
+    A value of 0 or 'none' removes that limit. Raises ValueError on a
+    malformed spec or an unknown check/key.
+    """
+    policies = dict(policies)
+    for spec in specs:
+        try:
+            check, setting = spec.split(':', 1)
+            key, value = setting.split('=', 1)
+        except ValueError:
+            raise ValueError(f'expected CHECK:KEY=VALUE, got {spec!r}')
+        if check not in policies:
+            raise ValueError(f'unknown check {check!r} (one of: {", ".join(sorted(policies))})')
+        if key not in ResourcePolicy._fields:
+            raise ValueError(f'unknown limit {key!r} (one of: {", ".join(ResourcePolicy._fields)})')
+        try:
+            number = None if value.lower() in ('0', 'none') else float(value)
+        except ValueError:
+            raise ValueError(f'not a number: {value!r}')
+        if key == 'rss' and number is not None:
+            number = int(number)
+        policies[check] = policies[check]._replace(**{key: number})
+    return policies
+
+
+def _stat(pid: int) -> Optional[List[str]]:
+    """Fields of /proc/<pid>/stat after the command name (field 3 onwards)."""
+    try:
+        data = (PROC / str(pid) / 'stat').read_text()
+    except OSError:
+        return None
+    return data[data.rfind(')') + 2:].split()
+
+
+def process_tree(root: int) -> Set[int]:
+    """root, its descendants and anything left in its process group."""
+    parents: Dict[int, List[int]] = {}
+    tree = {root}
+    try:
+        entries = os.listdir(PROC)
+    except OSError:
+        return tree
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        fields = _stat(int(entry))
+        if fields is None:
+            continue
+        pid, ppid, pgrp = int(entry), int(fields[1]), int(fields[2])
+        parents.setdefault(ppid, []).append(pid)
+        if pgrp == root:
+            tree.add(pid)
+    pending = list(tree)
+    while pending:
+        for child in parents.get(pending.pop(), ()):
+            if child not in tree:
+                tree.add(child)
+                pending.append(child)
+    return tree
+
+
+def tree_usage(root: int) -> Tuple[float, float, Set[int]]:
+    """(CPU seconds, RSS MiB, pids) summed over the process tree of root.
+
+    CPU includes children the root has already reaped.
+    """
+    cpu_ticks = 0
+    rss_pages = 0
+    pids = process_tree(root)
+    for pid in pids:
+        fields = _stat(pid)
+        if fields is None:
+            continue
+        cpu_ticks += int(fields[11]) + int(fields[12])
+        if pid == root:
+            cpu_ticks += int(fields[13]) + int(fields[14])
+        rss_pages += int(fields[21])
+    return cpu_ticks / CLOCK_TICKS, rss_pages * PAGE_BYTES / (1 << 20), pids
+
+
+def kill_tree(proc: subprocess.Popen, pids: Optional[Set[int]] = None) -> None:
+    """SIGTERM the process group and tree, then SIGKILL whatever is left."""
+    pids = set(pids or ()) | process_tree(proc.pid)
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(proc.pid, sig)
+        except OSError:
+            pass
+        for pid in pids:
+            try:
+                os.kill(pid, sig)
+            except OSError:
+                pass
+        try:
+            proc.wait(timeout=KILL_GRACE)
+            if sig == signal.SIGTERM:
+                # Top process is gone; give stragglers in the tree the same signal once more
+                pids = process_tree(proc.pid) - {proc.pid}
+                if not pids:
+                    return
+        except subprocess.TimeoutExpired:
+            continue
+
+
+def oom_kills() -> Optional[int]:
+    """OOM kills the kernel has counted in our cgroup (cgroup v2), None if unknown."""
+    try:
+        for line in (PROC / 'self' / 'cgroup').read_text().splitlines():
+            if line.startswith('0::'):
+                events = (CGROUP_ROOT / line[3:].lstrip('/') / 'memory.events').read_text()
+                break
+        else:
+            return None
+    except OSError:
+        return None
+    for line in events.splitlines():
+        key, _, value = line.partition(' ')
+        if key == 'oom_kill':
+            return int(value)
+    return None
+
+
+def set_cpu_rlimit(pid: int, policy: ResourcePolicy) -> None:
+    """Backstop: RLIMIT_CPU on one process (Linux prlimit), ignored where unsupported."""
+    if policy.cpu is None or resource is None or not hasattr(resource, 'prlimit'):
+        return
+    soft = max(1, int(policy.cpu + 0.999))
+    try:
+        resource.prlimit(pid, resource.RLIMIT_CPU, (soft, soft + 5))
+    except (OSError, ValueError):
+        pass
+
+
+def exceeded(policy: ResourcePolicy, elapsed: float, cpu: float, rss: float) -> Tuple[str, str]:
+    """('timeout'|'oom', detail) for the first limit exceeded, else ('', '')."""
+    if policy.wall is not None and elapsed > policy.wall:
+        return 'timeout', f'wall time limit exceeded (>{policy.wall:g}s)'
+    if policy.cpu is not None and cpu > policy.cpu:
+        return 'timeout', f'CPU time limit exceeded (>{policy.cpu:g}s)'
+    if policy.rss is not None and rss > policy.rss:
+        return 'oom', f'memory limit exceeded ({rss:.0f} MiB > {policy.rss} MiB)'
+    return '', ''
+
+
+def run_limited(cmd: List[str], policy: ResourcePolicy, cwd: Optional[Path] = None,
+                env: Optional[dict] = None) -> LimitedRun:
+    """Run cmd to completion under policy, capturing text output.
+
+    The command runs in a new session so its whole tree can be killed.
+    Raises FileNotFoundError if the executable does not exist.
+    """
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        cwd=cwd,
+        env=env,
+        start_new_session=True
+    )
+    set_cpu_rlimit(proc.pid, policy)
+    oom_kills_before = oom_kills()
+    watch_tree = (policy.cpu is not None or policy.rss is not None) and PROC.is_dir()
+    started = time.monotonic()
+    while True:
+        try:
+            stdout, stderr = proc.communicate(timeout=SAMPLE_INTERVAL)
+            break
+        except subprocess.TimeoutExpired:
+            pass
+        cpu, rss, pids = tree_usage(proc.pid) if watch_tree else (0.0, 0.0, set())
+        limit, detail = exceeded(policy, time.monotonic() - started, cpu, rss)
+        if limit:
+            kill_tree(proc, pids)
+            stdout, stderr = proc.communicate()
+            return LimitedRun(proc.returncode, stdout, stderr, limit, detail)
+
+    if hasattr(signal, 'SIGXCPU') and policy.cpu is not None and proc.returncode == -signal.SIGXCPU:
+        return LimitedRun(proc.returncode, stdout, stderr, 'timeout',
+                          f'CPU time limit exceeded (>{policy.cpu:g}s)')
+    if proc.returncode == -signal.SIGKILL:
+        # Killed from outside: the kernel OOM killer, or a user / supervisor
+        after = oom_kills()
+        if oom_kills_before is not None and after is not None and after > oom_kills_before:
+            return LimitedRun(proc.returncode, stdout, stderr, 'oom', 'killed by the system (out of memory)')
+        return LimitedRun(proc.returncode, stdout, stderr, 'killed', 'killed by signal SIGKILL')
+    return LimitedRun(proc.returncode, stdout, stderr, '', '')
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Score History — Append-Only SQLite Store of Quality Scores per Commit
+
+Every quality_score.py run appends one row per scored file (score, status,
+issue counts and, with --profile, check timings) under a run tagged with
+the current commit and branch, all in a single transaction. A small
+`latest` table is kept up to date alongside: current and previous score of
+each file plus its last few scores (one per commit), so the dashboard
+(`quality_score.py --report`) reads one row per file instead of scanning
+the history.
+
+Layout (quality_reports/quality_history.sqlite):
+    runs    (id, commit_sha, branch, recorded_at)
+    scores  (filepath, run_id, score, status, critical, major, minor, timings)   append-only
+    latest  (filepath, run_id, commit_sha, score, status, ..., previous_score, recent)
+
+File paths are stored relative to the repository root, so runs started
+from different directories land on the same rows.
+"""
+
+import json
+import sqlite3
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_HISTORY = REPO_ROOT / 'quality_reports' / 'quality_history.sqlite'
+SCHEMA_VERSION = 1
+# Scores kept per file in latest.recent (one per commit)
+TREND_LENGTH = 8
+# Worst to best; a move to a lower rank is a regression even at equal score
+STATUS_RANK = {'FAIL': 0, 'INCOMPLETE': 1, 'BLOCKED': 2, 'COMMIT_READY': 3, 'PR_READY': 4, 'EXCELLENCE': 5}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    commit_sha TEXT,
+    branch TEXT,
+    recorded_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scores (
+    filepath TEXT NOT NULL,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    score INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    critical INTEGER NOT NULL,
+    major INTEGER NOT NULL,
+    minor INTEGER NOT NULL,
+    timings TEXT,
+    PRIMARY KEY (filepath, run_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS latest (
+    filepath TEXT PRIMARY KEY,
+    run_id INTEGER NOT NULL,
+    commit_sha TEXT,
+    score INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    critical INTEGER NOT NULL,
+    major INTEGER NOT NULL,
+    minor INTEGER NOT NULL,
+    previous_score INTEGER,
+    previous_status TEXT,
+    recent TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class HistoryEntry(NamedTuple):
+    filepath: str
+    score: int
+    status: str
+    critical: int
+    major: int
+    minor: int
+    timings: Optional[Dict]
+
+
+def history_entry(report: Dict) -> HistoryEntry:
+    """The part of a quality report that goes into the history."""
+    counts = report['issues']['counts']
+    return HistoryEntry(report['filepath'], report['score'], report['status'],
+                        counts['critical'], counts['major'], counts['minor'], report.get('timings'))
+
+
+def git_revision(cwd: Path = Path('.')) -> Dict[str, Optional[str]]:
+    """Top level, HEAD commit and branch in one git call (all None outside a repository)."""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--show-toplevel', 'HEAD', '--abbrev-ref', 'HEAD'],
+                                capture_output=True, text=True, cwd=cwd, timeout=10)
+        toplevel, commit, branch = result.stdout.split('\n')[:3]
+        if result.returncode != 0:
+            raise ValueError(result.stderr)
+    except (OSError, ValueError, subprocess.TimeoutExpired):
+        return {'toplevel': None, 'commit': None, 'branch': None}
+    return {'toplevel': toplevel, 'commit': commit, 'branch': branch}
+
+
+def is_regression(row: Dict) -> bool:
+    """Score dropped, or status got worse, since the previous commit."""
+    if row['previous_score'] is None:
+        return False
+    return (row['score'] < row['previous_score']
+            or STATUS_RANK.get(row['status'], 0) < STATUS_RANK.get(row['previous_status'], 0))
+
+
+class ScoreHistory:
+    """The SQLite score store. Opened per run; writes are batched into one transaction."""
+
+    def __init__(self, path: Path = DEFAULT_HISTORY):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), timeout=10)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        if self._db.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+            with self._db:
+                self._db.executescript(SCHEMA)
+                self._db.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+
+    def close(self) -> None:
+        self._db.close()
+
+    def record(self, entries: Iterable[HistoryEntry], revision: Optional[Dict] = None) -> int:
+        """Append one run with a row per entry and refresh `latest`; returns the run id.
+
+        Re-scoring a file at the commit it was last recorded at replaces
+        its trend point instead of adding one.
+        """
+        revision = revision or git_revision()
+        root = revision['toplevel']
+        # A file given twice in one run is recorded once
+        entries = {self._relative(e.filepath, root): e for e in entries}
+        with self._db:
+            run_id = self._db.execute(
+                'INSERT INTO runs (commit_sha, branch, recorded_at) VALUES (?, ?, ?)',
+                (revision['commit'], revision['branch'], datetime.now().isoformat(timespec='seconds'))
+            ).lastrowid
+            paths = list(entries)
+            current = {}
+            for start in range(0, len(paths), 500):
+                chunk = paths[start:start + 500]
+                current.update((row['filepath'], row) for row in self._db.execute(
+                    f'SELECT * FROM latest WHERE filepath IN ({",".join("?" * len(chunk))})', chunk))
+
+            scores, latest = [], []
+            for path, entry in entries.items():
+                scores.append((path, run_id, entry.score, entry.status, entry.critical, entry.major,
+                               entry.minor, json.dumps(entry.timings) if entry.timings else None))
+                old = current.get(path)
+                if old is None:
+                    previous, recent = (None, None), []
+                elif revision['commit'] is not None and old['commit_sha'] == revision['commit']:
+                    previous, recent = (old['previous_score'], old['previous_status']), old['recent'].split(',')[:-1]
+                else:
+                    previous, recent = (old['score'], old['status']), old['recent'].split(',')
+                recent = ','.join((recent + [str(entry.score)])[-TREND_LENGTH:])
+                latest.append((path, run_id, revision['commit'], entry.score, entry.status, entry.critical,
+                               entry.major, entry.minor, previous[0], previous[1], recent))
+
+            self._db.executemany('INSERT INTO scores VALUES (?, ?, ?, ?, ?, ?, ?, ?)', scores)
+            self._db.executemany('INSERT OR REPLACE INTO latest VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', latest)
+        return run_id
+
+    @staticmethod
+    def _relative(filepath: str, root: Optional[str]) -> str:
+        resolved = Path(filepath).resolve()
+        if root is not None:
+            try:
+                return resolved.relative_to(root).as_posix()
+            except ValueError:
+                pass
+        return resolved.as_posix()
+
+    def latest(self, prefixes: Optional[List[str]] = None) -> List[Dict]:
+        """Latest row of every file (optionally under path prefixes), sorted by path."""
+        rows = [dict(row) for row in self._db.execute('SELECT * FROM latest ORDER BY filepath')]
+        if prefixes:
+            rows = [r for r in rows if any(r['filepath'] == p or r['filepath'].startswith(p.rstrip('/') + '/')
+                                           for p in prefixes)]
+        return rows
+
+    def last_run(self) -> Optional[Dict]:
+        row = self._db.execute('SELECT * FROM runs ORDER BY id DESC LIMIT 1').fetchone()
+        return dict(row) if row is not None else None
+
+
+def report_prefixes(filepaths: List[Path], root: Optional[str]) -> List[str]:
+    """Dashboard filters: given paths, relative to the repository root like stored rows."""
+    return [ScoreHistory._relative(str(p), root) for p in filepaths]
+
+
+def render_dashboard(rows: List[Dict], last_run: Optional[Dict], path: Path) -> str:
+    """Markdown dashboard: regressions first, then every file's latest score and trend."""
+    lines = [f"# Quality Dashboard ({len(rows)} file(s))\n"]
+    if last_run is None or not rows:
+        lines.append(f"No scores recorded yet in {path}")
+        return '\n'.join(lines)
+
+    commit = (last_run['commit_sha'] or 'no commit')[:10]
+    branch = f" on {last_run['branch']}" if last_run['branch'] else ''
+    mean = sum(r['score'] for r in rows) / len(rows)
+    statuses = {}
+    for row in rows:
+        statuses[row['status']] = statuses.get(row['status'], 0) + 1
+    lines.append(f"**Last run:** {commit}{branch} at {last_run['recorded_at']}")
+    lines.append(f"**Mean score:** {mean:.1f}/100  " +
+                 '  '.join(f"**{s}:** {statuses[s]}" for s in sorted(statuses, key=STATUS_RANK.get)))
+
+    regressions = [r for r in rows if is_regression(r)]
+    lines.append(f"\n## Regressions: {len(regressions)}")
+    if regressions:
+        lines.append("| File | Score | Was | Status | Was | Commit |")
+        lines.append("|------|------:|----:|--------|-----|--------|")
+        for r in regressions:
+            lines.append(f"| {r['filepath']} | {r['score']} | {r['previous_score']} | {r['status']} | "
+                         f"{r['previous_status']} | {(r['commit_sha'] or '-')[:10]} |")
+
+    lines.append("\n## Latest Scores")
+    lines.append("| File | Score | Change | Status | Issues (crit/maj/min) | Recent (oldest first) |")
+    lines.append("|------|------:|-------:|--------|-----------------------|-----------------------|")
+    for r in rows:
+        change = '' if r['previous_score'] is None else f"{r['score'] - r['previous_score']:+d}"
+        lines.append(f"| {r['filepath']} | {r['score']} | {change} | {r['status']} | "
+                     f"{r['critical']}/{r['major']}/{r['minor']} | {r['recent'].replace(',', ' ')} |")
+    return '\n'.join(lines)
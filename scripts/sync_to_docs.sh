@@ -2,21 +2,55 @@
 # sync_to_docs.sh
 # Renders Quarto slides and syncs everything to docs/ for GitHub Pages
 #
-# Usage: ./scripts/sync_to_docs.sh [lecture_name]
+# Only lectures whose source, includes or referenced figures changed since
+# their last successful render are re-rendered (in parallel), and only files
+# whose content changed are rewritten under docs/.
+#
+# Usage: ./scripts/sync_to_docs.sh [-j N] [--batch] [lecture_name]
 # Examples:
 #   ./scripts/sync_to_docs.sh                    # Sync all lectures
 #   ./scripts/sync_to_docs.sh Lecture2           # Sync only Lecture2
+#   ./scripts/sync_to_docs.sh -j 4               # Render up to 4 lectures at once
+#   SYNC_JOBS=4 ./scripts/sync_to_docs.sh        # Same, via environment
+#   ./scripts/sync_to_docs.sh --batch            # One quarto invocation for all dirty lectures
 
 set -e
 
 REPO_ROOT="$(cd "$(dirname "$0")/.." && pwd)"
 QUARTO_DIR="$REPO_ROOT/Quarto"
 DOCS_DIR="$REPO_ROOT/docs"
+JOBS="${SYNC_JOBS:-2}"
+RENDER_MODE="--jobs"
+
+while [ $# -gt 0 ]; do
+    case "$1" in
+        -j|--jobs)
+            JOBS="$2"
+            shift 2
+            ;;
+        -b|--batch)
+            RENDER_MODE="--batch"
+            shift
+            ;;
+        *)
+            break
+            ;;
+    esac
+done
+
+if [ "$RENDER_MODE" = "--batch" ]; then
+    RENDER_STAGE=(python3 "$REPO_ROOT/scripts/render_stage.py" --print-dirs --batch)
+else
+    RENDER_STAGE=(python3 "$REPO_ROOT/scripts/render_stage.py" --print-dirs --jobs "$JOBS")
+fi
+DELTA_SYNC=(python3 "$REPO_ROOT/scripts/delta_sync.py")
 
 echo "=== Syncing Quarto slides to docs/ ==="
 echo "Repo root: $REPO_ROOT"
 
-# 1. Render Quarto files
+# 1. Render Quarto files (or reuse artifacts already built by quality_score.py)
+#    scripts/render_stage.py keeps outputs in _build/render/<lecture>-<hash>/
+#    and prints one artifact directory per successfully rendered lecture.
 cd "$QUARTO_DIR"
 
 if [ -n "$1" ]; then
@@ -24,68 +58,64 @@ if [ -n "$1" ]; then
     echo "Rendering $1..."
     matched_qmd=$(ls ${1}_*.qmd ${1}.qmd 2>/dev/null | head -1)
     if [ -n "$matched_qmd" ]; then
-        quarto render "$matched_qmd"
+        artifact_dirs=$("${RENDER_STAGE[@]}" "$matched_qmd")
     else
         echo "Error: No QMD file found matching '${1}'"
         exit 1
     fi
 else
     # Render all QMD files (skip backups)
-    echo "Rendering all Quarto files..."
+    if [ "$RENDER_MODE" = "--batch" ]; then
+        echo "Rendering all Quarto files (batched)..."
+    else
+        echo "Rendering all Quarto files ($JOBS parallel)..."
+    fi
+    qmd_files=()
     for qmd in *.qmd; do
         if [ -f "$qmd" ] && [[ ! "$qmd" == *"_backup"* ]]; then
-            echo "  Rendering $qmd..."
-            quarto render "$qmd" || echo "  Warning: Failed to render $qmd"
+            qmd_files+=("$qmd")
         fi
     done
+    artifact_dirs=""
+    if [ ${#qmd_files[@]} -gt 0 ]; then
+        # Failures are reported by render_stage.py; publish the rest
+        artifact_dirs=$("${RENDER_STAGE[@]}" "${qmd_files[@]}") || true
+    fi
 fi
 
-# 2. Sync HTML files and their _files directories to docs/slides/
+# 2. Sync rendered HTML files and their _files directories to docs/slides/
 echo "Syncing HTML and assets to docs/slides/..."
 mkdir -p "$DOCS_DIR/slides"
 
-for html in *.html; do
-    if [ -f "$html" ]; then
-        echo "  Copying $html..."
-        cp "$html" "$DOCS_DIR/slides/"
-
-        # Copy associated _files directory if it exists
-        files_dir="${html%.html}_files"
+while IFS= read -r artifact_dir; do
+    [ -n "$artifact_dir" ] || continue
+    sources=("$artifact_dir"/*.html)
+    for files_dir in "$artifact_dir"/*_files; do
         if [ -d "$files_dir" ]; then
-            echo "  Copying $files_dir/..."
-            rm -rf "$DOCS_DIR/slides/$files_dir"
-            cp -r "$files_dir" "$DOCS_DIR/slides/"
+            sources+=("$files_dir")
         fi
-    fi
-done
+    done
+    "${DELTA_SYNC[@]}" --delete "${sources[@]}" "$DOCS_DIR/slides"
+done <<< "$artifact_dirs"
 
 # 3. Sync Beamer PDFs to docs/slides/
 echo "Syncing Beamer PDFs..."
-for pdf in "$REPO_ROOT/Slides/"*.pdf; do
-    if [ -f "$pdf" ]; then
-        echo "  Copying $(basename "$pdf")..."
-        cp "$pdf" "$DOCS_DIR/slides/"
-    fi
-done
+pdfs=("$REPO_ROOT/Slides/"*.pdf)
+if [ -f "${pdfs[0]}" ]; then
+    "${DELTA_SYNC[@]}" "${pdfs[@]}" "$DOCS_DIR/slides"
+fi
 
 # 4. Sync R scripts to docs/files/code/
 echo "Syncing R scripts..."
 mkdir -p "$DOCS_DIR/files/code"
-for rscript in "$REPO_ROOT/scripts/R/"*.R; do
-    if [ -f "$rscript" ]; then
-        echo "  Copying $(basename "$rscript")..."
-        cp "$rscript" "$DOCS_DIR/files/code/"
-    fi
-done
+rscripts=("$REPO_ROOT/scripts/R/"*.R)
+if [ -f "${rscripts[0]}" ]; then
+    "${DELTA_SYNC[@]}" "${rscripts[@]}" "$DOCS_DIR/files/code"
+fi
 
-# 5. Sync Figures directory (using rsync for efficiency)
+# 5. Sync Figures directory (hash-compared, removes deleted figures)
 echo "Syncing Figures/..."
-if command -v rsync &> /dev/null; then
-    rsync -av --delete "$REPO_ROOT/Figures/" "$DOCS_DIR/Figures/"
-else
-    rm -rf "$DOCS_DIR/Figures"
-    cp -r "$REPO_ROOT/Figures" "$DOCS_DIR/Figures"
-fi
+"${DELTA_SYNC[@]}" --delete "$REPO_ROOT/Figures" "$DOCS_DIR"
 
 echo ""
 echo "=== Sync complete! ==="